@@ -0,0 +1,302 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, List, Optional, Set
+
+from pydantic_core import to_json
+
+from search_api.adapters.cache_adapter import CacheAdapter, CacheEntry
+
+_WINDOW_RATIO = 0.01
+_PROTECTED_RATIO = 0.8
+_SKETCH_DEPTH = 4
+_SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+_MASK64 = (1 << 64) - 1
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejections: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "fresh_until", "compute_seconds")
+
+    def __init__(
+        self, value: Any, expires_at: float, size: int, fresh_until: float, compute_seconds: float = 0.0
+    ) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.fresh_until = fresh_until
+        self.compute_seconds = compute_seconds
+
+
+class _CountMinSketch:
+    """4-row count-min sketch with saturating 8-bit counters, halved every sample_size increments (aging)."""
+
+    def __init__(self, capacity: int) -> None:
+        width = 1
+        while width < max(16, capacity):
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(_SKETCH_DEPTH)]
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def _indexes(self, key_hash: int) -> List[int]:
+        return [((key_hash * seed) & _MASK64) >> 32 & self._mask for seed in _SKETCH_SEEDS]
+
+    def increment(self, key_hash: int) -> None:
+        for row, i in zip(self._rows, self._indexes(key_hash)):
+            if row[i] < 255:
+                row[i] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            for row in self._rows:
+                row[:] = row.translate(_HALVE)
+            self._additions //= 2
+
+    def estimate(self, key_hash: int) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key_hash)))
+
+
+class _TimerWheel:
+    """Hashed timing wheel with tick granularity; slots hold keys, re-checked against the entry on expiry."""
+
+    def __init__(self, tick_seconds: float, num_slots: int) -> None:
+        self.tick_seconds = tick_seconds
+        self._slots: List[Set[str]] = [set() for _ in range(num_slots)]
+        self._current = int(time.time() / tick_seconds)
+
+    def schedule(self, key: str, expires_at: float) -> None:
+        tick = max(int(expires_at / self.tick_seconds), self._current + 1)
+        self._slots[tick % len(self._slots)].add(key)
+
+    def advance(self, now: float) -> List[str]:
+        target = int(now / self.tick_seconds)
+        due: List[str] = []
+        # Never walk more than one revolution; later-expiring keys are rescheduled by the caller
+        for tick in range(self._current + 1, min(target, self._current + len(self._slots)) + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if slot:
+                due.extend(slot)
+                slot.clear()
+        self._current = max(self._current, target)
+        return due
+
+
+class _Stripe:
+    """One independently locked W-TinyLFU partition: LRU window -> frequency-gated segmented-LRU main space."""
+
+    def __init__(self, max_entries: int, max_bytes: int, tick_seconds: float, wheel_slots: int) -> None:
+        self.lock = Lock()
+        self.max_entries = max(2, max_entries)
+        self.max_bytes = max_bytes
+        self.window_cap = max(1, int(self.max_entries * _WINDOW_RATIO))
+        self.protected_cap = int((self.max_entries - self.window_cap) * _PROTECTED_RATIO)
+        self.window: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.probation: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.protected: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.sketch = _CountMinSketch(self.max_entries)
+        self.wheel = _TimerWheel(tick_seconds, wheel_slots)
+        self.bytes = 0
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+    def lookup(self, key: str, key_hash: int, now: float) -> Optional[_Entry]:
+        self.sketch.increment(key_hash)
+        for segment in (self.window, self.probation, self.protected):
+            entry = segment.get(key)
+            if entry is None:
+                continue
+            if entry.expires_at <= now:
+                self._remove(segment, key)
+                self.stats.expirations += 1
+                break
+            if segment is self.probation:
+                del self.probation[key]
+                self.protected[key] = entry
+                self._demote_protected()
+            else:
+                segment.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+        self.stats.misses += 1
+        return None
+
+    def insert(self, key: str, key_hash: int, entry: _Entry, now: float) -> None:
+        self.sketch.increment(key_hash)
+        for segment in (self.window, self.probation, self.protected):
+            if key in segment:
+                self._remove(segment, key)
+                break
+        self.window[key] = entry
+        self.bytes += entry.size
+        self.wheel.schedule(key, entry.expires_at)
+        self._expire(now)
+        while len(self.window) > self.window_cap:
+            candidate_key, candidate = self.window.popitem(last=False)
+            self.probation[candidate_key] = candidate
+            self._admit(candidate_key)
+        while self.bytes > self.max_bytes and len(self):
+            self._evict_one()
+
+    def expire(self, now: float) -> None:
+        self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        for key in self.wheel.advance(now):
+            for segment in (self.window, self.probation, self.protected):
+                entry = segment.get(key)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    self._remove(segment, key)
+                    self.stats.expirations += 1
+                else:
+                    self.wheel.schedule(key, entry.expires_at)
+                break
+
+    def _admit(self, candidate_key: str) -> None:
+        # TinyLFU admission: the window's victim must beat the main space's LRU victim on frequency
+        if len(self.probation) + len(self.protected) <= self.max_entries - self.window_cap:
+            return
+        victim_key = next(iter(self.probation))
+        if victim_key == candidate_key:
+            victim_key = next(iter(self.protected), candidate_key)
+        candidate_freq = self.sketch.estimate(hash(candidate_key))
+        victim_freq = self.sketch.estimate(hash(victim_key))
+        if candidate_freq > victim_freq:
+            self._drop(victim_key)
+            self.stats.evictions += 1
+        else:
+            self._remove(self.probation, candidate_key)
+            self.stats.rejections += 1
+
+    def _evict_one(self) -> None:
+        for segment in (self.probation, self.window, self.protected):
+            if segment:
+                key = next(iter(segment))
+                self._remove(segment, key)
+                self.stats.evictions += 1
+                return
+
+    def _demote_protected(self) -> None:
+        while len(self.protected) > self.protected_cap:
+            key, entry = self.protected.popitem(last=False)
+            self.probation[key] = entry
+
+    def _drop(self, key: str) -> None:
+        for segment in (self.probation, self.protected, self.window):
+            if key in segment:
+                self._remove(segment, key)
+                return
+
+    def _remove(self, segment: "OrderedDict[str, _Entry]", key: str) -> None:
+        entry = segment.pop(key)
+        self.bytes -= entry.size
+
+
+def approx_size(value: Any) -> int:
+    """Length of bytes and strings; otherwise the value's own approx_bytes(), else its JSON encoding's length."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    weigh = getattr(value, "approx_bytes", None)
+    if weigh is not None:
+        return weigh()
+    return len(to_json(value, fallback=repr))
+
+
+class BoundedCacheAdapter(CacheAdapter):
+    """
+    Memory-bounded cache with W-TinyLFU admission/eviction, split into lock stripes.
+    Budgets (entries and approximate bytes) are divided evenly across stripes; every critical
+    section is synchronous, so readers never wait on an event-loop lock.
+    Expiry is proactive via a per-stripe timing wheel, advanced on writes and by run_expiry().
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        stripes: int = 16,
+        weigher: Optional[Callable[[Any], int]] = None,
+        tick_seconds: float = 1.0,
+        wheel_slots: int = 512,
+    ) -> None:
+        n = 1
+        while n < max(1, stripes):
+            n <<= 1
+        self._stripe_mask = n - 1
+        self._stripes = [_Stripe(max_entries // n, max_bytes // n, tick_seconds, wheel_slots) for _ in range(n)]
+        self._weigher = weigher or approx_size
+        self.tick_seconds = tick_seconds
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._lookup(key)
+        return entry.value if entry is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        await self.set_entry(key, value, ttl_seconds)
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        return CacheEntry(
+            value=entry.value,
+            fresh_until=entry.fresh_until,
+            expires_at=entry.expires_at,
+            compute_seconds=entry.compute_seconds,
+        )
+
+    async def set_entry(
+        self, key: str, value: Any, ttl_seconds: int, stale_ttl_seconds: int = 0, compute_seconds: float = 0.0
+    ) -> None:
+        key_hash = hash(key)
+        stripe = self._stripes[key_hash & self._stripe_mask]
+        now = time.time()
+        fresh_until = now + max(0, ttl_seconds)
+        expires_at = fresh_until + max(0, stale_ttl_seconds)
+        entry = _Entry(value, expires_at, self._weigher(value), fresh_until, compute_seconds)
+        with stripe.lock:
+            stripe.insert(key, key_hash, entry, now)
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        key_hash = hash(key)
+        stripe = self._stripes[key_hash & self._stripe_mask]
+        with stripe.lock:
+            return stripe.lookup(key, key_hash, time.time())
+
+    def expire(self) -> None:
+        now = time.time()
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.expire(now)
+
+    async def run_expiry(self, stop: Optional[asyncio.Event] = None) -> None:
+        while stop is None or not stop.is_set():
+            await asyncio.sleep(self.tick_seconds)
+            self.expire()
+
+    def stats(self) -> CacheStats:
+        total = CacheStats()
+        for stripe in self._stripes:
+            with stripe.lock:
+                for name in ("hits", "misses", "evictions", "expirations", "rejections"):
+                    setattr(total, name, getattr(total, name) + getattr(stripe.stats, name))
+                total.entries += len(stripe)
+                total.bytes += stripe.bytes
+        return total
@@ -1,10 +1,31 @@
 import asyncio
+import math
+import random
 import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any, Dict, Optional, Tuple
 
 
+@dataclass
+class CacheEntry:
+    """A cached value with a soft (fresh_until) and a hard (expires_at) expiry."""
+
+    value: Any
+    fresh_until: float
+    expires_at: float
+    compute_seconds: float = 0.0
+
+    def is_stale(self, now: float) -> bool:
+        return now >= self.fresh_until
+
+    def should_refresh_early(self, now: float, beta: float) -> bool:
+        # XFetch: refresh probability rises as fresh_until approaches, scaled by recompute cost
+        if beta <= 0 or self.compute_seconds <= 0:
+            return False
+        return now - self.compute_seconds * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+
 class CacheAdapter(ABC):
     @abstractmethod
     async def get(self, key: str) -> Optional[Any]:
@@ -14,11 +35,26 @@ class CacheAdapter(ABC):
     async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
         raise NotImplementedError
 
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
+        # Adapters without soft-TTL support report every live value as fresh
+        value = await self.get(key)
+        if value is None:
+            return None
+        return CacheEntry(value=value, fresh_until=math.inf, expires_at=math.inf)
+
+    async def set_entry(
+        self, key: str, value: Any, ttl_seconds: int, stale_ttl_seconds: int = 0, compute_seconds: float = 0.0
+    ) -> None:
+        """Store value fresh for ttl_seconds, then servable-while-revalidating for stale_ttl_seconds more."""
+        await self.set(key, value, ttl_seconds)
+
 
 @dataclass
 class _Entry:
     value: Any
     expires_at: float
+    fresh_until: float = math.inf
+    compute_seconds: float = 0.0
 
 
 class InMemoryCacheAdapter(CacheAdapter):
@@ -27,6 +63,13 @@ class InMemoryCacheAdapter(CacheAdapter):
         self._lock = asyncio.Lock()
 
     async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        return entry.value if entry else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        await self.set_entry(key, value, ttl_seconds)
+
+    async def get_entry(self, key: str) -> Optional[CacheEntry]:
         async with self._lock:
             entry = self._store.get(key)
             if not entry:
@@ -34,10 +77,21 @@ class InMemoryCacheAdapter(CacheAdapter):
             if entry.expires_at < time.time():
                 self._store.pop(key, None)
                 return None
-            return entry.value
+            return CacheEntry(
+                value=entry.value,
+                fresh_until=min(entry.fresh_until, entry.expires_at),
+                expires_at=entry.expires_at,
+                compute_seconds=entry.compute_seconds,
+            )
 
-    async def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+    async def set_entry(
+        self, key: str, value: Any, ttl_seconds: int, stale_ttl_seconds: int = 0, compute_seconds: float = 0.0
+    ) -> None:
+        now = time.time()
         async with self._lock:
-            self._store[key] = _Entry(value=value, expires_at=time.time() + max(0, ttl_seconds))
-
-
+            self._store[key] = _Entry(
+                value=value,
+                expires_at=now + max(0, ttl_seconds) + max(0, stale_ttl_seconds),
+                fresh_until=now + max(0, ttl_seconds),
+                compute_seconds=compute_seconds,
+            )
@@ -0,0 +1,206 @@
+import asyncio
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from search_api.config.settings import get_settings
+from search_api.services.egress_guard import GuardedTransport
+from search_api.services.single_flight import SingleFlight
+
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status_code: int
+    # Where the body came from after redirects; url otherwise
+    final_url: Optional[str] = None
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    # 304 answer to a conditional GET: the stored copy is still current and body is empty
+    not_modified: bool = False
+    # The body hit max_body_bytes and was cut off
+    truncated: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    elapsed_seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.not_modified or 200 <= self.status_code < 300
+
+
+class _HostState:
+    __slots__ = ("semaphore", "next_at")
+
+    def __init__(self, connections: int) -> None:
+        self.semaphore = asyncio.Semaphore(connections)
+        # Earliest monotonic time the next request to this host may start
+        self.next_at = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return not self.semaphore.locked() and self.next_at <= time.monotonic()
+
+
+class DnsCache:
+    """TTL cache of host -> address; concurrent lookups for one host share a single getaddrinfo call."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+        self._lookups: SingleFlight[str] = SingleFlight()
+
+    async def resolve(self, host: str, port: int) -> str:
+        key = (host, port)
+        cached = self._entries.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            return cached[0]
+        return await self._lookups.do(f"{host}:{port}", lambda: self._lookup(host, port))
+
+    async def _lookup(self, host: str, port: int) -> str:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = infos[0][4][0]
+        self._entries[(host, port)] = (address, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end((host, port))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return address
+
+
+class HttpFetcher:
+    """
+    Pooled async fetcher for the recrawl worker.
+    One httpx client (keep-alive pool shared by every job) is fronted by per-host state: at most
+    per_host_connections requests in flight per host and crawl_delay_seconds between request starts.
+    Hosts are resolved through a DnsCache below the pool, so connections stay keyed by hostname, and addresses
+    that are not public are refused unless allow_private_destinations is set.
+    Up to max_redirects redirects are followed, each hop waiting its turn with its own host.
+    Validators from the last 200 of a URL are replayed as If-None-Match/If-Modified-Since, and bodies are streamed
+    and cut off at max_body_bytes.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        per_host_connections: Optional[int] = None,
+        crawl_delay_seconds: Optional[float] = None,
+        max_body_bytes: Optional[int] = None,
+        dns_cache: Optional[DnsCache] = None,
+        max_hosts: int = 10000,
+        max_validators: int = 100000,
+        max_redirects: Optional[int] = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.dns = dns_cache or DnsCache(self.settings.fetch_dns_ttl_seconds)
+        limits = httpx.Limits(
+            max_connections=self.settings.fetch_max_connections,
+            max_keepalive_connections=self.settings.fetch_max_connections,
+        )
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(self.settings.fetch_timeout_seconds),
+            transport=GuardedTransport(limits, resolve=self.dns.resolve),
+            headers={"User-Agent": self.settings.fetch_user_agent},
+        )
+        self.per_host_connections = per_host_connections or self.settings.fetch_per_host_connections
+        self.crawl_delay_seconds = (
+            crawl_delay_seconds if crawl_delay_seconds is not None else self.settings.fetch_crawl_delay_seconds
+        )
+        self.max_body_bytes = max_body_bytes or self.settings.fetch_max_body_bytes
+        self.max_redirects = max_redirects if max_redirects is not None else self.settings.fetch_max_redirects
+        self.max_hosts = max_hosts
+        self.max_validators = max_validators
+        self._hosts: Dict[str, _HostState] = {}
+        self._validators: "OrderedDict[str, Tuple[Optional[str], Optional[str]]]" = OrderedDict()
+
+    async def fetch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        started = time.monotonic()
+        target = url
+        result = await self._fetch_once(target, etag, last_modified)
+        for _ in range(self.max_redirects):
+            location = result.headers.get("location")
+            if result.status_code not in _REDIRECT_STATUSES or not location:
+                break
+            target = urljoin(target, location)
+            if urlsplit(target).scheme not in ("http", "https"):
+                break
+            result = await self._fetch_once(target)
+        # A redirect left over once max_redirects is used up is returned as is, and is not ok
+        result.url = url
+        result.final_url = target
+        result.elapsed_seconds = time.monotonic() - started
+        return result
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def _wait_turn(self, state: _HostState) -> None:
+        # Reserve the next start slot for this host (no await in between, so no lock), then sleep until it arrives
+        now = time.monotonic()
+        start_at = max(now, state.next_at)
+        state.next_at = start_at + self.crawl_delay_seconds
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    async def _fetch_once(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        if etag is None and last_modified is None and url in self._validators:
+            etag, last_modified = self._validators[url]
+        headers: Dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        state = self._host_state(urlsplit(url).hostname or "")
+        async with state.semaphore:
+            await self._wait_turn(state)
+            async with self.client.stream("GET", url, headers=headers) as response:
+                result = FetchResult(
+                    url=url,
+                    status_code=response.status_code,
+                    headers=dict(response.headers),
+                    not_modified=response.status_code == 304,
+                    etag=response.headers.get("etag"),
+                    last_modified=response.headers.get("last-modified"),
+                )
+                if not result.not_modified and result.status_code not in _REDIRECT_STATUSES:
+                    result.body, result.truncated = await self._read_capped(response)
+        if result.status_code == 200 and (result.etag or result.last_modified):
+            self._remember(url, result.etag, result.last_modified)
+        return result
+
+    async def _read_capped(self, response: httpx.Response) -> Tuple[bytes, bool]:
+        chunks = []
+        size = 0
+        # aiter_bytes yields decoded content, so the cap also bounds decompression
+        async for chunk in response.aiter_bytes():
+            if size + len(chunk) > self.max_body_bytes:
+                chunks.append(chunk[: self.max_body_bytes - size])
+                # Leaving the stream context early closes the connection instead of draining the rest
+                return b"".join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks), False
+
+    def _host_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._hosts = {name: s for name, s in self._hosts.items() if not s.idle}
+            state = self._hosts[host] = _HostState(self.per_host_connections)
+        return state
+
+    def _remember(self, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        self._validators[url] = (etag, last_modified)
+        self._validators.move_to_end(url)
+        while len(self._validators) > self.max_validators:
+            self._validators.popitem(last=False)
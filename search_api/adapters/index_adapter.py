@@ -4,14 +4,51 @@ import random
 import string
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from pydantic import HttpUrl
+from pydantic import HttpUrl, TypeAdapter
 
+from search_api.models.projection import FieldProjection
 from search_api.models.schemas import Facet, FacetCount, SearchResponse, SearchResult
 
+_HTTP_URL: TypeAdapter[HttpUrl] = TypeAdapter(HttpUrl)
+
+# Sort position of a hit: (sort values, doc_id). Hits are ordered by sort values descending, then doc_id ascending.
+Position = Tuple[Tuple[float, ...], str]
+
+
+def position_order(position: Position) -> Tuple[Tuple[float, ...], str]:
+    """Ascending key for the hit order."""
+    return tuple(-value for value in position[0]), position[1]
+
+
+def result_url(url: str) -> HttpUrl:
+    """A stored URL validated as the HttpUrl a SearchResult built with model_construct() must carry."""
+    return _HTTP_URL.validate_python(url)
+
+
+def hit_positions(response: SearchResponse) -> List[Position]:
+    """Positions recorded by the adapter, or (score, doc_id) for adapters that do not record them."""
+    if response._positions is not None:
+        return [position for _, position in response._positions]
+    return [((hit.score or 0.0,), hit.doc_id) for hit in response.results]
+
 
 class IndexAdapter(ABC):
+    """
+    Search backend. Index data is trusted, so implementations build responses with model_construct()
+    and skip pydantic validation for every hit; only the URL is still parsed, through result_url().
+    Implementations record each hit's (shard, Position) in response._positions. Those that set
+    supports_search_after also honour search_after: one position per shard (shard_count of them) of the last
+    hit already served; the next `size` hits after them are returned and `page` is ignored.
+    """
+
+    supports_search_after = False
+
+    @property
+    def shard_count(self) -> int:
+        return 1
+
     @abstractmethod
     async def search(
         self,
@@ -23,11 +60,14 @@ class IndexAdapter(ABC):
         site: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
     ) -> SearchResponse:
         raise NotImplementedError
 
 
 class MockIndexAdapter(IndexAdapter):
+    supports_search_after = True
+
     async def search(
         self,
         query: str,
@@ -38,38 +78,49 @@ class MockIndexAdapter(IndexAdapter):
         site: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
     ) -> SearchResponse:
         # Simulate async latency typical of shard fanout + aggregation
         await asyncio.sleep(0.005)
         total = 12345
-        start_index = (page - 1) * size
+        after = search_after[0] if search_after else None
+        # Scores fall with i, so the hit after doc-{i} is doc-{i + 1}: a cursor costs the same as page 1
+        start_index = int(after[1].rsplit("-", 1)[1]) + 1 if after is not None else (page - 1) * size
         end_index = min(start_index + size, total)
         now = datetime.now(timezone.utc)
+        projection = FieldProjection.parse(fields)
 
         def fake_url(i: int) -> str:
-            base = site if site else "https://example.com"
+            base = f"https://{site}" if site else "https://example.com"
             return f"{base}/doc/{i}-{self._rand_suffix(6)}"
 
         results: List[SearchResult] = []
         for i in range(start_index, end_index):
             results.append(
-                SearchResult(
+                SearchResult.model_construct(
                     doc_id=f"doc-{i}",
-                    url=fake_url(i),  # type: ignore[arg-type]
-                    title=f"Result {i} for '{query}'",
-                    snippet=f"... snippet for {query} (doc {i}) ...",
+                    url=result_url(fake_url(i)),
+                    title=f"Result {i} for '{query}'" if "title" in projection else None,
+                    snippet=f"... snippet for {query} (doc {i}) ..." if "snippet" in projection else None,
                     score=round(100.0 - math.log2(i + 2), 4),
                     language=language or "en",
                     last_crawled_at=now - timedelta(days=(i % 365)),
-                    metadata={"site": site or "example.com", "rank_features": {"bm25": 12.3}},
+                    metadata=(
+                        projection.metadata({"site": site or "example.com", "rank_features": {"bm25": 12.3}})
+                        if "metadata" in projection
+                        else None
+                    ),
                 )
             )
 
         facets = [
-            Facet(name="language", counts=[FacetCount(value="en", count=100), FacetCount(value="fr", count=50)])
+            Facet.model_construct(
+                name="language",
+                counts=[FacetCount.model_construct(value=v, count=c) for v, c in (("en", 100), ("fr", 50))],
+            )
         ]
 
-        return SearchResponse(
+        response = SearchResponse.model_construct(
             query=query,
             page=page,
             size=size,
@@ -77,6 +128,8 @@ class MockIndexAdapter(IndexAdapter):
             results=results,
             facets=facets,
         )
+        response._positions = [(0, ((hit.score,), hit.doc_id)) for hit in results]  # type: ignore[misc]
+        return response
 
     def _rand_suffix(self, n: int) -> str:
         return "".join(random.choices(string.ascii_lowercase + string.digits, k=n))
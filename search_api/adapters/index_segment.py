@@ -0,0 +1,310 @@
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from search_api.adapters.inverted_index_adapter import IndexedDocument, IndexSegment
+
+# File layout (little-endian, every section 8-byte aligned):
+#   header:   magic, doc_count u32, term_count u32, total_length u64, then (offset u64, length u64) per section
+#   terms:    term_offsets u32[term_count + 1] into term_blob (utf-8, sorted) -> binary-searchable dictionary
+#   postings: postings_offsets u64[term_count + 1] into postings_blob; each list is varint(doc delta), varint(tf) pairs
+#   doc values: doc_lengths u32, crawled_at f64 (NaN = unknown), language/site u32 ordinals into a value table
+#   stored:   one (offsets u64[doc_count + 1], utf-8 blob) pair per stored field
+#   doc_id_order: u32[doc_count] ordinals sorted by utf-8 doc_id -> binary-searchable doc_id lookup
+MAGIC = b"FSEG0002"
+STORED_FIELDS = ("doc_id", "url", "title", "body", "site", "metadata")
+_SECTIONS = (
+    "term_offsets",
+    "term_blob",
+    "postings_offsets",
+    "postings_blob",
+    "doc_lengths",
+    "crawled_at",
+    "language_ords",
+    "site_ords",
+    "value_table",
+) + tuple(f"stored_{name}_{part}" for name in STORED_FIELDS for part in ("offsets", "blob")) + ("doc_id_order",)
+_HEADER = struct.Struct(f"<8sIIQ{2 * len(_SECTIONS)}Q")
+
+
+def write_segment(segment: IndexSegment, path: str) -> None:
+    """Serialise any IndexSegment to an immutable segment file (written to a temp file, then renamed)."""
+    terms = sorted(segment.terms())
+    encoded_terms = [t.encode("utf-8") for t in terms]
+    term_offsets = array("I", [0])
+    for raw in encoded_terms:
+        term_offsets.append(term_offsets[-1] + len(raw))
+
+    postings_blob = bytearray()
+    postings_offsets = array("Q", [0])
+    for term in terms:
+        plist = segment.postings(term)
+        assert plist is not None
+        prev = 0
+        for ordinal, tf in zip(*plist):
+            _write_varint(postings_blob, ordinal - prev)
+            _write_varint(postings_blob, tf)
+            prev = ordinal
+        postings_offsets.append(len(postings_blob))
+
+    n_docs = segment.doc_count
+    values: Dict[str, int] = {"": 0}
+    doc_lengths = array("I")
+    crawled_at = array("d")
+    language_ords = array("I")
+    site_ords = array("I")
+    stored: Dict[str, Tuple[array, bytearray]] = {name: (array("Q", [0]), bytearray()) for name in STORED_FIELDS}
+    doc_ids: List[bytes] = []
+    for ordinal in range(n_docs):
+        doc = segment.document(ordinal)
+        doc_ids.append(doc.doc_id.encode("utf-8"))
+        doc_lengths.append(segment.doc_length(ordinal))
+        crawled_at.append(doc.last_crawled_at.timestamp() if doc.last_crawled_at else math.nan)
+        language_ords.append(values.setdefault(doc.language or "", len(values)))
+        site_ords.append(values.setdefault(doc.host(), len(values)))
+        for name in STORED_FIELDS:
+            raw_value = json.dumps(doc.metadata, separators=(",", ":")) if name == "metadata" else getattr(doc, name)
+            offsets, blob = stored[name]
+            blob += (raw_value or "").encode("utf-8")
+            offsets.append(len(blob))
+
+    sections: List[bytes] = [
+        term_offsets.tobytes(),
+        b"".join(encoded_terms),
+        postings_offsets.tobytes(),
+        bytes(postings_blob),
+        doc_lengths.tobytes(),
+        crawled_at.tobytes(),
+        language_ords.tobytes(),
+        site_ords.tobytes(),
+        json.dumps(list(values)).encode("utf-8"),
+    ]
+    for name in STORED_FIELDS:
+        offsets, blob = stored[name]
+        sections.extend([offsets.tobytes(), bytes(blob)])
+    sections.append(array("I", sorted(range(n_docs), key=doc_ids.__getitem__)).tobytes())
+
+    table: List[int] = []
+    offset = _align(_HEADER.size)
+    for data in sections:
+        table.extend([offset, len(data)])
+        offset = _align(offset + len(data))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, n_docs, len(terms), segment.total_length, *table))
+        for (start, _), data in zip(zip(table[::2], table[1::2]), sections):
+            fh.write(b"\0" * (start - fh.tell()))
+            fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+class MmapSegment(IndexSegment):
+    """
+    Read-only segment opened with mmap; fixed-width columns are memoryview casts over the mapping,
+    so opening costs O(1) and pages are shared through the OS page cache across processes.
+    close() unmaps once the last reader that acquire()d the segment releases it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._closed = False
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, self._doc_count, self._term_count, self._total_length, *table = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._view.release()
+            self._mm.close()
+            raise ValueError(f"not an index segment: {path}")
+        self._views: List[memoryview] = []
+        sec = {name: (table[2 * i], table[2 * i + 1]) for i, name in enumerate(_SECTIONS)}
+        self._term_offsets = self._column(sec["term_offsets"], "I")
+        self._term_blob = self._column(sec["term_blob"])
+        self._postings_offsets = self._column(sec["postings_offsets"], "Q")
+        self._postings_blob = self._column(sec["postings_blob"])
+        self._doc_lengths = self._column(sec["doc_lengths"], "I")
+        self._crawled_at = self._column(sec["crawled_at"], "d")
+        self._language_ords = self._column(sec["language_ords"], "I")
+        self._site_ords = self._column(sec["site_ords"], "I")
+        self._values: List[str] = json.loads(bytes(self._column(sec["value_table"])))
+        self._stored = {
+            name: (self._column(sec[f"stored_{name}_offsets"], "Q"), self._column(sec[f"stored_{name}_blob"]))
+            for name in STORED_FIELDS
+        }
+        self._doc_id_order = self._column(sec["doc_id_order"], "I")
+
+    @classmethod
+    def open(cls, path: str) -> "MmapSegment":
+        return cls(path)
+
+    @property
+    def doc_count(self) -> int:
+        return self._doc_count
+
+    @property
+    def total_length(self) -> int:
+        return self._total_length
+
+    def terms(self) -> Iterable[str]:
+        for i in range(self._term_count):
+            yield self._term_at(i)
+
+    def postings(self, term: str) -> Optional[Tuple[Sequence[int], Sequence[int]]]:
+        i = self._find_term(term.encode("utf-8"))
+        if i < 0:
+            return None
+        blob = self._postings_blob
+        pos, end = self._postings_offsets[i], self._postings_offsets[i + 1]
+        ordinals, tfs = array("I"), array("I")
+        ordinal = 0
+        while pos < end:
+            delta, pos = _read_varint(blob, pos)
+            tf, pos = _read_varint(blob, pos)
+            ordinal += delta
+            ordinals.append(ordinal)
+            tfs.append(tf)
+        return ordinals, tfs
+
+    def doc_length(self, ordinal: int) -> int:
+        return self._doc_lengths[ordinal]
+
+    def language(self, ordinal: int) -> Optional[str]:
+        return self._values[self._language_ords[ordinal]] or None
+
+    def host(self, ordinal: int) -> str:
+        return self._values[self._site_ords[ordinal]]
+
+    def crawled_ts(self, ordinal: int) -> float:
+        ts = self._crawled_at[ordinal]
+        return 0.0 if math.isnan(ts) else ts
+
+    def stored_field(self, ordinal: int, name: str) -> str:
+        offsets, blob = self._stored[name]
+        return str(blob[offsets[ordinal] : offsets[ordinal + 1]], "utf-8")
+
+    def ordinals_of(self, doc_id: str) -> List[int]:
+        """Ordinals stored under doc_id (a binary search over doc_id_order; deleted ordinals included)."""
+        raw = doc_id.encode("utf-8")
+        order = self._doc_id_order
+        offsets, blob = self._stored["doc_id"]
+        lo, hi = 0, self._doc_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            ordinal = order[mid]
+            if blob[offsets[ordinal] : offsets[ordinal + 1]].tobytes() < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < self._doc_count:
+            ordinal = order[lo]
+            if blob[offsets[ordinal] : offsets[ordinal + 1]].tobytes() != raw:
+                break
+            found.append(ordinal)
+            lo += 1
+        return found
+
+    def document(self, ordinal: int, stored: Optional[FrozenSet[str]] = None) -> IndexedDocument:
+        ts = self._crawled_at[ordinal]
+        fields = {
+            name: self.stored_field(ordinal, name) for name in STORED_FIELDS if stored is None or name in stored
+        }
+        return IndexedDocument(
+            doc_id=fields.get("doc_id", ""),
+            url=fields.get("url", ""),
+            title=fields.get("title", ""),
+            body=fields.get("body", ""),
+            language=self.language(ordinal),
+            site=fields.get("site") or None,
+            last_crawled_at=None if math.isnan(ts) else datetime.fromtimestamp(ts, tz=timezone.utc),
+            metadata=json.loads(fields.get("metadata") or "{}"),
+        )
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self._readers += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._readers -= 1
+            unmap = self._closed and not self._readers
+        if unmap:
+            self._unmap()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            unmap = not self._readers
+        if unmap:
+            self._unmap()
+
+    def _unmap(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._view.release()
+        self._mm.close()
+
+    def _column(self, section: Tuple[int, int], fmt: Optional[str] = None) -> memoryview:
+        offset, length = section
+        view = self._view[offset : offset + length]
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def _term_at(self, i: int) -> str:
+        return str(self._term_blob[self._term_offsets[i] : self._term_offsets[i + 1]], "utf-8")
+
+    def _find_term(self, raw: bytes) -> int:
+        lo, hi = 0, self._term_count
+        offsets, blob = self._term_offsets, self._term_blob
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = blob[offsets[mid] : offsets[mid + 1]].tobytes()
+            if candidate < raw:
+                lo = mid + 1
+            elif candidate > raw:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf: memoryview, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
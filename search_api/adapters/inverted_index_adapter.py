@@ -0,0 +1,543 @@
+import asyncio
+import heapq
+import math
+import re
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from search_api.adapters.index_adapter import IndexAdapter, Position, position_order, result_url
+from search_api.config.settings import get_settings
+from search_api.models.projection import FieldProjection
+from search_api.models.schemas import Facet, FacetCount, SearchResponse, SearchResult
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SNIPPET_CHARS = 160
+# Stored fields each SearchResult field is built from; language, site and crawl time come from doc values
+_STORED_FOR_FIELD = {"doc_id": "doc_id", "url": "url", "title": "title", "snippet": "body", "metadata": "metadata"}
+_DOC_ID = frozenset({"doc_id"})
+# (sort values, doc_id, ordinal, score) of a selected hit
+_Hit = Tuple[Tuple[float, ...], str, int, float]
+# Postings scored between checks of a search's cancel flag
+_CANCEL_CHECK_POSTINGS = 4096
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class SearchCancelled(Exception):
+    """Raised inside search_sync() once its caller has given up on the result."""
+
+
+def search_executor() -> ThreadPoolExecutor:
+    """Process-wide pool of index_search_threads threads that every InvertedIndexAdapter scores in by default."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(get_settings().index_search_threads, thread_name_prefix="index-search")
+        return _executor
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class IndexedDocument:
+    doc_id: str
+    url: str
+    title: str = ""
+    body: str = ""
+    language: Optional[str] = None
+    site: Optional[str] = None
+    last_crawled_at: Optional[datetime] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def host(self) -> str:
+        return (self.site or urlsplit(self.url).hostname or "").lower()
+
+
+class IndexSegment(ABC):
+    """
+    Read interface shared by the in-memory index and on-disk segments.
+    Ordinals are dense per segment; postings are (ascending ordinals, term frequencies).
+    """
+
+    @property
+    @abstractmethod
+    def doc_count(self) -> int:
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def total_length(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def terms(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def postings(self, term: str) -> Optional[Tuple[Sequence[int], Sequence[int]]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def doc_length(self, ordinal: int) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def document(self, ordinal: int, stored: Optional[FrozenSet[str]] = None) -> IndexedDocument:
+        """Document at ordinal; given `stored`, a segment may load only those stored fields and leave the rest empty."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def ordinals_of(self, doc_id: str) -> List[int]:
+        """Ascending ordinals stored under doc_id that this view has not deleted."""
+        raise NotImplementedError
+
+    # Doc-values accessors used for filtering/sorting; segments override to avoid loading stored fields
+    def language(self, ordinal: int) -> Optional[str]:
+        return self.document(ordinal).language
+
+    def host(self, ordinal: int) -> str:
+        return self.document(ordinal).host()
+
+    def crawled_ts(self, ordinal: int) -> float:
+        crawled = self.document(ordinal).last_crawled_at
+        return crawled.timestamp() if crawled else 0.0
+
+    # Readers pin a segment for the duration of a search, so close() cannot pull its storage out from under them
+    def acquire(self) -> bool:
+        """Pin the segment for a reader; False once it is closed (the reader should take a newer snapshot)."""
+        return True
+
+    def release(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class InvertedIndex(IndexSegment):
+    """
+    In-memory inverted index over title + body.
+    Postings are a pair of parallel array('I') per term (doc ordinals, term frequencies);
+    ordinals are assigned in insertion order so each postings list stays sorted.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_lengths = array("I")
+        self._docs: List[IndexedDocument] = []
+        self._ordinals: Dict[str, List[int]] = {}
+        self._total_length = 0
+
+    @property
+    def doc_count(self) -> int:
+        return len(self._docs)
+
+    @property
+    def total_length(self) -> int:
+        return self._total_length
+
+    def add(self, doc: IndexedDocument) -> int:
+        ordinal = len(self._docs)
+        terms = tokenize(doc.title) + tokenize(doc.body)
+        for term, tf in Counter(terms).items():
+            plist = self._postings.get(term)
+            if plist is None:
+                plist = (array("I"), array("I"))
+                self._postings[term] = plist
+            plist[0].append(ordinal)
+            plist[1].append(tf)
+        self._docs.append(doc)
+        self._ordinals.setdefault(doc.doc_id, []).append(ordinal)
+        self._doc_lengths.append(len(terms))
+        self._total_length += len(terms)
+        return ordinal
+
+    def terms(self) -> Iterable[str]:
+        return self._postings.keys()
+
+    def postings(self, term: str) -> Optional[Tuple[array, array]]:
+        return self._postings.get(term)
+
+    def doc_length(self, ordinal: int) -> int:
+        return self._doc_lengths[ordinal]
+
+    def document(self, ordinal: int, stored: Optional[FrozenSet[str]] = None) -> IndexedDocument:
+        return self._docs[ordinal]
+
+    def ordinals_of(self, doc_id: str) -> List[int]:
+        return list(self._ordinals.get(doc_id, ()))
+
+
+class MultiSegment(IndexSegment):
+    """
+    Immutable point-in-time view over several segments with per-segment deleted ordinals.
+    Global ordinals are the segment's base offset plus its local ordinal; deleted docs never appear in postings.
+    """
+
+    def __init__(self, segments: Sequence[IndexSegment], deleted: Optional[Sequence[FrozenSet[int]]] = None) -> None:
+        self.segments = list(segments)
+        self.deleted = list(deleted) if deleted is not None else [frozenset() for _ in self.segments]
+        self._bases: List[int] = []
+        base = 0
+        for segment in self.segments:
+            self._bases.append(base)
+            base += segment.doc_count
+        self._doc_count = base
+        self._total_length = sum(s.total_length for s in self.segments)
+
+    @property
+    def doc_count(self) -> int:
+        return self._doc_count
+
+    @property
+    def total_length(self) -> int:
+        return self._total_length
+
+    def terms(self) -> Iterable[str]:
+        seen: set = set()
+        for segment in self.segments:
+            for term in segment.terms():
+                if term not in seen:
+                    seen.add(term)
+                    yield term
+
+    def postings(self, term: str) -> Optional[Tuple[Sequence[int], Sequence[int]]]:
+        ordinals, tfs = array("I"), array("I")
+        for segment, base, deleted in zip(self.segments, self._bases, self.deleted):
+            plist = segment.postings(term)
+            if not plist:
+                continue
+            for ordinal, tf in zip(*plist):
+                if ordinal not in deleted:
+                    ordinals.append(base + ordinal)
+                    tfs.append(tf)
+        return (ordinals, tfs) if ordinals else None
+
+    def doc_length(self, ordinal: int) -> int:
+        segment, local = self._locate(ordinal)
+        return segment.doc_length(local)
+
+    def document(self, ordinal: int, stored: Optional[FrozenSet[str]] = None) -> IndexedDocument:
+        segment, local = self._locate(ordinal)
+        return segment.document(local, stored)
+
+    def ordinals_of(self, doc_id: str) -> List[int]:
+        return [
+            base + ordinal
+            for segment, base, deleted in zip(self.segments, self._bases, self.deleted)
+            for ordinal in segment.ordinals_of(doc_id)
+            if ordinal not in deleted
+        ]
+
+    def language(self, ordinal: int) -> Optional[str]:
+        segment, local = self._locate(ordinal)
+        return segment.language(local)
+
+    def host(self, ordinal: int) -> str:
+        segment, local = self._locate(ordinal)
+        return segment.host(local)
+
+    def crawled_ts(self, ordinal: int) -> float:
+        segment, local = self._locate(ordinal)
+        return segment.crawled_ts(local)
+
+    def acquire(self) -> bool:
+        for i, segment in enumerate(self.segments):
+            if not segment.acquire():
+                for pinned in self.segments[:i]:
+                    pinned.release()
+                return False
+        return True
+
+    def release(self) -> None:
+        for segment in self.segments:
+            segment.release()
+
+    def _locate(self, ordinal: int) -> Tuple[IndexSegment, int]:
+        i = bisect_right(self._bases, ordinal) - 1
+        return self.segments[i], ordinal - self._bases[i]
+
+
+class InvertedIndexAdapter(IndexAdapter):
+    """
+    IndexAdapter serving BM25-ranked results from an in-process IndexSegment
+    (a mutable InvertedIndex or an mmap'd on-disk segment).
+    Scoring is term-at-a-time over the query's postings; top-k selection uses a bounded heap.
+    With search_after only hits past the position are candidates, so any page costs the same as the first.
+    search_sync() reads one snapshot of `index` throughout, pinned so the indexer can close segments it replaces,
+    so it may run in a worker thread while the indexer publishes new snapshots; search() runs it on a bounded
+    executor, keeping the event loop free while a query scores, and cancelling search() stops the scoring.
+    """
+
+    supports_search_after = True
+
+    def __init__(
+        self,
+        index: Optional[IndexSegment] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.index: IndexSegment = index or InvertedIndex()
+        self.k1 = k1
+        self.b = b
+        self.executor = executor or search_executor()
+
+    def add_document(self, doc: IndexedDocument) -> int:
+        if not isinstance(self.index, InvertedIndex):
+            raise TypeError("on-disk segments are immutable")
+        return self.index.add(doc)
+
+    async def search(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str = "relevance",
+        language: Optional[str] = None,
+        site: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
+    ) -> SearchResponse:
+        cancel = threading.Event()
+        call = partial(self.search_sync, query, page, size, sort, language, site, filters, fields, search_after, cancel)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+        finally:
+            # A caller that gave up (a shard past its deadline) stops the thread at its next check
+            cancel.set()
+
+    def search_sync(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str = "relevance",
+        language: Optional[str] = None,
+        site: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> SearchResponse:
+        index = self._pin()
+        try:
+            return self._search(
+                index, query, page, size, sort, language, site, filters, fields, search_after, cancel
+            )
+        finally:
+            index.release()
+
+    def documents(self, doc_ids: Iterable[str]) -> Dict[str, IndexedDocument]:
+        """Newest live copy of each doc_id present, read from one pinned snapshot."""
+        index = self._pin()
+        try:
+            found: Dict[str, IndexedDocument] = {}
+            for doc_id in doc_ids:
+                ordinals = index.ordinals_of(doc_id)
+                if ordinals:
+                    found[doc_id] = index.document(ordinals[-1])
+            return found
+        finally:
+            index.release()
+
+    def _pin(self) -> IndexSegment:
+        while True:
+            index = self.index
+            if index.acquire():
+                return index
+            # Segments are closed only after a snapshot without them is published, so a retry sees that one
+            if index is self.index:
+                raise RuntimeError("index is closed")
+
+    def _search(
+        self,
+        index: IndexSegment,
+        query: str,
+        page: int,
+        size: int,
+        sort: str,
+        language: Optional[str],
+        site: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        fields: Optional[List[str]],
+        search_after: Optional[Sequence[Optional[Position]]],
+        cancel: Optional[threading.Event],
+    ) -> SearchResponse:
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        scores = self._score(index, query_terms, cancel)
+        # Rounded once here, so ranking, returned scores and search_after positions all agree
+        matched = [
+            (ordinal, round(score, 4))
+            for ordinal, score in scores.items()
+            if self._accept(index, ordinal, language, site, filters)
+        ]
+
+        sort_values = self._sort_values(index, sort)
+        after = search_after[0] if search_after else None
+        if after is not None:
+            candidates = [m for m in matched if self._is_after(index, m[0], sort_values(m), after)]
+            top = self._top(index, candidates, size, sort_values)
+        else:
+            top = self._top(index, matched, page * size, sort_values)[(page - 1) * size :]
+
+        projection = FieldProjection.parse(fields)
+        stored = frozenset(_STORED_FOR_FIELD[name] for name in projection.fields if name in _STORED_FOR_FIELD)
+        results = [
+            self._to_result(index, ordinal, score, query_terms, projection, stored) for _, _, ordinal, score in top
+        ]
+        lang_counts = Counter(index.language(ordinal) or "unknown" for ordinal, _ in matched)
+        facets = [
+            Facet.model_construct(
+                name="language",
+                counts=[
+                    FacetCount.model_construct(value=value, count=count) for value, count in lang_counts.most_common()
+                ],
+            )
+        ]
+        response = SearchResponse.model_construct(
+            query=query,
+            page=page,
+            size=size,
+            total=len(matched),
+            results=results,
+            facets=facets,
+        )
+        response._positions = [(0, (values, doc_id)) for values, doc_id, _, _ in top]  # type: ignore[misc]
+        return response
+
+    def _top(
+        self,
+        index: IndexSegment,
+        candidates: List[Tuple[int, float]],
+        limit: int,
+        sort_values: Callable[[Tuple[int, float]], Tuple[float, ...]],
+    ) -> List[_Hit]:
+        """First `limit` candidates in hit order; doc_ids are read only for the selected hits and ties at the cut."""
+        if limit <= 0:
+            return []
+        top = heapq.nlargest(limit, candidates, key=sort_values)
+        if len(top) == limit:
+            boundary = sort_values(top[-1])
+            above = [m for m in top if sort_values(m) > boundary]
+            tied = [m for m in candidates if sort_values(m) == boundary]
+            if len(above) + len(tied) > limit:
+                # The cut splits a tie; the lowest doc_ids come first, as search_after expects
+                tied.sort(key=lambda m: _doc_id(index, m[0]))
+            top = above + tied[: limit - len(above)]
+        hits = [(sort_values(m), _doc_id(index, m[0]), m[0], m[1]) for m in top]
+        hits.sort(key=lambda hit: position_order((hit[0], hit[1])))
+        return hits
+
+    def _sort_values(self, index: IndexSegment, sort: str) -> Callable[[Tuple[int, float]], Tuple[float, ...]]:
+        if sort == "freshness":
+            return lambda m: (index.crawled_ts(m[0]), m[1])
+        return lambda m: (m[1],)
+
+    def _is_after(self, index: IndexSegment, ordinal: int, values: Tuple[float, ...], after: Position) -> bool:
+        if values != after[0]:
+            return values < after[0]
+        return _doc_id(index, ordinal) > after[1]
+
+    def _score(
+        self, index: IndexSegment, query_terms: List[str], cancel: Optional[threading.Event] = None
+    ) -> Dict[int, float]:
+        n_docs = index.doc_count
+        if not n_docs:
+            return {}
+        avgdl = index.total_length / n_docs or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = {}
+        for term in query_terms:
+            plist = index.postings(term)
+            if not plist:
+                continue
+            doc_ids, tfs = plist
+            df = len(doc_ids)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for start in range(0, df, _CANCEL_CHECK_POSTINGS):
+                if cancel is not None and cancel.is_set():
+                    raise SearchCancelled()
+                end = start + _CANCEL_CHECK_POSTINGS
+                for ordinal, tf in zip(doc_ids[start:end], tfs[start:end]):
+                    norm = k1 * (1.0 - b + b * index.doc_length(ordinal) / avgdl)
+                    scores[ordinal] = scores.get(ordinal, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        if cancel is not None and cancel.is_set():
+            raise SearchCancelled()
+        return scores
+
+    def _accept(
+        self,
+        index: IndexSegment,
+        ordinal: int,
+        language: Optional[str],
+        site: Optional[str],
+        filters: Optional[Dict[str, Any]],
+    ) -> bool:
+        if language and index.language(ordinal) != language:
+            return False
+        if site and index.host(ordinal) != site.lower():
+            return False
+        if filters:
+            doc = index.document(ordinal)
+            for key, expected in filters.items():
+                actual = getattr(doc, key, None) if key in ("language", "site") else doc.metadata.get(key)
+                if actual != expected:
+                    return False
+        return True
+
+    def _to_result(
+        self,
+        index: IndexSegment,
+        ordinal: int,
+        score: float,
+        query_terms: List[str],
+        projection: FieldProjection,
+        stored: FrozenSet[str],
+    ) -> SearchResult:
+        # Only the stored fields the projection needs are read; fields left out keep their defaults
+        doc = index.document(ordinal, stored)
+        metadata = None
+        if "metadata" in projection:
+            metadata = projection.metadata(
+                {**doc.metadata, "site": index.host(ordinal), "rank_features": {"bm25": round(score, 4)}}
+            )
+        return SearchResult.model_construct(
+            doc_id=doc.doc_id,
+            url=result_url(doc.url),
+            title=doc.title or None,
+            snippet=make_snippet(doc.body, query_terms) if "snippet" in projection else None,
+            score=round(score, 4),
+            language=doc.language,
+            last_crawled_at=doc.last_crawled_at,
+            metadata=metadata,
+        )
+
+
+def _doc_id(index: IndexSegment, ordinal: int) -> str:
+    return index.document(ordinal, _DOC_ID).doc_id
+
+
+def make_snippet(body: str, query_terms: List[str]) -> Optional[str]:
+    if not body:
+        return None
+    lowered = body.lower()
+    positions = [pos for pos in (lowered.find(t) for t in query_terms) if pos >= 0]
+    start = max(0, min(positions) - _SNIPPET_CHARS // 4) if positions else 0
+    snippet = body[start : start + _SNIPPET_CHARS].strip()
+    prefix = "... " if start > 0 else ""
+    suffix = " ..." if start + _SNIPPET_CHARS < len(body) else ""
+    return f"{prefix}{snippet}{suffix}"
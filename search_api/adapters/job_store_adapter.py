@@ -0,0 +1,411 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from search_api.config.settings import get_settings
+from search_api.models.schemas import JobStatus, Priority, RecrawlJob, RecrawlStatusResponse
+
+TERMINAL_STATUSES = frozenset({"succeeded", "failed", "expired"})
+
+
+def _dt(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+
+
+class JobRecord:
+    """Compact job row: epoch-second floats instead of datetimes, no pydantic model until a response is built."""
+
+    __slots__ = (
+        "job_id",
+        "group_id",
+        "tenant_id",
+        "url",
+        "status",
+        "priority",
+        "created_at",
+        "updated_at",
+        "estimated_start",
+        "sla_deadline",
+        "result",
+    )
+
+    def __init__(
+        self,
+        job_id: str,
+        group_id: str,
+        tenant_id: Optional[str],
+        url: str,
+        status: JobStatus,
+        priority: Priority,
+        created_at: float,
+        updated_at: float,
+        estimated_start: Optional[float],
+        sla_deadline: float,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.job_id = job_id
+        self.group_id = group_id
+        self.tenant_id = tenant_id
+        self.url = url
+        self.status = status
+        self.priority = priority
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.estimated_start = estimated_start
+        self.sla_deadline = sla_deadline
+        self.result = result
+
+    def to_job(self) -> RecrawlJob:
+        return RecrawlJob(
+            job_id=self.job_id,
+            url=self.url,  # type: ignore[arg-type]
+            status=self.status,
+            priority=self.priority,
+            created_at=_dt(self.created_at),  # type: ignore[arg-type]
+            updated_at=_dt(self.updated_at),  # type: ignore[arg-type]
+            estimated_start_time=_dt(self.estimated_start),
+            sla_deadline=_dt(self.sla_deadline),  # type: ignore[arg-type]
+            result=self.result,
+        )
+
+    def to_status(self) -> RecrawlStatusResponse:
+        return RecrawlStatusResponse(**self.to_job().model_dump())
+
+
+# (job_id, status, result or None to keep the current one, updated_at)
+JobUpdate = Tuple[str, JobStatus, Optional[Dict[str, Any]], float]
+
+
+class JobStoreAdapter(ABC):
+    """Recrawl job state plus idempotency keys; terminal jobs and keys expire after their TTL."""
+
+    @abstractmethod
+    async def put_many(self, records: Sequence[JobRecord]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_group(self, group_id: str) -> List[JobRecord]:
+        """The group's own jobs followed by the jobs attached to it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def attach_to_group(self, group_id: str, job_ids: Sequence[str]) -> None:
+        """List existing jobs of other groups (duplicate submissions) under group_id as well."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def update_many(self, updates: Sequence[JobUpdate]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def claim_idempotency_key(self, tenant: str, key: str, group_id: str) -> Optional[str]:
+        """Record key -> group_id unless a live claim exists; returns the existing group_id, else None."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_idempotency_key(self, tenant: str, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryJobStore(JobStoreAdapter):
+    """
+    Dict of __slots__ records (O(1) lookups). Terminal jobs are queued for expiry in the order they finish,
+    which with a fixed TTL is also expiry order, so sweeping is a pop from the left of a deque.
+    Beyond max_entries the oldest terminal jobs are dropped early; live jobs are bounded by the queue itself.
+    """
+
+    def __init__(
+        self,
+        terminal_ttl_seconds: Optional[float] = None,
+        idempotency_ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.terminal_ttl_seconds = terminal_ttl_seconds or self.settings.job_store_terminal_ttl_seconds
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds or self.settings.job_store_idempotency_ttl_seconds
+        self.max_entries = max_entries or self.settings.job_store_max_entries
+        self._jobs: Dict[str, JobRecord] = {}
+        self._groups: Dict[str, List[str]] = {}
+        # job_id -> groups it is attached to besides its own
+        self._attached: Dict[str, List[str]] = {}
+        self._expiry: Deque[Tuple[float, str]] = deque()
+        self._idem: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._idem_expiry: Deque[Tuple[float, Tuple[str, str]]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    async def put_many(self, records: Sequence[JobRecord]) -> None:
+        now = time.time()
+        for record in records:
+            self._jobs[record.job_id] = record
+            self._groups.setdefault(record.group_id, []).append(record.job_id)
+            if record.status in TERMINAL_STATUSES:
+                self._expiry.append((now + self.terminal_ttl_seconds, record.job_id))
+        self._sweep(now)
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        return self._jobs.get(job_id)
+
+    async def get_group(self, group_id: str) -> List[JobRecord]:
+        return [self._jobs[job_id] for job_id in self._groups.get(group_id, ()) if job_id in self._jobs]
+
+    async def attach_to_group(self, group_id: str, job_ids: Sequence[str]) -> None:
+        for job_id in job_ids:
+            if job_id in self._jobs:
+                self._groups.setdefault(group_id, []).append(job_id)
+                self._attached.setdefault(job_id, []).append(group_id)
+
+    async def update_many(self, updates: Sequence[JobUpdate]) -> None:
+        now = time.time()
+        for job_id, status, result, updated_at in updates:
+            record = self._jobs.get(job_id)
+            if record is None:
+                continue
+            was_terminal = record.status in TERMINAL_STATUSES
+            record.status = status
+            record.updated_at = updated_at
+            if result is not None:
+                record.result = result
+            if status in TERMINAL_STATUSES and not was_terminal:
+                self._expiry.append((now + self.terminal_ttl_seconds, job_id))
+        self._sweep(now)
+
+    async def claim_idempotency_key(self, tenant: str, key: str, group_id: str) -> Optional[str]:
+        now = time.time()
+        self._sweep(now)
+        existing = self._idem.get((tenant, key))
+        if existing is not None and existing[1] > now:
+            return existing[0]
+        expires_at = now + self.idempotency_ttl_seconds
+        self._idem[(tenant, key)] = (group_id, expires_at)
+        self._idem_expiry.append((expires_at, (tenant, key)))
+        return None
+
+    async def release_idempotency_key(self, tenant: str, key: str) -> None:
+        self._idem.pop((tenant, key), None)
+
+    def _sweep(self, now: float) -> None:
+        while self._expiry and (self._expiry[0][0] <= now or len(self._jobs) > self.max_entries):
+            _, job_id = self._expiry.popleft()
+            record = self._jobs.get(job_id)
+            # Entries for jobs that were re-put or never reached this point are skipped
+            if record is None or record.status not in TERMINAL_STATUSES:
+                continue
+            del self._jobs[job_id]
+            for group_id in [record.group_id] + self._attached.pop(job_id, []):
+                group = self._groups.get(group_id)
+                if group is not None and not any(other in self._jobs for other in group):
+                    del self._groups[group_id]
+        while self._idem_expiry and self._idem_expiry[0][0] <= now:
+            expires_at, idem_key = self._idem_expiry.popleft()
+            current = self._idem.get(idem_key)
+            if current is not None and current[1] == expires_at:
+                del self._idem[idem_key]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    group_id TEXT NOT NULL,
+    tenant_id TEXT,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    estimated_start REAL,
+    sla_deadline REAL NOT NULL,
+    result TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_group ON jobs (group_id);
+CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS idempotency (
+    tenant TEXT NOT NULL,
+    key TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (tenant, key)
+);
+CREATE TABLE IF NOT EXISTS group_attachments (
+    group_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    PRIMARY KEY (group_id, job_id)
+);
+"""
+
+_COLUMNS = (
+    "job_id, group_id, tenant_id, url, status, priority, created_at, updated_at, estimated_start, sla_deadline, result"
+)
+
+
+class SqliteJobStore(JobStoreAdapter):
+    """
+    Durable job store in one SQLite file (WAL journal). Writes from concurrent callers are group-committed:
+    whatever queues up while a transaction runs goes into the next one, executed off the event loop.
+    Expired rows are deleted at most once per sweep_interval_seconds, after a commit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        terminal_ttl_seconds: Optional[float] = None,
+        idempotency_ttl_seconds: Optional[float] = None,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
+        self.settings = get_settings()
+        self.path = path or self.settings.job_store_path
+        self.terminal_ttl_seconds = terminal_ttl_seconds or self.settings.job_store_terminal_ttl_seconds
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds or self.settings.job_store_idempotency_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by worker threads; the lock keeps their transactions from interleaving
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._pending: List[Tuple[str, List[Tuple[Any, ...]], "asyncio.Future[None]"]] = []
+        self._flusher: Optional["asyncio.Task[None]"] = None
+        self._last_sweep = 0.0
+
+    async def put_many(self, records: Sequence[JobRecord]) -> None:
+        now = time.time()
+        rows = [
+            (
+                r.job_id,
+                r.group_id,
+                r.tenant_id,
+                r.url,
+                r.status,
+                r.priority,
+                r.created_at,
+                r.updated_at,
+                r.estimated_start,
+                r.sla_deadline,
+                json.dumps(r.result) if r.result is not None else None,
+                now + self.terminal_ttl_seconds if r.status in TERMINAL_STATUSES else None,
+            )
+            for r in records
+        ]
+        await self._write(f"INSERT OR REPLACE INTO jobs ({_COLUMNS}, expires_at) VALUES ({', '.join('?' * 12)})", rows)
+
+    async def get(self, job_id: str) -> Optional[JobRecord]:
+        rows = await asyncio.to_thread(self._query, f"SELECT {_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,))
+        return self._record(rows[0]) if rows else None
+
+    async def get_group(self, group_id: str) -> List[JobRecord]:
+        rows = await asyncio.to_thread(
+            self._query,
+            f"SELECT {_COLUMNS} FROM jobs WHERE group_id = ? UNION ALL "
+            f"SELECT {_COLUMNS} FROM jobs WHERE job_id IN (SELECT job_id FROM group_attachments WHERE group_id = ?)",
+            (group_id, group_id),
+        )
+        return [self._record(row) for row in rows]
+
+    async def attach_to_group(self, group_id: str, job_ids: Sequence[str]) -> None:
+        await self._write(
+            "INSERT OR IGNORE INTO group_attachments (group_id, job_id) VALUES (?, ?)",
+            [(group_id, job_id) for job_id in job_ids],
+        )
+
+    async def update_many(self, updates: Sequence[JobUpdate]) -> None:
+        expires_at = time.time() + self.terminal_ttl_seconds
+        rows = [
+            (
+                status,
+                updated_at,
+                json.dumps(result) if result is not None else None,
+                expires_at if status in TERMINAL_STATUSES else None,
+                job_id,
+            )
+            for job_id, status, result, updated_at in updates
+        ]
+        await self._write(
+            "UPDATE jobs SET status = ?, updated_at = ?, result = COALESCE(?, result), expires_at = ? WHERE job_id = ?",
+            rows,
+        )
+
+    async def claim_idempotency_key(self, tenant: str, key: str, group_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self._claim, tenant, key, group_id, time.time())
+
+    async def release_idempotency_key(self, tenant: str, key: str) -> None:
+        await self._write("DELETE FROM idempotency WHERE tenant = ? AND key = ?", [(tenant, key)])
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self._db.close()
+
+    # ---- internals ----
+    async def _write(self, sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._pending.append((sql, rows, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_loop())
+        await future
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._commit, [(sql, rows) for sql, rows, _ in batch])
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _commit(self, statements: List[Tuple[str, List[Tuple[Any, ...]]]]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            for sql, rows in statements:
+                self._db.executemany(sql, rows)
+            if now - self._last_sweep >= self.sweep_interval_seconds:
+                self._db.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+                self._db.execute("DELETE FROM group_attachments WHERE job_id NOT IN (SELECT job_id FROM jobs)")
+                self._db.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+                self._last_sweep = now
+
+    def _query(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _claim(self, tenant: str, key: str, group_id: str, now: float) -> Optional[str]:
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT group_id FROM idempotency WHERE tenant = ? AND key = ? AND expires_at > ?", (tenant, key, now)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO idempotency (tenant, key, group_id, expires_at) VALUES (?, ?, ?, ?)",
+                (tenant, key, group_id, now + self.idempotency_ttl_seconds),
+            )
+        return None
+
+    @staticmethod
+    def _record(row: Tuple[Any, ...]) -> JobRecord:
+        return JobRecord(*row[:10], result=json.loads(row[10]) if row[10] is not None else None)
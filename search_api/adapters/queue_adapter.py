@@ -1,12 +1,16 @@
 import asyncio
 import heapq
+import math
 import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import AsyncIterator, Dict, List, Literal, Optional, Tuple
 
+from search_api.config.settings import get_settings
+
 Priority = Literal["low", "normal", "high", "critical"]
 
 
@@ -20,6 +24,8 @@ class _PrioritizedItem:
     group_id: Optional[str] = field(compare=False, default=None)
     tenant_id: Optional[str] = field(compare=False, default=None)
     not_before: Optional[datetime] = field(compare=False, default=None)
+    # SLA deadline as epoch seconds; inf when the job has none
+    deadline_ts: float = field(compare=False, default=math.inf)
 
 
 class QueueAdapter(ABC):
@@ -31,6 +37,7 @@ class QueueAdapter(ABC):
         group_id: str,
         tenant_id: Optional[str] = None,
         not_before: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
     ) -> List[str]:
         raise NotImplementedError
 
@@ -38,12 +45,146 @@ class QueueAdapter(ABC):
     async def consume(self) -> AsyncIterator[Tuple[str, str, Priority]]:
         raise NotImplementedError
 
+    @abstractmethod
+    async def consume_batch(self, max_items: int, max_wait: float) -> List[Tuple[str, str, Priority]]:
+        """Up to max_items ready jobs, waiting at most max_wait seconds for the first; empty on timeout."""
+        raise NotImplementedError
+
+    async def ack(self, job_id: str) -> None:
+        """Acknowledge a consumed job as done; queues without leases have nothing to do."""
+        return None
+
+    async def ack_many(self, job_ids: List[str]) -> None:
+        for job_id in job_ids:
+            await self.ack(job_id)
+
+
+@dataclass
+class QueueStats:
+    delivered: int = 0
+    # Jobs handed to a consumer after their SLA deadline had already passed
+    sla_misses: int = 0
+
+    @property
+    def sla_miss_rate(self) -> float:
+        return self.sla_misses / self.delivered if self.delivered else 0.0
+
+
+class _PriorityReady:
+    """Strict priority, FIFO within a priority."""
 
-class InMemoryPriorityQueueAdapter(QueueAdapter):
     def __init__(self) -> None:
         self._heap: List[_PrioritizedItem] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: _PrioritizedItem) -> None:
+        heapq.heappush(self._heap, item)
+
+    def pop(self, now: float) -> _PrioritizedItem:
+        return heapq.heappop(self._heap)
+
+
+class _Flow:
+    __slots__ = ("weight", "deficit", "classes", "size")
+
+    def __init__(self, weight: float) -> None:
+        self.weight = weight
+        self.deficit = 0.0
+        # One EDF heap per priority rank: (deadline_ts, enqueue_ts, seq, item)
+        self.classes: List[List[Tuple[float, float, int, _PrioritizedItem]]] = [[] for _ in range(4)]
+        self.size = 0
+
+    def head(self, now: float, aging_seconds: float) -> Tuple[int, float, float, int]:
+        """(effective rank, deadline, enqueue_ts, rank) of the job this flow would send next."""
+        best: Optional[Tuple[int, float, float, int]] = None
+        for rank, heap in enumerate(self.classes):
+            if not heap:
+                continue
+            deadline, enqueue_ts = heap[0][0], heap[0][1]
+            # Each aging_seconds spent waiting lifts a job one priority class; ties go to the older job
+            effective = max(0, rank - int((now - enqueue_ts) / aging_seconds))
+            candidate = (effective, deadline, enqueue_ts, rank)
+            if best is None or candidate < best:
+                best = candidate
+        assert best is not None
+        return best
+
+
+class _FairReady:
+    """
+    Deficit round robin across flows (the tenant, else the job group), weighted per tenant.
+    Only flows whose next job has the best effective priority compete in a round; inside a flow each
+    priority class is served earliest-deadline-first, and waiting jobs age upward so low never starves.
+    """
+
+    def __init__(self, aging_seconds: float, weights: Dict[str, float]) -> None:
+        self.aging_seconds = aging_seconds
+        self.weights = weights
+        self._flows: "OrderedDict[str, _Flow]" = OrderedDict()
+        self._size = 0
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, item: _PrioritizedItem) -> None:
+        key = item.tenant_id or f"group:{item.group_id}"
+        flow = self._flows.get(key)
+        if flow is None:
+            flow = self._flows[key] = _Flow(max(0.01, self.weights.get(item.tenant_id or "", 1.0)))
+        self._seq += 1
+        heapq.heappush(flow.classes[item.sort_index], (item.deadline_ts, item.enqueue_ts, self._seq, item))
+        flow.size += 1
+        self._size += 1
+
+    def pop(self, now: float) -> _PrioritizedItem:
+        heads = {key: flow.head(now, self.aging_seconds) for key, flow in self._flows.items()}
+        best_rank = min(head[0] for head in heads.values())
+        while True:
+            for key in list(self._flows):
+                if heads[key][0] != best_rank:
+                    continue
+                flow = self._flows[key]
+                if flow.deficit >= 1:
+                    flow.deficit -= 1
+                    return self._take(key, flow, heads[key][3])
+                flow.deficit += flow.weight
+                self._flows.move_to_end(key)
+
+    def _take(self, key: str, flow: _Flow, rank: int) -> _PrioritizedItem:
+        item = heapq.heappop(flow.classes[rank])[3]
+        flow.size -= 1
+        self._size -= 1
+        if not flow.size:
+            # An idle flow forfeits its deficit, as in classic DRR
+            del self._flows[key]
+        return item
+
+
+class InMemoryPriorityQueueAdapter(QueueAdapter):
+    """
+    Priority queue with a separate schedule for deferred jobs.
+    Jobs whose not_before is in the future wait in a second heap keyed by due time and are moved into the
+    ready set only once due, so they cost nothing until then and never hold up ready jobs.
+    scheduler="priority" serves strictly by priority then FIFO; scheduler="fair" adds per-tenant deficit
+    round robin, earliest-deadline-first within a priority and aging (see _FairReady).
+    """
+
+    def __init__(self, scheduler: Optional[str] = None) -> None:
+        self.settings = get_settings()
+        mode = scheduler or self.settings.queue_scheduler
+        if mode == "fair":
+            self._ready = _FairReady(self.settings.queue_aging_seconds, self.settings.queue_tenant_weights)
+        else:
+            self._ready = _PriorityReady()
+        # (due epoch seconds, sequence, item); the sequence keeps ties FIFO without comparing items
+        self._scheduled: List[Tuple[float, int, _PrioritizedItem]] = []
+        self._scheduled_seq = 0
         self._cv = asyncio.Condition()
         self._closed = False
+        self.stats = QueueStats()
 
     async def enqueue(
         self,
@@ -52,6 +193,7 @@ class InMemoryPriorityQueueAdapter(QueueAdapter):
         group_id: str,
         tenant_id: Optional[str] = None,
         not_before: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
     ) -> List[str]:
         job_ids: List[str] = []
         priority_rank = self._priority_to_rank(priority)
@@ -69,25 +211,91 @@ class InMemoryPriorityQueueAdapter(QueueAdapter):
                     group_id=group_id,
                     tenant_id=tenant_id,
                     not_before=not_before,
+                    deadline_ts=deadline.timestamp() if deadline else math.inf,
                 )
-                heapq.heappush(self._heap, item)
+                self._push(item, now)
             self._cv.notify_all()
         return job_ids
 
     async def consume(self) -> AsyncIterator[Tuple[str, str, Priority]]:
         while not self._closed:
             async with self._cv:
-                while not self._heap:
-                    await self._cv.wait()
-                item = heapq.heappop(self._heap)
-            if item.not_before and datetime.now(timezone.utc) < item.not_before:
-                # Not ready yet; re-enqueue with a small delay
-                await asyncio.sleep(0.1)
-                async with self._cv:
-                    heapq.heappush(self._heap, item)
-                    continue
+                await self._wait_ready(None)
+                item = self._deliver(time.time())
             yield (item.job_id, item.url, item.priority)
 
+    async def consume_batch(self, max_items: int, max_wait: float) -> List[Tuple[str, str, Priority]]:
+        if self._closed:
+            return []
+        async with self._cv:
+            if not await self._wait_ready(time.time() + max_wait):
+                return []
+            now = time.time()
+            batch: List[Tuple[str, str, Priority]] = []
+            while self._ready and len(batch) < max_items:
+                item = self._deliver(now)
+                batch.append((item.job_id, item.url, item.priority))
+        return batch
+
+    async def _wait_ready(self, until: Optional[float]) -> bool:
+        """Wait (holding the condition) until a job is ready or `until` passes; returns whether one is ready."""
+        while True:
+            now = time.time()
+            self._promote_due(now)
+            if self._ready:
+                return True
+            if until is not None and now >= until:
+                return False
+            # Sleep until the next deferred job is due, or until an enqueue wakes us
+            wake_at = self._next_wakeup()
+            if until is not None:
+                wake_at = until if wake_at is None else min(wake_at, until)
+            timeout = max(0.0, wake_at - now) if wake_at is not None else None
+            try:
+                await asyncio.wait_for(self._cv.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _deliver(self, now: float) -> _PrioritizedItem:
+        item = self._ready.pop(now)
+        self.stats.delivered += 1
+        if now > item.deadline_ts:
+            self.stats.sla_misses += 1
+        self._on_delivered(item)
+        return item
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def ready_count(self) -> int:
+        return len(self._ready)
+
+    @property
+    def scheduled_count(self) -> int:
+        return len(self._scheduled)
+
+    def _push(self, item: _PrioritizedItem, now: float) -> None:
+        due = item.not_before.timestamp() if item.not_before else 0.0
+        if due <= now:
+            self._ready.push(item)
+            return
+        self._scheduled_seq += 1
+        heapq.heappush(self._scheduled, (due, self._scheduled_seq, item))
+
+    def _promote_due(self, now: float) -> None:
+        while self._scheduled and self._scheduled[0][0] <= now:
+            _, _, item = heapq.heappop(self._scheduled)
+            self._ready.push(item)
+
+    def _next_wakeup(self) -> Optional[float]:
+        return self._scheduled[0][0] if self._scheduled else None
+
+    def _on_delivered(self, item: _PrioritizedItem) -> None:
+        """Hook for subclasses that track delivered jobs (e.g. leases); called under the condition lock."""
+        return None
+
     def close(self) -> None:
         self._closed = True
         # Wake consumers
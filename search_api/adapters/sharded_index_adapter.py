@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import zlib
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from search_api.adapters.index_adapter import IndexAdapter, Position, hit_positions, position_order
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndexAdapter
+from search_api.config.settings import get_settings
+from search_api.models.schemas import Facet, FacetCount, SearchResponse, SearchResult
+
+
+def shard_for(doc_id: str, num_shards: int) -> int:
+    return zlib.crc32(doc_id.encode("utf-8")) % num_shards
+
+
+class ShardedIndexAdapter(IndexAdapter):
+    """
+    Scatter-gather over hash-partitioned shard adapters.
+    Each shard returns its own top page*size hits; the per-shard lists are merged with a heap.
+    In-process (InvertedIndexAdapter) shards score on their bounded search executor, so they run side by side and
+    the deadline holds even though scoring never yields to the event loop; a shard past the deadline is cancelled,
+    which stops its scoring thread at the next check instead of letting it run to completion.
+    With search_after every shard resumes from its own position and returns only `size` hits, so deep pages
+    cost the same as the first. Shards that miss the deadline (or fail) are dropped and the response is
+    marked partial; their positions do not advance, so the next page still collects their hits.
+    """
+
+    def __init__(self, shards: List[IndexAdapter], shard_timeout_seconds: Optional[float] = None) -> None:
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.settings = get_settings()
+        self.shards = shards
+        self.shard_timeout_seconds = (
+            shard_timeout_seconds if shard_timeout_seconds is not None else self.settings.index_shard_timeout_seconds
+        )
+
+    @classmethod
+    def in_memory(cls, num_shards: int, shard_timeout_seconds: Optional[float] = None) -> "ShardedIndexAdapter":
+        return cls([InvertedIndexAdapter() for _ in range(num_shards)], shard_timeout_seconds=shard_timeout_seconds)
+
+    @property
+    def supports_search_after(self) -> bool:  # type: ignore[override]
+        return all(shard.supports_search_after for shard in self.shards)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.shards)
+
+    def add_document(self, doc: IndexedDocument) -> int:
+        shard = self.shards[shard_for(doc.doc_id, len(self.shards))]
+        return shard.add_document(doc)  # type: ignore[attr-defined]
+
+    def documents(self, doc_ids: Iterable[str]) -> Dict[str, IndexedDocument]:
+        by_shard: Dict[int, List[str]] = {}
+        for doc_id in doc_ids:
+            by_shard.setdefault(shard_for(doc_id, len(self.shards)), []).append(doc_id)
+        found: Dict[str, IndexedDocument] = {}
+        for i, shard_doc_ids in by_shard.items():
+            found.update(self.shards[i].documents(shard_doc_ids))  # type: ignore[attr-defined]
+        return found
+
+    async def search(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str = "relevance",
+        language: Optional[str] = None,
+        site: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
+    ) -> SearchResponse:
+        depth = size if search_after else page * size
+        tasks = [
+            asyncio.create_task(
+                shard.search(
+                    query=query,
+                    page=1,
+                    size=depth,
+                    sort=sort,
+                    language=language,
+                    site=site,
+                    filters=filters,
+                    fields=fields,
+                    search_after=[search_after[i]] if search_after else None,
+                )
+            )
+            for i, shard in enumerate(self.shards)
+        ]
+        # 0 waits for every shard
+        done, pending = await asyncio.wait(tasks, timeout=self.shard_timeout_seconds or None)
+        for task in pending:
+            task.cancel()
+
+        responses: List[SearchResponse] = []
+        streams: List[List[Tuple[Tuple[Tuple[float, ...], str], int, Position, SearchResult]]] = []
+        errors: List[BaseException] = []
+        for i, task in enumerate(tasks):
+            if task not in done:
+                continue
+            exc = task.exception()
+            if exc is not None:
+                errors.append(exc)
+                continue
+            response = task.result()
+            responses.append(response)
+            streams.append(
+                [(position_order(pos), i, pos, hit) for hit, pos in zip(response.results, hit_positions(response))]
+            )
+        if errors and not responses:
+            raise errors[0]
+
+        # Each shard's hits are already in hit order; (order, shard) is unique, so hits are never compared
+        merged = heapq.merge(*streams, key=lambda item: item[:2])
+        selected = list(islice(merged, 0 if search_after else (page - 1) * size, depth))
+        merged_response = SearchResponse.model_construct(
+            query=query,
+            page=page,
+            size=size,
+            total=sum(r.total for r in responses),
+            results=[hit for _, _, _, hit in selected],
+            facets=_merge_facets(responses),
+            partial=bool(pending or errors),
+        )
+        merged_response._positions = [(i, pos) for _, i, pos, _ in selected]  # type: ignore[misc]
+        return merged_response
+
+
+def _merge_facets(responses: List[SearchResponse]) -> Optional[List[Facet]]:
+    merged: Dict[str, Dict[str, int]] = {}
+    for resp in responses:
+        for facet in resp.facets or []:
+            counts = merged.setdefault(facet.name, {})
+            for fc in facet.counts:
+                counts[fc.value] = counts.get(fc.value, 0) + fc.count
+    if not merged:
+        return None
+    return [
+        Facet.model_construct(
+            name=name,
+            counts=[
+                FacetCount.model_construct(value=v, count=c)
+                for v, c in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+            ],
+        )
+        for name, counts in merged.items()
+    ]
@@ -0,0 +1,289 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from search_api.adapters.index_adapter import IndexAdapter, Position, result_url
+from search_api.adapters.inverted_index_adapter import IndexedDocument, make_snippet, tokenize
+from search_api.models.projection import FieldProjection
+from search_api.models.schemas import SearchResponse, SearchResult
+
+
+class HashingEmbedder:
+    """
+    Deterministic signed feature-hashing embedder (unigrams), L2-normalised.
+    Stand-in for a learned encoder; any object exposing embed(texts) -> (n, dim) float32 works.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                out[row, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over inner product (cosine for normalised vectors).
+    Vectors live in one contiguous float32 matrix; each list is a growable int32 array of row ids.
+    Queries probe the n_probe nearest centroids and score all candidates with a single matmul.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 64, n_probe: int = 8, train_iters: int = 10, seed: int = 0) -> None:
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iters = train_iters
+        self._rng = np.random.default_rng(seed)
+        self._buffer = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._centroids: Optional[np.ndarray] = None
+        # Per-list row-id buffers, valid up to _list_sizes; grown geometrically like _buffer
+        self._lists: List[np.ndarray] = []
+        self._list_sizes: List[int] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        return self._buffer[: self._size]
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        start = self._size
+        needed = start + vectors.shape[0]
+        if needed > self._buffer.shape[0]:
+            # Geometric growth keeps single-document adds amortised O(dim)
+            grown = np.zeros((max(needed, 2 * self._buffer.shape[0], 64), self.dim), dtype=np.float32)
+            grown[:start] = self._buffer[:start]
+            self._buffer = grown
+        self._buffer[start:needed] = vectors
+        self._size = needed
+        row_ids = np.arange(start, start + vectors.shape[0], dtype=np.int32)
+        if self._centroids is not None:
+            self._assign(row_ids)
+        return row_ids
+
+    def train(self) -> None:
+        n = len(self)
+        k = min(self.n_lists, n)
+        if k == 0:
+            return
+        vectors = self._vectors
+        centroids = vectors[self._rng.choice(n, size=k, replace=False)].copy()
+        for _ in range(self.train_iters):
+            # Spherical k-means: assign by inner product, recompute normalised means
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            norms = np.linalg.norm(sums, axis=1)
+            nonempty = norms > 0
+            centroids[nonempty] = sums[nonempty] / norms[nonempty, None]
+        self._centroids = centroids
+        self._lists = [np.zeros(0, dtype=np.int32) for _ in range(k)]
+        self._list_sizes = [0] * k
+        self._assign(np.arange(n, dtype=np.int32))
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched search; returns (scores, row_ids) of shape (n_queries, <=k), best first."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        all_scores: List[np.ndarray] = []
+        all_ids: List[np.ndarray] = []
+        if self._centroids is None:
+            candidate_sets = [np.arange(len(self), dtype=np.int32)] * queries.shape[0]
+        else:
+            n_probe = min(self.n_probe, len(self._lists))
+            probes = np.argpartition(-(queries @ self._centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+            candidate_sets = [
+                np.concatenate([self._lists[p][: self._list_sizes[p]] for p in row]) for row in probes
+            ]
+        for query, candidates in zip(queries, candidate_sets):
+            scores = self._vectors[candidates] @ query
+            top = min(k, scores.shape[0])
+            if top == 0:
+                all_scores.append(np.zeros(0, dtype=np.float32))
+                all_ids.append(np.zeros(0, dtype=np.int32))
+                continue
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best], kind="stable")]
+            all_scores.append(scores[best])
+            all_ids.append(candidates[best])
+        width = max((s.shape[0] for s in all_scores), default=0)
+        scores_out = np.full((queries.shape[0], width), -np.inf, dtype=np.float32)
+        ids_out = np.full((queries.shape[0], width), -1, dtype=np.int32)
+        for i, (s, ids) in enumerate(zip(all_scores, all_ids)):
+            scores_out[i, : s.shape[0]] = s
+            ids_out[i, : ids.shape[0]] = ids
+        return scores_out, ids_out
+
+    def _assign(self, row_ids: np.ndarray) -> None:
+        assert self._centroids is not None
+        assignment = np.argmax(self._vectors[row_ids] @ self._centroids.T, axis=1)
+        for c in np.unique(assignment).tolist():
+            rows = row_ids[assignment == c]
+            start = self._list_sizes[c]
+            needed = start + rows.shape[0]
+            if needed > self._lists[c].shape[0]:
+                grown = np.zeros(max(needed, 2 * self._lists[c].shape[0], 16), dtype=np.int32)
+                grown[:start] = self._lists[c][:start]
+                self._lists[c] = grown
+            self._lists[c][start:needed] = rows
+            self._list_sizes[c] = needed
+
+    def compact(self, keep: np.ndarray) -> None:
+        """Drop every row not in `keep`; kept rows are renumbered 0..len(keep) - 1 in order, centroids stay."""
+        self._buffer = np.ascontiguousarray(self._vectors[keep])
+        self._size = self._buffer.shape[0]
+        if self._centroids is not None:
+            self._lists = [np.zeros(0, dtype=np.int32) for _ in self._lists]
+            self._list_sizes = [0] * len(self._lists)
+            self._assign(np.arange(self._size, dtype=np.int32))
+
+
+class VectorIndexAdapter(IndexAdapter):
+    """
+    IndexAdapter over an IVFIndex; results carry rank_features.vector (cosine similarity).
+    Only vectors and their doc_ids are held here; hits are read back from the lexical adapter's segments (its
+    documents()), so they show the live copy and the corpus is not kept twice. Re-adding a doc_id replaces the
+    earlier row, and once replaced rows outnumber live ones the IVF index is compacted.
+    Language, site and filters apply as in InvertedIndexAdapter.
+    An ANN probe returns a fixed top-k, so search_after is not supported.
+    """
+
+    # Over-fetch factor so post-retrieval language/site/filters checks still fill a page
+    _FILTER_OVERFETCH = 4
+
+    def __init__(
+        self,
+        lexical: IndexAdapter,
+        embedder: Optional[HashingEmbedder] = None,
+        index: Optional[IVFIndex] = None,
+        train_threshold: int = 1024,
+    ) -> None:
+        # An InvertedIndexAdapter or ShardedIndexAdapter holding the same documents
+        self.lexical = lexical
+        self.embedder = embedder or HashingEmbedder()
+        self.index = index or IVFIndex(dim=self.embedder.dim)
+        self.train_threshold = train_threshold
+        # Row id -> doc_id; None for rows replaced by a later copy of the same doc_id
+        self._doc_ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._replaced = 0
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    def embed(self, docs: Sequence[IndexedDocument]) -> np.ndarray:
+        return self.embedder.embed([f"{d.title} {d.body}" for d in docs])
+
+    def add_documents(self, docs: Sequence[IndexedDocument]) -> None:
+        if docs:
+            self.add_vectors([d.doc_id for d in docs], self.embed(docs))
+
+    def add_vectors(self, doc_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Add precomputed embeddings (one row per doc_id, as embed() returns them)."""
+        if not doc_ids:
+            return
+        row_ids = self.index.add(vectors)
+        self._doc_ids.extend(doc_ids)
+        for doc_id, row in zip(doc_ids, row_ids.tolist()):
+            previous = self._rows.get(doc_id)
+            if previous is not None:
+                self._doc_ids[previous] = None
+                self._replaced += 1
+            self._rows[doc_id] = row
+        if self._replaced > len(self._rows):
+            self._compact()
+        if not self.index.trained and len(self.index) >= self.train_threshold:
+            self.index.train()
+
+    def add_document(self, doc: IndexedDocument) -> int:
+        self.add_documents([doc])
+        return self._rows[doc.doc_id]
+
+    async def search(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str = "relevance",
+        language: Optional[str] = None,
+        site: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        search_after: Optional[Sequence[Optional[Position]]] = None,
+    ) -> SearchResponse:
+        depth = page * size
+        # Replaced rows still take slots in the ANN top-k, so over-fetch for them too
+        fetch = depth * self._FILTER_OVERFETCH if (language or site or filters or self._replaced) else depth
+        scores, row_ids = self.index.search(self.embedder.embed([query]), fetch)
+        candidates: List[Tuple[float, str]] = []
+        for score, row in zip(scores[0].tolist(), row_ids[0].tolist()):
+            doc_id = self._doc_ids[row] if row >= 0 and score > 0.0 else None
+            if doc_id is not None:
+                candidates.append((score, doc_id))
+        docs = self.lexical.documents([doc_id for _, doc_id in candidates])  # type: ignore[attr-defined]
+        hits: List[Tuple[float, IndexedDocument]] = []
+        for score, doc_id in candidates:
+            doc = docs.get(doc_id)
+            if doc is not None and _accept(doc, language, site, filters):
+                hits.append((score, doc))
+        projection = FieldProjection.parse(fields)
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        results = [
+            _to_result(score, doc, query_terms, projection) for score, doc in hits[(page - 1) * size : depth]
+        ]
+        return SearchResponse.model_construct(query=query, page=page, size=size, total=len(hits), results=results)
+
+    def _compact(self) -> None:
+        keep = [row for row, doc_id in enumerate(self._doc_ids) if doc_id is not None]
+        self.index.compact(np.asarray(keep, dtype=np.int32))
+        self._doc_ids = [self._doc_ids[row] for row in keep]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._doc_ids) if doc_id is not None}
+        self._replaced = 0
+
+
+def _accept(
+    doc: IndexedDocument, language: Optional[str], site: Optional[str], filters: Optional[Dict[str, Any]]
+) -> bool:
+    if language and doc.language != language:
+        return False
+    if site and doc.host() != site.lower():
+        return False
+    for key, expected in (filters or {}).items():
+        actual = getattr(doc, key, None) if key in ("language", "site") else doc.metadata.get(key)
+        if actual != expected:
+            return False
+    return True
+
+
+def _to_result(
+    score: float, doc: IndexedDocument, query_terms: List[str], projection: FieldProjection
+) -> SearchResult:
+    metadata = None
+    if "metadata" in projection:
+        metadata = projection.metadata(
+            {**doc.metadata, "site": doc.host(), "rank_features": {"vector": round(score, 4)}}
+        )
+    return SearchResult.model_construct(
+        doc_id=doc.doc_id,
+        url=result_url(doc.url),
+        title=doc.title or None,
+        snippet=make_snippet(doc.body, query_terms) if "snippet" in projection else None,
+        score=round(score, 4),
+        language=doc.language,
+        last_crawled_at=doc.last_crawled_at,
+        metadata=metadata,
+    )
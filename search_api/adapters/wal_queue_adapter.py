@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter, Priority, _PrioritizedItem
+from search_api.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_LOG = "queue.wal"
+_SNAPSHOT = "queue.snapshot"
+
+
+def _encode_item(item: _PrioritizedItem) -> Dict[str, object]:
+    return {
+        "op": "enq",
+        "job_id": item.job_id,
+        "url": item.url,
+        "priority": item.priority,
+        "group_id": item.group_id,
+        "tenant_id": item.tenant_id,
+        "not_before": item.not_before.isoformat() if item.not_before else None,
+        "ts": item.enqueue_ts,
+        "deadline": item.deadline_ts if item.deadline_ts != math.inf else None,
+    }
+
+
+class WalQueueAdapter(InMemoryPriorityQueueAdapter):
+    """
+    Durable priority queue: the in-memory heaps are rebuilt from an append-only log on startup.
+    enqueue() and ack() return only once their records are fsync'd; records from concurrent callers are
+    group-committed (one write + fsync per batch). Consumed jobs are leased and redelivered unless acked
+    within lease_seconds, so jobs in flight during a crash run again (at-least-once).
+    When the log grows past compact_bytes, live jobs are written to a snapshot and the log starts over.
+    """
+
+    def __init__(
+        self,
+        queue_dir: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+        compact_bytes: Optional[int] = None,
+        scheduler: Optional[str] = None,
+    ) -> None:
+        super().__init__(scheduler=scheduler)
+        self.settings = get_settings()
+        self.queue_dir = queue_dir or self.settings.queue_dir
+        self.lease_seconds = lease_seconds or self.settings.queue_lease_seconds
+        self.compact_bytes = compact_bytes or self.settings.queue_compact_bytes
+        # job_id -> item for every unacked job, wherever it currently sits (ready, scheduled or leased)
+        self._live: Dict[str, _PrioritizedItem] = {}
+        self._leased: Dict[str, float] = {}
+        self._lease_heap: List[Tuple[float, str]] = []
+        self._pending: List[Tuple[bytes, "asyncio.Future[None]"]] = []
+        self._flusher: Optional["asyncio.Task[None]"] = None
+        self._log_fh = None
+        self._log_bytes = 0
+
+    # ---- lifecycle ----
+    def load(self) -> None:
+        """Replay snapshot + log into the heaps and open the log for appending; call before enqueue()."""
+        os.makedirs(self.queue_dir, exist_ok=True)
+        records = self._read_records(self._path(_SNAPSHOT)) + self._read_records(self._path(_LOG), repair=True)
+        for record in records:
+            if record["op"] == "enq":
+                item = self._decode_item(record)
+                self._live[item.job_id] = item
+            elif record["op"] == "ack":
+                self._live.pop(record["job_id"], None)
+        now = time.time()
+        for item in self._live.values():
+            self._push(item, now)
+        self._log_fh = open(self._path(_LOG), "ab")
+        self._log_bytes = self._log_fh.tell()
+
+    def close(self) -> None:
+        super().close()
+        if self._flusher is None or self._flusher.done():
+            self._close_log()
+
+    # ---- queue API ----
+    async def enqueue(
+        self,
+        urls: List[str],
+        priority: Priority,
+        group_id: str,
+        tenant_id: Optional[str] = None,
+        not_before: Optional[datetime] = None,
+        deadline: Optional[datetime] = None,
+    ) -> List[str]:
+        now = time.time()
+        rank = self._priority_to_rank(priority)
+        items = [
+            _PrioritizedItem(
+                sort_index=rank,
+                enqueue_ts=now,
+                job_id=str(uuid.uuid4()),
+                url=url,
+                priority=priority,
+                group_id=group_id,
+                tenant_id=tenant_id,
+                not_before=not_before,
+                deadline_ts=deadline.timestamp() if deadline else math.inf,
+            )
+            for url in urls
+        ]
+        # Registered as live before the write so a compaction racing with this batch snapshots it
+        for item in items:
+            self._live[item.job_id] = item
+        try:
+            await self._append([_encode_item(item) for item in items])
+        except Exception:
+            for item in items:
+                self._live.pop(item.job_id, None)
+            raise
+        # Only durable jobs become visible to consumers
+        async with self._cv:
+            for item in items:
+                self._push(item, now)
+            self._cv.notify_all()
+        return [item.job_id for item in items]
+
+    async def ack(self, job_id: str) -> None:
+        await self.ack_many([job_id])
+
+    async def ack_many(self, job_ids: List[str]) -> None:
+        # One log append (and at most one fsync) for the whole batch
+        acked = [(job_id, self._live.pop(job_id)) for job_id in job_ids if job_id in self._live]
+        if not acked:
+            return
+        leases = {job_id: self._leased.pop(job_id) for job_id, _ in acked if job_id in self._leased}
+        try:
+            await self._append([{"op": "ack", "job_id": job_id} for job_id, _ in acked])
+        except Exception:
+            self._live.update(acked)
+            self._leased.update(leases)
+            raise
+
+    @property
+    def leased_count(self) -> int:
+        return len(self._leased)
+
+    # ---- leases ----
+    def _on_delivered(self, item: _PrioritizedItem) -> None:
+        deadline = time.time() + self.lease_seconds
+        self._leased[item.job_id] = deadline
+        heapq.heappush(self._lease_heap, (deadline, item.job_id))
+
+    def _promote_due(self, now: float) -> None:
+        super()._promote_due(now)
+        while self._lease_heap and self._lease_heap[0][0] <= now:
+            deadline, job_id = heapq.heappop(self._lease_heap)
+            # Skip leases that were acked or renewed by a later delivery
+            if self._leased.get(job_id) == deadline and job_id in self._live:
+                del self._leased[job_id]
+                self._ready.push(self._live[job_id])
+
+    def _next_wakeup(self) -> Optional[float]:
+        candidates = [self._scheduled[0][0]] if self._scheduled else []
+        if self._lease_heap:
+            candidates.append(self._lease_heap[0][0])
+        return min(candidates) if candidates else None
+
+    # ---- log ----
+    async def _append(self, records: List[Dict[str, object]]) -> None:
+        data = b"".join(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n" for record in records)
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._pending.append((data, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_loop())
+        await future
+
+    async def _flush_loop(self) -> None:
+        # Group commit: everything that queued up while the previous fsync ran goes out in the next one
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, b"".join(data for data, _ in batch))
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            if self._log_bytes >= self.compact_bytes:
+                try:
+                    await asyncio.to_thread(self._compact, list(self._live.values()))
+                except Exception:
+                    # The flusher keeps running: appends that queued up behind the compaction are written (or
+                    # failed) by the next iteration, and the next batch past compact_bytes tries again
+                    logger.exception("queue log compaction failed in %s", self.queue_dir)
+        if self._closed:
+            self._close_log()
+
+    def _write(self, data: bytes) -> None:
+        if self._log_fh is None:
+            if self._closed:
+                raise RuntimeError("queue is closed")
+            # A failed compaction left no log open; the old log is intact, since the snapshot replaced it first
+            self._log_fh = open(self._path(_LOG), "ab")
+            self._log_bytes = self._log_fh.tell()
+        self._log_fh.write(data)
+        self._log_fh.flush()
+        os.fsync(self._log_fh.fileno())
+        self._log_bytes += len(data)
+
+    def _compact(self, live: List[_PrioritizedItem]) -> None:
+        # Replay is idempotent per job_id, so a crash between the snapshot rename and the log truncate is safe
+        tmp = self._path(f"{_SNAPSHOT}.tmp")
+        with open(tmp, "wb") as fh:
+            for item in live:
+                fh.write(json.dumps(_encode_item(item), separators=(",", ":")).encode("utf-8") + b"\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._path(_SNAPSHOT))
+        previous, self._log_fh = self._log_fh, None
+        if previous is not None:
+            previous.close()
+        self._log_fh = open(self._path(_LOG), "wb")
+        os.fsync(self._log_fh.fileno())
+        self._log_bytes = 0
+
+    def _close_log(self) -> None:
+        if self._log_fh is not None:
+            self._log_fh.close()
+            self._log_fh = None
+
+    def _read_records(self, path: str, repair: bool = False) -> List[Dict[str, object]]:
+        if not os.path.exists(path):
+            return []
+        records: List[Dict[str, object]] = []
+        offset = 0
+        # Byte offset of the last unreadable line; it is a torn tail only if nothing follows it
+        bad: Optional[int] = None
+        with open(path, "rb") as fh:
+            for line in fh:
+                if bad is not None:
+                    logger.warning("skipping corrupt queue log record in %s at byte %d", path, bad)
+                    bad = None
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn record")
+                    records.append(json.loads(line))
+                except ValueError:
+                    bad = offset
+                offset += len(line)
+        if bad is not None:
+            # A crash mid-append leaves at most one partial record, at the tail
+            logger.warning("dropping torn queue log tail in %s at byte %d", path, bad)
+            if repair:
+                with open(path, "r+b") as fh:
+                    fh.truncate(bad)
+        return records
+
+    def _decode_item(self, record: Dict[str, object]) -> _PrioritizedItem:
+        priority = record["priority"]
+        not_before = record.get("not_before")
+        deadline = record.get("deadline")
+        return _PrioritizedItem(
+            sort_index=self._priority_to_rank(priority),  # type: ignore[arg-type]
+            enqueue_ts=float(record["ts"]),  # type: ignore[arg-type]
+            job_id=str(record["job_id"]),
+            url=str(record["url"]),
+            priority=priority,  # type: ignore[arg-type]
+            group_id=record.get("group_id"),  # type: ignore[arg-type]
+            tenant_id=record.get("tenant_id"),  # type: ignore[arg-type]
+            not_before=datetime.fromisoformat(not_before) if not_before else None,  # type: ignore[arg-type]
+            deadline_ts=float(deadline) if deadline is not None else math.inf,  # type: ignore[arg-type]
+        )
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.queue_dir, name)
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
@@ -9,13 +9,109 @@ class Settings(BaseSettings):
     api_name: str = "Scalable Search API"
     api_version: str = "1.0.0"
     api_keys: List[str] = []
+    # API key -> tenant; tenant limits, idempotency keys and recrawl dedupe are scoped by it. Only keys listed in
+    # api_keys are mapped, so without authentication there are no tenants
+    api_key_tenants: Dict[str, str] = {}
     default_page_size: int = 10
     max_page_size: int = 100
     rate_limit_per_minute: int = 60000
+    # "memory" keeps buckets per process; "shm" shares them across all workers on the host;
+    # "gcra" evaluates tenant -> key -> route limits against a (batched) GCRA store
+    rate_limit_backend: str = "memory"
+    rate_limit_tenant_per_minute: int = 0
+    rate_limit_route_per_minute: int = 0
+    rate_limit_batch_size: int = 128
+    rate_limit_shm_path: str = "/dev/shm/search_api_ratelimit"
+    rate_limit_shm_slots: int = 65536
     enable_vector_blend: bool = True
+    vector_blend_rrf_k: int = 60
     recrawl_sla_minutes: int = 60
+    # Submissions of a URL completed within this window are answered without a new crawl; 0 disables
+    recrawl_dedupe_window_seconds: float = 300.0
+    recrawl_dedupe_bloom_capacity: int = 1_000_000
+    # Job status streams send a comment line after this much silence so proxies keep the connection open
+    recrawl_events_heartbeat_seconds: float = 15.0
+    recrawl_events_max_backlog: int = 1000
+    # "memory" keeps compact job records in-process; "sqlite" persists them at job_store_path
+    job_store_backend: str = "memory"
+    job_store_path: str = "./data/jobs.sqlite3"
+    # Finished jobs stay queryable this long; idempotency keys are honoured for idempotency TTL
+    job_store_terminal_ttl_seconds: float = 24 * 3600.0
+    job_store_idempotency_ttl_seconds: float = 24 * 3600.0
+    job_store_max_entries: int = 5_000_000
+    run_recrawl_worker: bool = True
+    recrawl_worker_capacity: int = 100
+    recrawl_worker_batch_size: int = 256
+    recrawl_worker_batch_wait_seconds: float = 0.05
+    # Real HTTP fetches in the recrawl worker; off by default so the scaffold stays offline
+    fetch_enabled: bool = False
+    fetch_max_connections: int = 1000
+    fetch_per_host_connections: int = 2
+    fetch_crawl_delay_seconds: float = 1.0
+    fetch_max_body_bytes: int = 2 * 1024 * 1024
+    fetch_timeout_seconds: float = 10.0
+    fetch_dns_ttl_seconds: float = 300.0
+    fetch_max_redirects: int = 5
+    # Let the fetcher and webhooks reach loopback, private and link-local addresses (local development only)
+    allow_private_destinations: bool = False
+    fetch_user_agent: str = "search-api-recrawler/1.0"
+    # Recrawl callbacks: completions are batched per (callback_url, job group) and POSTed with retries
+    webhook_max_concurrency: int = 32
+    webhook_batch_max_jobs: int = 100
+    webhook_batch_wait_seconds: float = 1.0
+    webhook_timeout_seconds: float = 10.0
+    webhook_max_attempts: int = 8
+    webhook_backoff_base_seconds: float = 1.0
+    webhook_backoff_max_seconds: float = 600.0
+    # "memory" loses pending retries on restart; "sqlite" keeps them at webhook_backlog_path
+    webhook_backlog_backend: str = "memory"
+    webhook_backlog_path: str = "./data/webhooks.sqlite3"
+    # When set, each payload carries X-Webhook-Signature: sha256=<hex HMAC of the body>
+    webhook_signing_secret: Optional[str] = None
+    fingerprint_max_entries: int = 1_000_000
+    # Recrawled text within this many SimHash bits of the indexed copy is a near-duplicate and is not reindexed
+    fingerprint_near_duplicate_bits: int = 3
+    # "memory" loses queued jobs on restart; "wal" persists them in queue_dir and redelivers unacked leases
+    queue_backend: str = "memory"
+    queue_dir: str = "./data/queue"
+    queue_lease_seconds: float = 300.0
+    queue_compact_bytes: int = 64 * 1024 * 1024
+    # "priority" serves strictly by priority then FIFO; "fair" adds per-tenant DRR, EDF on SLA deadlines and aging
+    queue_scheduler: str = "priority"
+    # A waiting job is lifted one priority class per this many seconds (fair scheduler only)
+    queue_aging_seconds: float = 300.0
+    queue_tenant_weights: Dict[str, float] = {}
+    # Queries searched during startup warmup so the result cache is hot before /healthz reports ready
+    warmup_queries: List[str] = []
     enable_result_cache: bool = True
     result_cache_ttl_seconds: int = 15
+    # Served stale (and refreshed in the background) for this long after the fresh TTL
+    result_cache_stale_ttl_seconds: int = 30
+    # XFetch beta for probabilistic early refresh; 0 disables it
+    result_cache_early_refresh_beta: float = 0.0
+    # Cache the top result_window_size hits once per query and serve pages inside it by slicing
+    enable_result_window: bool = True
+    result_window_size: int = 100
+    # HMAC key for search_after cursors; unset, a random per-process key is used and cursors do not survive a
+    # restart or move between workers
+    search_cursor_secret: Optional[str] = None
+    result_cache_max_entries: int = 10000
+    result_cache_max_bytes: int = 256 * 1024 * 1024
+    # "mock" serves synthetic results; "inverted" serves the in-process BM25 index fed by the recrawl worker
+    index_backend: str = "mock"
+    index_dir: Optional[str] = None
+    index_refresh_interval_seconds: float = 1.0
+    index_flush_threshold_docs: int = 10000
+    index_flush_interval_seconds: float = 60.0
+    index_merge_factor: int = 10
+    # A failed refresh/flush/merge cycle is retried after a pause doubling up to this
+    index_retry_max_seconds: float = 60.0
+    # Hash-partitioned in-process shards for the inverted backend, each with its own indexer under index_dir/shard-N
+    index_shards: int = 1
+    # Shards that have not answered by then are left out and the response is marked partial; 0 waits for all
+    index_shard_timeout_seconds: float = 0.05
+    # Threads scoring in-process searches, shared by every shard; searches past that wait their turn
+    index_search_threads: int = 8
 
     class Config:
         env_prefix = "SEARCH_"
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple, Union
+
+from fastapi import Request
+
+from search_api.adapters.bounded_cache_adapter import BoundedCacheAdapter
+from search_api.adapters.fetch_adapter import HttpFetcher
+from search_api.adapters.index_adapter import IndexAdapter, MockIndexAdapter
+from search_api.adapters.job_store_adapter import InMemoryJobStore, JobStoreAdapter, SqliteJobStore
+from search_api.adapters.inverted_index_adapter import InvertedIndexAdapter
+from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter
+from search_api.adapters.sharded_index_adapter import ShardedIndexAdapter
+from search_api.adapters.vector_index_adapter import VectorIndexAdapter
+from search_api.adapters.wal_queue_adapter import WalQueueAdapter
+from search_api.config.settings import Settings, get_settings
+from search_api.services.fingerprint_service import FingerprintService
+from search_api.services.gcra_rate_limit_service import GcraRateLimitService
+from search_api.services.indexing_service import Indexer, IndexingService, ShardedIndexingService
+from search_api.services.rate_limit_service import RateLimitDecision, RateLimitService
+from search_api.services.recrawl_service import RecrawlService
+from search_api.services.search_service import SearchService
+from search_api.services.shm_rate_limit_service import SharedMemoryRateLimitService
+from search_api.services.webhook_dispatcher import WebhookDispatcher
+from search_api.tasks.worker import recrawl_worker
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Application-lifetime owner of adapters, services and background tasks.
+    Built once per process in the FastAPI lifespan; start() runs warmup (open indexes, pre-fill the
+    result cache, start workers) and only then flips `ready`, which /healthz reports.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self.cache = BoundedCacheAdapter(
+            max_entries=self.settings.result_cache_max_entries, max_bytes=self.settings.result_cache_max_bytes
+        )
+        self.index_adapter, self.vector_adapter, self.indexer = self._build_index()
+        self.queue = self._build_queue()
+        self.search_service = SearchService(
+            index_adapter=self.index_adapter, cache_adapter=self.cache, vector_adapter=self.vector_adapter
+        )
+        self.job_store = self._build_job_store()
+        self.webhooks = self._build_webhooks()
+        self.recrawl_service = RecrawlService(
+            queue_adapter=self.queue, job_store=self.job_store, webhooks=self.webhooks
+        )
+        self.rate_limiter = self._build_rate_limiter()
+        self.fetcher: Optional[HttpFetcher] = None
+        self.fingerprints = FingerprintService()
+        self.ready = False
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._stopping.clear()
+        if isinstance(self.queue, WalQueueAdapter):
+            await asyncio.to_thread(self.queue.load)
+        if self.indexer is not None:
+            await asyncio.to_thread(self.indexer.load)
+            self._tasks.append(asyncio.create_task(self.indexer.run()))
+        await self._prefill_cache()
+        await self.webhooks.load()
+        self._tasks.append(asyncio.create_task(self.webhooks.run()))
+        self._tasks.append(asyncio.create_task(self.cache.run_expiry(self._stopping)))
+        if self.settings.run_recrawl_worker:
+            if self.settings.fetch_enabled:
+                self.fetcher = HttpFetcher()
+            self._worker = asyncio.create_task(
+                recrawl_worker(
+                    self.queue,
+                    self.recrawl_service,
+                    capacity=self.settings.recrawl_worker_capacity,
+                    indexer=self.indexer,
+                    fetcher=self.fetcher,
+                    fingerprints=self.fingerprints,
+                )
+            )
+        self.ready = True
+
+    async def stop(self) -> None:
+        self.ready = False
+        self._stopping.set()
+        if self._worker is not None:
+            # The worker cancels and awaits its in-flight groups, so nothing writes to the backends closed below
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self.indexer is not None:
+            self.indexer.stop()
+        self.queue.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        if self.indexer is not None:
+            await asyncio.to_thread(self.indexer.close)
+        if self.fetcher is not None:
+            await self.fetcher.close()
+            self.fetcher = None
+        if isinstance(self.rate_limiter, SharedMemoryRateLimitService):
+            self.rate_limiter.close()
+        await self.webhooks.close()
+        await self.job_store.close()
+
+    async def _prefill_cache(self) -> None:
+        for query in self.settings.warmup_queries:
+            try:
+                await self.search_service.search(query=query, page=1, size=self.settings.default_page_size)
+            except Exception:
+                logger.exception("warmup query failed: %s", query)
+
+    def _build_index(self) -> Tuple[IndexAdapter, Optional[VectorIndexAdapter], Optional[Indexer]]:
+        if self.settings.index_backend != "inverted":
+            return MockIndexAdapter(), None, None
+        # The ANN leg is fed by the same indexer as the lexical index and reads its hits back from it
+        if self.settings.index_shards <= 1:
+            adapter = InvertedIndexAdapter()
+            vector_adapter = VectorIndexAdapter(adapter) if self.settings.enable_vector_blend else None
+            return adapter, vector_adapter, IndexingService(adapter=adapter, vector_adapter=vector_adapter)
+        shards = [InvertedIndexAdapter() for _ in range(self.settings.index_shards)]
+        sharded = ShardedIndexAdapter(shards)
+        vector_adapter = VectorIndexAdapter(sharded) if self.settings.enable_vector_blend else None
+        index_dir = self.settings.index_dir
+        indexers = [
+            IndexingService(
+                adapter=shard,
+                index_dir=os.path.join(index_dir, f"shard-{i}") if index_dir else None,
+                vector_adapter=vector_adapter,
+            )
+            for i, shard in enumerate(shards)
+        ]
+        return sharded, vector_adapter, ShardedIndexingService(indexers)
+
+    def _build_queue(self) -> InMemoryPriorityQueueAdapter:
+        if self.settings.queue_backend == "wal":
+            return WalQueueAdapter(queue_dir=self.settings.queue_dir)
+        return InMemoryPriorityQueueAdapter()
+
+    def _build_job_store(self) -> JobStoreAdapter:
+        if self.settings.job_store_backend == "sqlite":
+            return SqliteJobStore(path=self.settings.job_store_path)
+        return InMemoryJobStore()
+
+    def _build_webhooks(self) -> WebhookDispatcher:
+        if self.settings.webhook_backlog_backend == "sqlite":
+            return WebhookDispatcher(backlog_path=self.settings.webhook_backlog_path)
+        return WebhookDispatcher()
+
+    async def check_rate_limit(
+        self, principal: str, tenant_id: Optional[str] = None, route: Optional[str] = None
+    ) -> RateLimitDecision:
+        if isinstance(self.rate_limiter, GcraRateLimitService):
+            return await self.rate_limiter.check(self.rate_limiter.limits_for(principal, tenant_id, route))
+        return self.rate_limiter.check(key=principal, limit_per_minute=self.settings.rate_limit_per_minute)
+
+    def _build_rate_limiter(self) -> Union[RateLimitService, SharedMemoryRateLimitService, GcraRateLimitService]:
+        if self.settings.rate_limit_backend == "gcra":
+            return GcraRateLimitService()
+        if self.settings.rate_limit_backend == "shm":
+            return SharedMemoryRateLimitService(
+                path=self.settings.rate_limit_shm_path, slots=self.settings.rate_limit_shm_slots
+            )
+        return RateLimitService()
+
+
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
+
+
+def get_search_service(request: Request) -> SearchService:
+    return get_container(request).search_service
+
+
+def get_recrawl_service(request: Request) -> RecrawlService:
+    return get_container(request).recrawl_service
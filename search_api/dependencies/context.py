@@ -3,10 +3,10 @@ from typing import Optional
 from fastapi import Depends, Header, HTTPException, Request, Response, status
 
 from search_api.config.settings import RequestContext, get_settings
-from search_api.services.rate_limit_service import RateLimitService
+from search_api.dependencies.container import get_container
 
 
-def get_context(
+async def get_context(
     request: Request,
     response: Response,
     x_api_key: Optional[str] = Header(default=None, alias="X-API-Key"),
@@ -17,11 +17,13 @@ def get_context(
     if settings.api_keys:
         if not x_api_key or x_api_key not in settings.api_keys:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
+    # The tenant follows from the authenticated key, never from anything else the client sends
+    tenant_id = settings.api_key_tenants.get(x_api_key) if settings.api_keys and x_api_key else None
 
     # Rate limiting
-    rl = RateLimitService()
     principal = x_api_key or "anonymous"
-    decision = rl.check(key=principal, limit_per_minute=settings.rate_limit_per_minute)
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    decision = await get_container(request).check_rate_limit(principal, tenant_id=tenant_id, route=route)
     response.headers["X-RateLimit-Limit"] = str(decision.limit)
     response.headers["X-RateLimit-Remaining"] = str(decision.remaining)
     if not decision.allowed:
@@ -32,7 +34,7 @@ def get_context(
         request_id=x_request_id or getattr(request.state, "request_id", None),
         api_key=x_api_key,
         user_id=None,
-        tenant_id=None,
+        tenant_id=tenant_id,
     )
     return ctx
 
@@ -1,13 +1,29 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from search_api.config.settings import get_settings
+from search_api.dependencies.container import ServiceContainer
 from search_api.routes.search import router as search_router
 from search_api.routes.recrawl import router as recrawl_router
 from search_api.middleware.request_id import RequestIdMiddleware
 from search_api.middleware.errors import add_exception_handlers
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    container = ServiceContainer()
+    app.state.container = container
+    try:
+        await container.start()
+        yield
+    finally:
+        await container.stop()
+
+
 def create_app() -> FastAPI:
     settings = get_settings()
     app = FastAPI(
@@ -15,6 +31,7 @@ def create_app() -> FastAPI:
         version=settings.api_version,
         docs_url="/docs",
         redoc_url="/redoc",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -29,8 +46,11 @@ def create_app() -> FastAPI:
     add_exception_handlers(app)
 
     @app.get("/healthz", tags=["health"])
-    async def health() -> dict:
-        return {"status": "ok"}
+    async def health(request: Request) -> JSONResponse:
+        container = getattr(request.app.state, "container", None)
+        if container is None or not container.ready:
+            return JSONResponse(status_code=503, content={"status": "starting"})
+        return JSONResponse(content={"status": "ok"})
 
     app.include_router(search_router, prefix="/v1")
     app.include_router(recrawl_router, prefix="/v1")
@@ -0,0 +1,70 @@
+from typing import Any, Dict, FrozenSet, List, Optional
+
+from search_api.models.schemas import SearchResult
+
+RESULT_FIELDS: FrozenSet[str] = frozenset(SearchResult.model_fields)
+
+
+class FieldProjection:
+    """
+    Parsed `fields` parameter: the SearchResult keys a response carries, and optionally which `metadata` sub-keys.
+    "metadata" keeps every metadata key, "metadata.rank_features" only that one. doc_id is always kept.
+    """
+
+    __slots__ = ("fields", "metadata_keys", "include")
+
+    def __init__(self, fields: FrozenSet[str], metadata_keys: Optional[FrozenSet[str]] = None) -> None:
+        self.fields = fields | {"doc_id"}
+        # None keeps every metadata key
+        self.metadata_keys = metadata_keys
+        # `include` argument for pydantic serialization; None when nothing is projected away
+        self.include: Optional[Dict[str, Any]] = None
+        if self.fields != RESULT_FIELDS or metadata_keys is not None:
+            self.include = {name: True for name in self.fields}
+            if metadata_keys is not None and "metadata" in self.fields:
+                self.include["metadata"] = {key: True for key in metadata_keys}
+
+    @classmethod
+    def parse(cls, fields: Optional[List[str]]) -> "FieldProjection":
+        """Projection for a `fields` list; empty or None means every field. Raises ValueError on unknown names."""
+        if not fields:
+            return ALL_FIELDS
+        names = set()
+        metadata_keys = set()
+        whole_metadata = False
+        for raw in fields:
+            name, _, sub_key = raw.strip().partition(".")
+            if not name:
+                continue
+            if name not in RESULT_FIELDS or (sub_key and name != "metadata"):
+                raise ValueError(f"unknown field: {raw.strip()}")
+            names.add(name)
+            if name == "metadata":
+                if sub_key:
+                    metadata_keys.add(sub_key)
+                else:
+                    whole_metadata = True
+        if not names:
+            return ALL_FIELDS
+        keys = None if whole_metadata or "metadata" not in names else frozenset(metadata_keys)
+        return cls(frozenset(names), keys)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def cache_key(self) -> List[str]:
+        """Canonical form, so equivalent `fields` lists share a cache entry."""
+        if self.include is None:
+            return []
+        keys = sorted(self.fields)
+        if self.metadata_keys is not None:
+            keys.extend(f"metadata.{key}" for key in sorted(self.metadata_keys))
+        return keys
+
+    def metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        if self.metadata_keys is None:
+            return metadata
+        return {key: value for key, value in metadata.items() if key in self.metadata_keys}
+
+
+ALL_FIELDS = FieldProjection(RESULT_FIELDS)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr
 
 
 class ErrorBody(BaseModel):
@@ -43,7 +43,12 @@ class SearchResponse(BaseModel):
     total: int
     results: List[SearchResult]
     facets: Optional[List[Facet]] = None
+    partial: bool = False
+    # Opaque cursor for the page after this one; absent on the last page
+    next_cursor: Optional[str] = None
     request_id: Optional[str] = None
+    # (shard, (sort values, doc_id)) per result, recorded by index adapters for search_after; never serialised
+    _positions: Optional[List[Tuple[int, Tuple[Tuple[float, ...], str]]]] = PrivateAttr(default=None)
 
 
 Priority = Literal["low", "normal", "high", "critical"]
@@ -75,6 +80,14 @@ class RecrawlGroupResponse(BaseModel):
     request_id: Optional[str] = None
 
 
+class RecrawlGroupStatusResponse(BaseModel):
+    job_group_id: str
+    jobs: List[RecrawlJob]
+    # Number of jobs per status
+    counts: Dict[str, int]
+    request_id: Optional[str] = None
+
+
 class RecrawlStatusResponse(BaseModel):
     job_id: str
     url: HttpUrl
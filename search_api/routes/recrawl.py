@@ -1,11 +1,20 @@
 from datetime import datetime, timezone
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, status
+from fastapi.responses import StreamingResponse
 
 from search_api.config.settings import RequestContext, get_settings
-from search_api.models.schemas import ErrorResponse, RecrawlGroupResponse, RecrawlRequest, RecrawlStatusResponse
+from search_api.models.schemas import (
+    ErrorResponse,
+    RecrawlGroupResponse,
+    RecrawlGroupStatusResponse,
+    RecrawlRequest,
+    RecrawlStatusResponse,
+)
+from search_api.services.egress_guard import DestinationNotAllowed, check_destination
 from search_api.services.recrawl_service import RecrawlService
+from search_api.dependencies.container import get_recrawl_service
 from search_api.dependencies.context import get_context
 
 router = APIRouter(tags=["recrawl"])
@@ -29,10 +38,17 @@ async def request_recrawl(
     payload: RecrawlRequest,
     ctx: RequestContext = Depends(get_context),
     idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    service: RecrawlService = Depends(get_recrawl_service),
 ) -> RecrawlGroupResponse:
     if len(payload.urls) > 100:
         raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Too many URLs")
-    service = RecrawlService()
+    if payload.callback_url is not None:
+        try:
+            await check_destination(str(payload.callback_url))
+        except DestinationNotAllowed as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="callback_url must resolve to a public address"
+            ) from e
     now = datetime.now(timezone.utc)
     # Example: delay low-priority jobs slightly if needed
     not_before = None
@@ -62,8 +78,8 @@ async def request_recrawl(
 async def get_recrawl_status(
     job_id: str = Path(..., min_length=8),
     ctx: RequestContext = Depends(get_context),
+    service: RecrawlService = Depends(get_recrawl_service),
 ) -> RecrawlStatusResponse:
-    service = RecrawlService()
     status_resp = await service.get_status(job_id)
     if not status_resp:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -71,3 +87,47 @@ async def get_recrawl_status(
     return status_resp
 
 
+@router.get(
+    "/recrawl/groups/{job_group_id}",
+    response_model=RecrawlGroupStatusResponse,
+    responses={401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 429: {"model": ErrorResponse}},
+)
+async def get_recrawl_group_status(
+    job_group_id: str = Path(..., min_length=8),
+    ctx: RequestContext = Depends(get_context),
+    service: RecrawlService = Depends(get_recrawl_service),
+) -> RecrawlGroupStatusResponse:
+    group = await service.get_group_status(job_group_id)
+    if not group:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job group not found")
+    group.request_id = ctx.request_id
+    return group
+
+
+@router.get(
+    "/recrawl/groups/{job_group_id}/events",
+    response_class=StreamingResponse,
+    responses={401: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 429: {"model": ErrorResponse}},
+)
+async def stream_recrawl_group_events(
+    job_group_id: str = Path(..., min_length=8),
+    ctx: RequestContext = Depends(get_context),
+    service: RecrawlService = Depends(get_recrawl_service),
+) -> StreamingResponse:
+    # Auth and rate limiting run once per connection; afterwards traffic is one event per status change
+    if not await service.get_group_status(job_group_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job group not found")
+
+    async def events() -> AsyncIterator[str]:
+        async for batch in service.watch_group(job_group_id):
+            if not batch:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(event.to_sse() for event in batch)
+        yield f'event: done\ndata: {{"job_group_id": "{job_group_id}"}}\n\n'
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,13 @@
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from search_api.config.settings import RequestContext, get_settings
+from search_api.models.projection import FieldProjection
 from search_api.models.schemas import ErrorResponse, SearchResponse
+from search_api.services.search_cursor import CursorError
 from search_api.services.search_service import SearchService
+from search_api.dependencies.container import get_search_service
 from search_api.dependencies.context import get_context
 
 router = APIRouter(tags=["search"])
@@ -21,33 +24,49 @@ router = APIRouter(tags=["search"])
     },
 )
 async def search(
+    response: Response,
     q: str = Query(min_length=1, description="Query string"),
     page: int = Query(default=1, ge=1),
-    size: int = Query(default=lambda: get_settings().default_page_size, ge=1),
+    size: Optional[int] = Query(default=None, ge=1, description="Defaults to the configured page size"),
     sort: str = Query(default="relevance", pattern="^(relevance|freshness)$"),
     lang: Optional[str] = Query(default=None, description="ISO language hint"),
     site: Optional[str] = Query(default=None, description="Restrict to site or host"),
     filters: Optional[str] = Query(default=None, description="JSON-encoded filters"),
-    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return"),
+    fields: Optional[str] = Query(
+        default=None, description="Comma-separated result fields to return; metadata.<key> selects metadata keys"
+    ),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor of the previous page; continues the same query and ignores page"
+    ),
     ctx: RequestContext = Depends(get_context),
-) -> SearchResponse:
-    service = SearchService()
+    service: SearchService = Depends(get_search_service),
+) -> Response:
     parsed_filters: Optional[Dict[str, Any]] = None
     if filters:
         # Parsing omitted for brevity; validate shape before use
         parsed_filters = {}
     parsed_fields: Optional[List[str]] = [s.strip() for s in fields.split(",")] if fields else None
-    response = await service.search(
-        query=q,
-        page=page,
-        size=size,
-        sort=sort,
-        language=lang,
-        site=site,
-        filters=parsed_filters,
-        fields=parsed_fields,
-    )
-    response.request_id = ctx.request_id
-    return response
+    try:
+        FieldProjection.parse(parsed_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    try:
+        body = await service.search_json(
+            query=q,
+            page=page,
+            size=size or get_settings().default_page_size,
+            sort=sort,
+            language=lang,
+            site=site,
+            filters=parsed_filters,
+            fields=parsed_fields,
+            cursor=cursor,
+            request_id=ctx.request_id,
+        )
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    # Already-encoded JSON; returning a Response skips FastAPI's response_model validation and encoding, and with it
+    # the headers dependencies set on the shared response (rate limits), so those are copied over
+    return Response(content=body, media_type="application/json", headers=dict(response.headers))
 
 
@@ -0,0 +1,116 @@
+import asyncio
+import ipaddress
+import socket
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from search_api.config.settings import get_settings
+
+Resolver = Callable[[str, int], Awaitable[str]]
+
+
+class DestinationNotAllowed(ValueError):
+    """An outbound request would reach a loopback, private, link-local or otherwise non-public address."""
+
+
+def is_public_address(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve_all(host: str, port: int) -> List[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def _resolve_first(host: str, port: int) -> str:
+    return (await _resolve_all(host, port))[0]
+
+
+async def check_destination(url: str) -> None:
+    """Raise DestinationNotAllowed unless every address the URL's host resolves to is public."""
+    if get_settings().allow_private_destinations:
+        return
+    parts = urlsplit(url)
+    if not parts.hostname:
+        raise DestinationNotAllowed(f"{url} has no host")
+    try:
+        addresses = await _resolve_all(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+    except (OSError, ValueError) as exc:
+        raise DestinationNotAllowed(f"{parts.hostname} does not resolve") from exc
+    for address in addresses:
+        if not is_public_address(address):
+            raise DestinationNotAllowed(f"{parts.hostname} resolves to non-public address {address}")
+
+
+class GuardedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that resolves each host itself and connects to that address, refusing non-public ones.
+    The check applies to the address actually dialled, so a host re-pointed after validation is still refused.
+    """
+
+    def __init__(
+        self,
+        resolve: Optional[Resolver] = None,
+        allow_private: Optional[bool] = None,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+    ) -> None:
+        self.resolve = resolve or _resolve_first
+        self.allow_private = (
+            allow_private if allow_private is not None else get_settings().allow_private_destinations
+        )
+        self.backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            address = await self.resolve(host, port)
+        except OSError as exc:
+            raise httpcore.ConnectError(f"cannot resolve {host}: {exc}") from exc
+        if not self.allow_private and not is_public_address(address):
+            raise DestinationNotAllowed(f"{host} resolves to non-public address {address}")
+        return await self.backend.connect_tcp(
+            address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(
+        self, path: str, timeout: Optional[float] = None, socket_options: Optional[Iterable[Any]] = None
+    ) -> httpcore.AsyncNetworkStream:
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+class GuardedTransport(httpx.AsyncHTTPTransport):
+    """
+    httpx transport whose pool connects through a GuardedNetworkBackend. Requests keep their hostname, so
+    connections are pooled per host and Host, SNI and certificate checks all use the name.
+    """
+
+    def __init__(
+        self, limits: httpx.Limits, resolve: Optional[Resolver] = None, allow_private: Optional[bool] = None
+    ) -> None:
+        super().__init__(limits=limits)
+        # httpx does not expose httpcore's network_backend, so the pool is rebuilt with it
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=GuardedNetworkBackend(resolve, allow_private),
+        )
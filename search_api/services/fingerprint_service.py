@@ -0,0 +1,94 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
+from search_api.adapters.inverted_index_adapter import tokenize
+from search_api.config.settings import get_settings
+
+ContentChange = Literal["new", "unchanged", "near_duplicate", "changed"]
+
+_SHINGLE = 3
+
+
+def content_hash(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word 3-shingles; near-identical texts differ in only a few bits."""
+    tokens = tokenize(text)
+    if len(tokens) < _SHINGLE:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i : i + _SHINGLE]) for i in range(len(tokens) - _SHINGLE + 1)]
+    if not shingles:
+        return 0
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(len(shingles), 8), axis=1)
+    # Majority vote per bit position across all shingles
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class Fingerprint:
+    content_hash: bytes
+    # SimHash of the copy that was last indexed; near-duplicates are measured against it, so drift cannot accumulate
+    simhash: int
+
+
+class FingerprintService:
+    """
+    Per-URL content fingerprints for the recrawl path.
+    check_bytes() compares the raw body hash before any parsing; check_text() compares the SimHash of the
+    extracted text. Only "new" and "changed" pages need to be indexed. Bounded LRU of max_entries URLs.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, near_duplicate_bits: Optional[int] = None) -> None:
+        self.settings = get_settings()
+        self.max_entries = max_entries or self.settings.fingerprint_max_entries
+        self.near_duplicate_bits = (
+            near_duplicate_bits if near_duplicate_bits is not None else self.settings.fingerprint_near_duplicate_bits
+        )
+        self._store: "OrderedDict[str, Fingerprint]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def check_bytes(self, url: str, body: bytes) -> Tuple[bool, bytes]:
+        """(identical to the stored body, hash of this body)."""
+        digest = content_hash(body)
+        stored = self._store.get(url)
+        if stored is not None:
+            self._store.move_to_end(url)
+            if stored.content_hash == digest:
+                return True, digest
+        return False, digest
+
+    def check_text(self, url: str, digest: bytes, text: str) -> Tuple[ContentChange, int]:
+        """Classify the extracted text against the stored fingerprint and record it; returns (change, distance)."""
+        fingerprint = simhash(text)
+        stored = self._store.get(url)
+        if stored is None:
+            self._remember(url, Fingerprint(digest, fingerprint))
+            return "new", 64
+        distance = hamming(stored.simhash, fingerprint)
+        if distance <= self.near_duplicate_bits:
+            # Keep the indexed SimHash, but remember these bytes so the next identical fetch skips parsing
+            stored.content_hash = digest
+            return "near_duplicate", distance
+        self._remember(url, Fingerprint(digest, fingerprint))
+        return "changed", distance
+
+    def _remember(self, url: str, fingerprint: Fingerprint) -> None:
+        self._store[url] = fingerprint
+        self._store.move_to_end(url)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
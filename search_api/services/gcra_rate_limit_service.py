@@ -0,0 +1,161 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from search_api.config.settings import get_settings
+from search_api.services.rate_limit_service import RateLimitDecision
+
+_EPSILON = 1e-3
+
+
+@dataclass(frozen=True)
+class GcraLimit:
+    key: str
+    limit_per_minute: int
+    # Requests allowed back-to-back from idle; defaults to the per-minute limit (token-bucket parity)
+    burst: Optional[int] = None
+
+    @property
+    def emission_interval(self) -> float:
+        return 60.0 / self.limit_per_minute
+
+    @property
+    def capacity(self) -> int:
+        return self.burst or self.limit_per_minute
+
+
+class GcraStore(ABC):
+    """
+    Remote store of theoretical arrival times (one float per key).
+    apply() receives a pipelined batch; each entry is a hierarchy of limits that must be admitted or
+    rejected atomically, e.g. as one Lua script call per entry in a single Redis pipeline.
+    """
+
+    @abstractmethod
+    async def apply(self, batch: Sequence[Sequence[GcraLimit]]) -> List[RateLimitDecision]:
+        raise NotImplementedError
+
+
+def gcra_evaluate(
+    limits: Sequence[GcraLimit], tats: Sequence[Optional[float]], now: float
+) -> Tuple[RateLimitDecision, List[float]]:
+    """Pure GCRA over a hierarchy: allowed only if every level admits; returns the decision and new TATs."""
+    new_tats: List[float] = []
+    allowed = True
+    remaining = None
+    reported_limit = limits[0].limit_per_minute if limits else 0
+    retry_after = 0.0
+    for limit, stored in zip(limits, tats):
+        interval = limit.emission_interval
+        window = interval * limit.capacity
+        new_tat = max(stored or now, now) + interval
+        over = new_tat - now - window
+        # 1ms tolerance absorbs float drift from summing emission intervals onto epoch-scale timestamps
+        if over > _EPSILON:
+            allowed = False
+            retry_after = max(retry_after, over)
+        left = max(0, int((window - (new_tat - now) + _EPSILON) // interval))
+        if remaining is None or left < remaining:
+            remaining, reported_limit = left, limit.limit_per_minute
+        new_tats.append(new_tat)
+    if not allowed:
+        new_tats = [stored if stored is not None else now for stored in tats]
+    decision = RateLimitDecision(
+        allowed=allowed,
+        limit=reported_limit,
+        remaining=remaining or 0,
+        reset_seconds=int(retry_after) + 1 if not allowed else 0,
+    )
+    return decision, new_tats
+
+
+class InProcessGcraStore(GcraStore):
+    """In-process fake of the remote store for tests and single-node runs; keys whose TAT has passed are dropped."""
+
+    _SWEEP_EVERY = 4096
+
+    def __init__(self) -> None:
+        self._tats: Dict[str, float] = {}
+        self._ops = 0
+        self.batches = 0
+
+    async def apply(self, batch: Sequence[Sequence[GcraLimit]]) -> List[RateLimitDecision]:
+        self.batches += 1
+        now = time.time()
+        decisions: List[RateLimitDecision] = []
+        for limits in batch:
+            decision, new_tats = gcra_evaluate(limits, [self._tats.get(limit.key) for limit in limits], now)
+            if decision.allowed:
+                for limit, tat in zip(limits, new_tats):
+                    self._tats[limit.key] = tat
+            decisions.append(decision)
+        self._ops += len(batch)
+        if self._ops >= self._SWEEP_EVERY:
+            self._ops = 0
+            # A TAT in the past means a full bucket, which is the same as no entry
+            self._tats = {key: tat for key, tat in self._tats.items() if tat > now}
+        return decisions
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class GcraRateLimitService:
+    """
+    Hierarchical GCRA limiter (tenant -> API key -> route) in one call per request.
+    Checks issued in the same event-loop iteration are coalesced into one store batch (up to max_batch),
+    and batches are pipelined: a new batch is sent without waiting for earlier ones to return.
+    """
+
+    def __init__(self, store: Optional[GcraStore] = None, max_batch: Optional[int] = None) -> None:
+        self.settings = get_settings()
+        self.store = store if store is not None else InProcessGcraStore()
+        self.max_batch = max_batch or self.settings.rate_limit_batch_size
+        self._pending: List[Tuple[Sequence[GcraLimit], "asyncio.Future[RateLimitDecision]"]] = []
+        self._flush_scheduled = False
+        self._inflight: set = set()
+
+    def limits_for(self, api_key: str, tenant_id: Optional[str] = None, route: Optional[str] = None) -> List[GcraLimit]:
+        settings = self.settings
+        limits: List[GcraLimit] = []
+        if tenant_id and settings.rate_limit_tenant_per_minute:
+            limits.append(GcraLimit(key=f"t:{tenant_id}", limit_per_minute=settings.rate_limit_tenant_per_minute))
+        limits.append(GcraLimit(key=f"k:{api_key}", limit_per_minute=settings.rate_limit_per_minute))
+        if route and settings.rate_limit_route_per_minute:
+            limits.append(
+                GcraLimit(key=f"r:{api_key}:{route}", limit_per_minute=settings.rate_limit_route_per_minute)
+            )
+        return limits
+
+    async def check(self, limits: Sequence[GcraLimit]) -> RateLimitDecision:
+        future: "asyncio.Future[RateLimitDecision]" = asyncio.get_running_loop().create_future()
+        self._pending.append((limits, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._send(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[Sequence[GcraLimit], "asyncio.Future[RateLimitDecision]"]]) -> None:
+        try:
+            decisions = await self.store.apply([limits for limits, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), decision in zip(batch, decisions):
+            if not future.done():
+                future.set_result(decision)
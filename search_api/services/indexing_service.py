@@ -0,0 +1,409 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from search_api.adapters.index_segment import MmapSegment, write_segment
+from search_api.adapters.inverted_index_adapter import (
+    IndexedDocument,
+    IndexSegment,
+    InvertedIndex,
+    InvertedIndexAdapter,
+    MultiSegment,
+)
+from search_api.adapters.sharded_index_adapter import shard_for
+from search_api.adapters.vector_index_adapter import VectorIndexAdapter
+from search_api.config.settings import get_settings
+
+_MANIFEST = "manifest.json"
+_EMBED_BATCH = 1024
+_DOC_ID = frozenset({"doc_id"})
+_EMBEDDED_FIELDS = frozenset({"doc_id", "title", "body"})
+
+logger = logging.getLogger(__name__)
+
+
+def doc_id_for_url(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+@dataclass
+class _Segment:
+    name: str
+    reader: IndexSegment
+    deleted: Set[int] = field(default_factory=set)
+    on_disk: bool = False
+    # Embedding of every ordinal (deleted ones included) when a vector adapter is fed and segments are persisted
+    vectors: Optional[np.ndarray] = None
+
+    @property
+    def live_count(self) -> int:
+        return self.reader.doc_count - len(self.deleted)
+
+
+class IndexingService:
+    """
+    LSM-style incremental indexer.
+    index_document() writes into an in-memory buffer; refresh() publishes the buffer as a searchable
+    segment (and applies tombstones for replaced doc_ids); flush() persists in-memory segments as mmap'd
+    files plus a manifest; maybe_merge() applies a tiered merge policy in a background thread.
+    Readers see immutable MultiSegment snapshots swapped into the adapter on every change.
+    With a vector_adapter, refresh() also embeds the published documents into it, so both legs see a document
+    at the same time. Embeddings are written next to each segment file, so load() feeds the vector index from
+    them instead of re-embedding the corpus.
+    """
+
+    def __init__(
+        self,
+        adapter: Optional[InvertedIndexAdapter] = None,
+        index_dir: Optional[str] = None,
+        refresh_interval_seconds: Optional[float] = None,
+        flush_threshold_docs: Optional[int] = None,
+        merge_factor: Optional[int] = None,
+        vector_adapter: Optional[VectorIndexAdapter] = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.adapter = adapter or InvertedIndexAdapter()
+        self.vector_adapter = vector_adapter
+        self.index_dir = index_dir if index_dir is not None else self.settings.index_dir
+        self.refresh_interval_seconds = refresh_interval_seconds or self.settings.index_refresh_interval_seconds
+        self.flush_threshold_docs = flush_threshold_docs or self.settings.index_flush_threshold_docs
+        self.merge_factor = max(2, merge_factor or self.settings.index_merge_factor)
+        self._segments: List[_Segment] = []
+        self._buffer = InvertedIndex()
+        # doc_id -> buffer ordinal, and doc_id -> (segment name, ordinal) of the live copy of documents in segments
+        # not yet flushed. Documents in on-disk segments are looked up there (see _locate), so both stay bounded by
+        # what is still in memory
+        self._buffered: Dict[str, int] = {}
+        self._locations: Dict[str, Tuple[str, int]] = {}
+        self._pending_deletes: List[Tuple[str, int]] = []
+        self._generation = 0
+        self._merging = False
+        self._stopped = asyncio.Event()
+        # run() flushes in a worker thread; close() must not flush alongside a flush cut short by cancellation
+        self._flush_lock = threading.RLock()
+
+    # ---- write path ----
+    def index_document(self, doc: IndexedDocument) -> None:
+        previous = self._locate(doc.doc_id)
+        if previous is not None:
+            name, ordinal = previous
+            if name is None:
+                # Superseded inside the buffer itself: drop it when the buffer is published
+                self._pending_deletes.append(("", ordinal))
+            else:
+                self._pending_deletes.append((name, ordinal))
+        self._buffered[doc.doc_id] = self._buffer.add(doc)
+
+    def refresh(self) -> bool:
+        if not self._buffer.doc_count and not self._pending_deletes:
+            return False
+        by_name = {seg.name: seg for seg in self._segments}
+        new_segment: Optional[_Segment] = None
+        if self._buffer.doc_count:
+            vectors = None
+            if self.vector_adapter is not None:
+                # In buffer order, so a later copy of a doc_id replaces an earlier one
+                buffer = self._buffer
+                docs = [buffer.document(o) for o in range(buffer.doc_count)]
+                vectors = self.vector_adapter.embed(docs)
+                self.vector_adapter.add_vectors([doc.doc_id for doc in docs], vectors)
+            new_segment = _Segment(
+                name=self._next_name(), reader=self._buffer, vectors=vectors if self.index_dir else None
+            )
+            self._segments.append(new_segment)
+            for doc_id, ordinal in self._buffered.items():
+                self._locations[doc_id] = (new_segment.name, ordinal)
+            self._buffered = {}
+        for name, ordinal in self._pending_deletes:
+            target = new_segment if name == "" else by_name.get(name)
+            if target is not None:
+                target.deleted.add(ordinal)
+        self._pending_deletes = []
+        self._buffer = InvertedIndex()
+        self._publish()
+        return True
+
+    def flush(self) -> List[str]:
+        """Persist in-memory segments and the manifest (tombstones included); returns the names written."""
+        if not self.index_dir:
+            return []
+        written: List[str] = []
+        with self._flush_lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            for seg in self._segments:
+                if seg.on_disk:
+                    continue
+                path = self._path(seg.name)
+                write_segment(seg.reader, path)
+                if seg.vectors is not None:
+                    seg.vectors = _save_vectors(seg.vectors, self._vector_path(seg.name))
+                seg.reader = MmapSegment.open(path)
+                seg.on_disk = True
+                written.append(seg.name)
+            self._write_manifest()
+            self._publish()
+        return written
+
+    async def maybe_merge(self) -> bool:
+        candidates = self._pick_merge()
+        if not candidates or self._merging:
+            return False
+        self._merging = True
+        try:
+            name = self._next_name()
+            path = self._path(name) if self.index_dir else None
+            sources = [(seg, frozenset(seg.deleted)) for seg in candidates]
+            merged, remap, vectors = await asyncio.to_thread(self._merge_segments, sources, name)
+            new_segment = _Segment(name=name, reader=merged, on_disk=path is not None, vectors=vectors)
+            # Tombstones that landed on the sources while the merge ran are carried over
+            for seg, snapshot in sources:
+                for ordinal in seg.deleted - snapshot:
+                    if (seg.name, ordinal) in remap:
+                        new_segment.deleted.add(remap[(seg.name, ordinal)][0])
+            for (old_name, old_ordinal), (new_ordinal, doc_id) in remap.items():
+                if self._locations.get(doc_id) == (old_name, old_ordinal):
+                    if new_segment.on_disk:
+                        del self._locations[doc_id]
+                    else:
+                        self._locations[doc_id] = (name, new_ordinal)
+            self._pending_deletes = [
+                (name, remap[pending][0]) if pending in remap else pending for pending in self._pending_deletes
+            ]
+            first = self._segments.index(candidates[0])
+            replaced = {seg.name for seg in candidates}
+            self._segments = [seg for seg in self._segments if seg.name not in replaced]
+            self._segments.insert(first, new_segment)
+            if self.index_dir:
+                self._write_manifest()
+            self._publish()
+            # Unmapped once searches still reading the previous snapshot release them
+            for seg in candidates:
+                seg.reader.close()
+                if seg.on_disk:
+                    os.remove(self._path(seg.name))
+                    if seg.vectors is not None:
+                        os.remove(self._vector_path(seg.name))
+            return True
+        finally:
+            self._merging = False
+
+    # ---- lifecycle ----
+    def load(self) -> None:
+        """Open the segments listed in the manifest; O(segments), documents are not read."""
+        if not self.index_dir or not os.path.exists(os.path.join(self.index_dir, _MANIFEST)):
+            return
+        with open(os.path.join(self.index_dir, _MANIFEST), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        self._generation = manifest["generation"]
+        self._segments = []
+        for entry in manifest["segments"]:
+            reader = MmapSegment.open(self._path(entry["name"]))
+            seg = _Segment(name=entry["name"], reader=reader, deleted=set(entry["deleted"]), on_disk=True)
+            self._segments.append(seg)
+        self._publish()
+        if self.vector_adapter is not None:
+            self._load_vectors()
+
+    async def run(self) -> None:
+        """
+        Refresh every refresh_interval_seconds, flushing and merging when due. A failed cycle (disk full, a bad
+        document) is logged and retried after a pause that doubles up to index_retry_max_seconds; nothing buffered
+        is dropped, so the indexer catches up once the cause is gone.
+        """
+        last_flush = time.monotonic()
+        delay = self.refresh_interval_seconds
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                last_flush = await self._cycle(last_flush)
+            except Exception:
+                delay = min(delay * 2, max(self.settings.index_retry_max_seconds, self.refresh_interval_seconds))
+                logger.exception("index cycle failed in %s; retrying in %.1fs", self.index_dir or "memory", delay)
+            else:
+                delay = self.refresh_interval_seconds
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def close(self) -> None:
+        # Waits for a flush still running in a thread whose run() task was cancelled
+        with self._flush_lock:
+            self.refresh()
+            self.flush()
+            for seg in self._segments:
+                seg.reader.close()
+
+    @property
+    def segment_names(self) -> List[str]:
+        return [seg.name for seg in self._segments]
+
+    # ---- internals ----
+    async def _cycle(self, last_flush: float) -> float:
+        self.refresh()
+        unflushed = sum(seg.reader.doc_count for seg in self._segments if not seg.on_disk)
+        flush_due = time.monotonic() - last_flush > self.settings.index_flush_interval_seconds
+        if unflushed >= self.flush_threshold_docs or (unflushed and flush_due):
+            # Only run() mutates the segment list, so writing segments off-loop is safe
+            self._forget(await asyncio.to_thread(self.flush))
+            last_flush = time.monotonic()
+        await self.maybe_merge()
+        return last_flush
+
+    def _locate(self, doc_id: str) -> Optional[Tuple[Optional[str], int]]:
+        if doc_id in self._buffered:
+            return None, self._buffered[doc_id]
+        location = self._locations.get(doc_id)
+        if location is not None:
+            return location
+        # Newest first; a live copy in an on-disk segment is found by binary search over its doc_id column
+        for seg in reversed(self._segments):
+            if isinstance(seg.reader, MmapSegment):
+                for ordinal in seg.reader.ordinals_of(doc_id):
+                    if ordinal not in seg.deleted:
+                        return seg.name, ordinal
+        return None
+
+    def _forget(self, flushed: List[str]) -> None:
+        # Locations in flushed segments are found on disk from now on; pruned on the loop, which owns _locations
+        if flushed:
+            names = set(flushed)
+            self._locations = {doc_id: loc for doc_id, loc in self._locations.items() if loc[0] not in names}
+
+    def _load_vectors(self) -> None:
+        # Only doc_ids are read per document; a segment written without embeddings is embedded once and saved
+        vector_adapter = self.vector_adapter
+        assert vector_adapter is not None
+        for seg in self._segments:
+            path = self._vector_path(seg.name)
+            if os.path.exists(path):
+                seg.vectors = np.load(path, mmap_mode="r")
+            else:
+                docs = (seg.reader.document(ordinal, _EMBEDDED_FIELDS) for ordinal in range(seg.reader.doc_count))
+                batches = [
+                    vector_adapter.embed(list(islice(docs, _EMBED_BATCH)))
+                    for _ in range(0, seg.reader.doc_count, _EMBED_BATCH)
+                ]
+                seg.vectors = _save_vectors(np.concatenate(batches or [vector_adapter.embed([])]), path)
+            live = [ordinal for ordinal in range(seg.reader.doc_count) if ordinal not in seg.deleted]
+            for start in range(0, len(live), _EMBED_BATCH):
+                batch = live[start : start + _EMBED_BATCH]
+                doc_ids = [seg.reader.document(ordinal, _DOC_ID).doc_id for ordinal in batch]
+                vector_adapter.add_vectors(doc_ids, seg.vectors[batch])
+
+    def _publish(self) -> None:
+        self.adapter.index = MultiSegment(
+            [seg.reader for seg in self._segments], [frozenset(seg.deleted) for seg in self._segments]
+        )
+
+    def _pick_merge(self) -> List[_Segment]:
+        # Tiered policy: segments are bucketed by log_{merge_factor}(live docs); a full tier merges into one
+        tiers: Dict[int, List[_Segment]] = {}
+        for seg in self._segments:
+            tier = int(math.log(max(seg.live_count, 1), self.merge_factor))
+            tiers.setdefault(tier, []).append(seg)
+        for tier in sorted(tiers):
+            if len(tiers[tier]) >= self.merge_factor:
+                return tiers[tier][: self.merge_factor]
+        return []
+
+    def _merge_segments(
+        self, sources: List[Tuple[_Segment, FrozenSet[int]]], name: str
+    ) -> Tuple[IndexSegment, Dict[Tuple[str, int], Tuple[int, str]], Optional[np.ndarray]]:
+        merged = InvertedIndex()
+        remap: Dict[Tuple[str, int], Tuple[int, str]] = {}
+        live: List[List[int]] = []
+        for seg, deleted in sources:
+            live.append([ordinal for ordinal in range(seg.reader.doc_count) if ordinal not in deleted])
+            for ordinal in live[-1]:
+                doc = seg.reader.document(ordinal)
+                remap[(seg.name, ordinal)] = (merged.add(doc), doc.doc_id)
+        vectors = None
+        if all(seg.vectors is not None for seg, _ in sources):
+            # Rows follow the merged ordinals: sources in order, live ordinals ascending
+            vectors = np.concatenate([seg.vectors[ordinals] for (seg, _), ordinals in zip(sources, live)])
+        if not self.index_dir:
+            return merged, remap, vectors
+        write_segment(merged, self._path(name))
+        if vectors is not None:
+            vectors = _save_vectors(vectors, self._vector_path(name))
+        return MmapSegment.open(self._path(name)), remap, vectors
+
+    def _write_manifest(self) -> None:
+        assert self.index_dir
+        manifest = {
+            "generation": self._generation,
+            "segments": [
+                {"name": seg.name, "deleted": sorted(seg.deleted)} for seg in self._segments if seg.on_disk
+            ],
+        }
+        tmp = os.path.join(self.index_dir, f"{_MANIFEST}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, os.path.join(self.index_dir, _MANIFEST))
+
+    def _next_name(self) -> str:
+        self._generation += 1
+        return f"seg-{self._generation:08d}"
+
+    def _path(self, name: str) -> str:
+        assert self.index_dir
+        return os.path.join(self.index_dir, f"{name}.seg")
+
+    def _vector_path(self, name: str) -> str:
+        assert self.index_dir
+        return os.path.join(self.index_dir, f"{name}.vec")
+
+
+def _save_vectors(vectors: np.ndarray, path: str) -> np.ndarray:
+    """Write vectors as .npy (temp file, fsync, rename) and return them memory-mapped from the file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        np.save(fh, vectors)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+class ShardedIndexingService:
+    """One IndexingService per shard of a ShardedIndexAdapter; documents are routed by the adapter's shard_for()."""
+
+    def __init__(self, shards: List[IndexingService]) -> None:
+        self.shards = shards
+
+    def index_document(self, doc: IndexedDocument) -> None:
+        self.shards[shard_for(doc.doc_id, len(self.shards))].index_document(doc)
+
+    def load(self) -> None:
+        for shard in self.shards:
+            shard.load()
+
+    async def run(self) -> None:
+        await asyncio.gather(*(shard.run() for shard in self.shards))
+
+    def stop(self) -> None:
+        for shard in self.shards:
+            shard.stop()
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+
+
+# Either indexer; the worker and the container only use index_document() and the lifecycle methods
+Indexer = Union[IndexingService, ShardedIndexingService]
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+
+@dataclass
+class JobEvent:
+    job_id: str
+    status: str
+    updated_at: float
+    result: Optional[Dict[str, Any]] = None
+
+    def to_sse(self) -> str:
+        data = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "updated_at": datetime.fromtimestamp(self.updated_at, tz=timezone.utc).isoformat(),
+            "result": self.result,
+        }
+        return f"event: status\nid: {self.job_id}:{self.updated_at}\ndata: {json.dumps(data)}\n\n"
+
+
+class Subscription:
+    """One watcher's bounded inbox. If the watcher falls behind, the backlog is dropped and `overflowed` is set."""
+
+    def __init__(self, max_events: int) -> None:
+        self.queue: "asyncio.Queue[Optional[JobEvent]]" = asyncio.Queue(max_events)
+        self.overflowed = False
+
+    def offer(self, event: JobEvent) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # The watcher must re-read a snapshot; None wakes it up to do so
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class JobEventBroker:
+    """Per-group fan-out of job status changes; publishing to a group nobody watches is one dict miss."""
+
+    def __init__(self, max_events_per_subscriber: int = 1000) -> None:
+        self.max_events_per_subscriber = max_events_per_subscriber
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, group_id: str) -> Subscription:
+        subscription = Subscription(self.max_events_per_subscriber)
+        self._subscribers.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, group_id: str, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(group_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[group_id]
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def has_subscribers(self, group_id: str) -> bool:
+        return group_id in self._subscribers
+
+    def publish(self, group_id: str, events: List[JobEvent]) -> None:
+        for subscription in self._subscribers.get(group_id, ()):
+            for event in events:
+                subscription.offer(event)
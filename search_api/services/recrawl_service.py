@@ -1,20 +1,57 @@
+import asyncio
+import time
 import uuid
-from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
+from search_api.adapters.job_store_adapter import (
+    TERMINAL_STATUSES,
+    InMemoryJobStore,
+    JobRecord,
+    JobStoreAdapter,
+    JobUpdate,
+)
 from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter, Priority, QueueAdapter
 from search_api.config.settings import get_settings
-from search_api.models.schemas import RecrawlGroupResponse, RecrawlJob, RecrawlStatusResponse
+from search_api.models.schemas import (
+    RecrawlGroupResponse,
+    RecrawlGroupStatusResponse,
+    RecrawlJob,
+    RecrawlStatusResponse,
+)
+from search_api.services.job_events import JobEvent, JobEventBroker
+from search_api.services.url_dedupe import RotatingBloomFilter, canonicalize_url
+from search_api.services.webhook_dispatcher import WebhookDispatcher
 
 
 class RecrawlService:
-    def __init__(self, queue_adapter: Optional[QueueAdapter] = None) -> None:
+    def __init__(
+        self,
+        queue_adapter: Optional[QueueAdapter] = None,
+        job_store: Optional[JobStoreAdapter] = None,
+        webhooks: Optional[WebhookDispatcher] = None,
+    ) -> None:
         self.queue: QueueAdapter = queue_adapter or InMemoryPriorityQueueAdapter()
         self.settings = get_settings()
-        # In-memory job state, replace with durable store in production
-        self._jobs: Dict[str, RecrawlJob] = {}
-        # Idempotency registry: (tenant_id or "", key) -> job_group_id
-        self._idem: Dict[Tuple[str, str], str] = {}
+        # Job state and idempotency keys, both with TTL expiry
+        self.jobs: JobStoreAdapter = job_store or InMemoryJobStore()
+        # (tenant_id or "", canonical URL) -> queued/running job_id, so duplicate submissions attach to it
+        self._inflight: Dict[Tuple[str, str], str] = {}
+        self._inflight_keys: Dict[str, Tuple[str, str]] = {}
+        self._reserving: Dict[Tuple[str, str], "asyncio.Future[str]"] = {}
+        # job_id -> its group and the groups it was attached to, for queued/running jobs, so status changes
+        # can be routed to group watchers
+        self._job_groups: Dict[str, List[str]] = {}
+        self.events = JobEventBroker(self.settings.recrawl_events_max_backlog)
+        # Without a dispatcher callback_url is accepted but not called
+        self.webhooks = webhooks
+        # job_id -> (url, [(group_id, callback_url)]) of every submission waiting for that in-flight job to finish
+        self._callbacks: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {}
+        # Recently completed (tenant, canonical URL) pairs; a Bloom filter, so rare false positives are possible
+        window = self.settings.recrawl_dedupe_window_seconds
+        self._recent: Optional[RotatingBloomFilter] = (
+            RotatingBloomFilter(window, self.settings.recrawl_dedupe_bloom_capacity) if window > 0 else None
+        )
 
     async def enqueue_recrawl(
         self,
@@ -26,67 +63,291 @@ class RecrawlService:
         not_before: Optional[datetime] = None,
         idempotency_key: Optional[str] = None,
     ) -> RecrawlGroupResponse:
-        now = datetime.now(timezone.utc)
         tenant = tenant_id or ""
-        if idempotency_key:
-            key = (tenant, idempotency_key)
-            if key in self._idem:
-                # Duplicate submission by design returns conflict by spec
-                raise ValueError("duplicate_idempotency_key")
         job_group_id = str(uuid.uuid4())
-        sla_deadline = now + timedelta(minutes=self.settings.recrawl_sla_minutes)
+        # Claimed up front so concurrent submissions with one key cannot both get through
+        if idempotency_key and await self.jobs.claim_idempotency_key(tenant, idempotency_key, job_group_id):
+            # Duplicate submission by design returns conflict by spec
+            raise ValueError("duplicate_idempotency_key")
+        try:
+            return await self._enqueue_group(job_group_id, urls, priority, callback_url, tenant_id, not_before)
+        except BaseException:
+            # Cancellation included: a request that did not get its response can be retried with the same key.
+            # Jobs it already created are in flight, so the retry attaches to them instead of crawling twice
+            if idempotency_key:
+                await self.jobs.release_idempotency_key(tenant, idempotency_key)
+            raise
 
-        job_ids = await self.queue.enqueue(
-            urls=urls, priority=priority, group_id=job_group_id, tenant_id=tenant_id, not_before=not_before
-        )
+    async def _enqueue_group(
+        self,
+        job_group_id: str,
+        urls: List[str],
+        priority: Priority,
+        callback_url: Optional[str],
+        tenant_id: Optional[str],
+        not_before: Optional[datetime],
+    ) -> RecrawlGroupResponse:
+        now = time.time()
+        tenant = tenant_id or ""
+        sla_deadline = now + self.settings.recrawl_sla_minutes * 60
 
+        # Each submitted URL resolves to an in-flight job, a job being created by a concurrent call,
+        # a recently completed crawl, or a new job. The canonical form is only the dedupe key: it may not address the
+        # same resource, so jobs crawl and report the URL as first submitted
+        canonical_urls = [canonicalize_url(url) for url in urls]
+        submitted: Dict[str, str] = {}
+        for url, canonical in zip(urls, canonical_urls):
+            submitted.setdefault(canonical, url)
+        attached: Dict[str, str] = {}
+        awaiting: Dict[str, "asyncio.Future[str]"] = {}
+        recent: List[str] = []
+        new_urls: List[str] = []
+        for canonical in canonical_urls:
+            key = (tenant, canonical)
+            if canonical in attached or canonical in awaiting or canonical in new_urls or canonical in recent:
+                continue
+            if key in self._inflight:
+                attached[canonical] = self._inflight[key]
+            elif key in self._reserving:
+                awaiting[canonical] = self._reserving[key]
+            elif self._recent is not None and f"{tenant}\0{canonical}" in self._recent:
+                recent.append(canonical)
+            else:
+                new_urls.append(canonical)
+                self._reserving[key] = asyncio.get_running_loop().create_future()
+
+        # Jobs of other groups that this submission's duplicates attach to
+        shared = set(attached.values())
+        job_ids: List[str] = []
+        records = []
+        failure: Optional[BaseException] = None
+        try:
+            if new_urls:
+                job_ids = await self.queue.enqueue(
+                    urls=[submitted[canonical] for canonical in new_urls],
+                    priority=priority,
+                    group_id=job_group_id,
+                    tenant_id=tenant_id,
+                    not_before=not_before,
+                    deadline=datetime.fromtimestamp(sla_deadline, tz=timezone.utc),
+                )
+            for canonical, job_id in zip(new_urls, job_ids):
+                url = submitted[canonical]
+                records.append(self._new_job(job_id, job_group_id, tenant_id, url, priority, now, sla_deadline))
+                attached[canonical] = job_id
+            for canonical in recent:
+                job = self._new_job(
+                    str(uuid.uuid4()), job_group_id, tenant_id, submitted[canonical], priority, now, sla_deadline
+                )
+                job.status = "succeeded"
+                job.estimated_start = None
+                job.result = {"deduplicated": "recently_crawled"}
+                records.append(job)
+                attached[canonical] = job.job_id
+            await self.jobs.put_many(records)
+            # Published only once stored, so callers attaching to these jobs can read them back
+            for canonical, job_id in zip(new_urls, job_ids):
+                self._inflight[(tenant, canonical)] = job_id
+                self._inflight_keys[job_id] = (tenant, canonical)
+                self._job_groups[job_id] = [job_group_id]
+                self._reserving.pop((tenant, canonical)).set_result(job_id)
+        except Exception as exc:
+            failure = exc
+            raise
+        finally:
+            # Also reached on cancellation; concurrent submissions waiting on these URLs must not hang
+            for canonical in new_urls:
+                future = self._reserving.pop((tenant, canonical), None)
+                if future is not None:
+                    future.set_exception(failure or RuntimeError("recrawl submission was cancelled"))
+                    # Waiters re-raise it; mark retrieved so an unobserved failure is not logged
+                    future.exception()
+        for canonical, future in awaiting.items():
+            attached[canonical] = await future
+            shared.add(attached[canonical])
+        if shared:
+            await self.jobs.attach_to_group(job_group_id, sorted(shared))
+            for job_id in shared:
+                if job_id in self._job_groups:
+                    self._job_groups[job_id].append(job_group_id)
+        # Duplicates share the existing job_id, and with it its status
+        by_id = {record.job_id: record for record in records}
         jobs: List[RecrawlJob] = []
-        for url, job_id in zip(urls, job_ids):
-            job = RecrawlJob(
-                job_id=job_id,
-                url=url,  # type: ignore[arg-type]
-                status="queued",
-                priority=priority,
-                created_at=now,
-                updated_at=now,
-                estimated_start_time=now + timedelta(minutes=3),
-                sla_deadline=sla_deadline,
-                result=None,
-            )
-            self._jobs[job_id] = job
-            jobs.append(job)
-        if idempotency_key:
-            self._idem[(tenant, idempotency_key)] = job_group_id
+        watched: Set[str] = set()
+        for canonical in canonical_urls:
+            job_id = attached[canonical]
+            record = by_id.get(job_id) or await self.jobs.get(job_id)
+            if record is not None:
+                jobs.append(record.to_job())
+                if callback_url and self.webhooks is not None and job_id not in watched:
+                    watched.add(job_id)
+                    await self._watch_callback(record, job_group_id, callback_url)
         return RecrawlGroupResponse(job_group_id=job_group_id, jobs=jobs)
 
+    def _new_job(
+        self,
+        job_id: str,
+        group_id: str,
+        tenant_id: Optional[str],
+        url: str,
+        priority: Priority,
+        now: float,
+        sla_deadline: float,
+    ) -> JobRecord:
+        return JobRecord(
+            job_id=job_id,
+            group_id=group_id,
+            tenant_id=tenant_id,
+            url=url,
+            status="queued",
+            priority=priority,
+            created_at=now,
+            updated_at=now,
+            estimated_start=now + 180,
+            sla_deadline=sla_deadline,
+        )
+
+    async def _watch_callback(self, record: JobRecord, group_id: str, callback_url: str) -> None:
+        assert self.webhooks is not None
+        if record.status not in TERMINAL_STATUSES:
+            if record.job_id in self._inflight_keys:
+                # Callbacks are fired and the job released in one step, so registering here cannot be missed
+                self._callbacks.setdefault(record.job_id, (record.url, []))[1].append((group_id, callback_url))
+                return
+            # The job finished after record was read; the store has its outcome
+            record = await self.jobs.get(record.job_id) or record
+        if record.status in TERMINAL_STATUSES:
+            self.webhooks.submit(
+                callback_url,
+                group_id,
+                _callback_job(record.job_id, record.url, record.status, record.updated_at, record.result),
+            )
+
+    def _release(self, job_id: str, success: bool) -> None:
+        self._job_groups.pop(job_id, None)
+        key = self._inflight_keys.pop(job_id, None)
+        if key is None:
+            return
+        if self._inflight.get(key) == job_id:
+            del self._inflight[key]
+        if success and self._recent is not None:
+            self._recent.add(f"{key[0]}\0{key[1]}")
+
     async def get_status(self, job_id: str) -> Optional[RecrawlStatusResponse]:
-        job = self._jobs.get(job_id)
-        if not job:
+        record = await self.jobs.get(job_id)
+        return record.to_status() if record is not None else None
+
+    async def get_group_status(self, group_id: str) -> Optional[RecrawlGroupStatusResponse]:
+        """Every job created for the group in one store read; None if the group is unknown or expired."""
+        records = await self.jobs.get_group(group_id)
+        if not records:
             return None
-        return RecrawlStatusResponse(
-            job_id=job.job_id,
-            url=job.url,
-            status=job.status,
-            priority=job.priority,
-            created_at=job.created_at,
-            updated_at=job.updated_at,
-            estimated_start_time=job.estimated_start_time,
-            sla_deadline=job.sla_deadline,
-            result=job.result,
+        counts: Dict[str, int] = {}
+        for record in records:
+            counts[record.status] = counts.get(record.status, 0) + 1
+        return RecrawlGroupStatusResponse(
+            job_group_id=group_id, jobs=[record.to_job() for record in records], counts=counts
         )
 
+    async def watch_group(
+        self, group_id: str, heartbeat_seconds: Optional[float] = None
+    ) -> AsyncIterator[List[JobEvent]]:
+        """
+        Yield the group's current job states, then each batch of status changes until every job is terminal.
+        An empty batch is a heartbeat after heartbeat_seconds without changes. A watcher that falls too far
+        behind gets a fresh snapshot instead of the events it missed.
+        """
+        heartbeat = heartbeat_seconds or self.settings.recrawl_events_heartbeat_seconds
+        # Subscribe before reading the snapshot so no change can fall between the two
+        subscription = self.events.subscribe(group_id)
+        try:
+            seen: Dict[str, float] = {}
+            pending: Optional[Set[str]] = None
+            while True:
+                if pending is None or subscription.overflowed:
+                    subscription.overflowed = False
+                    records = await self.jobs.get_group(group_id)
+                    seen = {record.job_id: record.updated_at for record in records}
+                    pending = {record.job_id for record in records if record.status not in TERMINAL_STATUSES}
+                    yield [JobEvent(r.job_id, r.status, r.updated_at, r.result) for r in records]
+                if not pending:
+                    return
+                try:
+                    first = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield []
+                    continue
+                batch: List[JobEvent] = []
+                for event in [first] + [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]:
+                    # None marks an overflow; events older than the snapshot were already reflected in it
+                    if event is None or event.updated_at <= seen.get(event.job_id, 0.0):
+                        continue
+                    seen[event.job_id] = event.updated_at
+                    if event.status in TERMINAL_STATUSES:
+                        pending.discard(event.job_id)
+                    batch.append(event)
+                if batch:
+                    yield batch
+        finally:
+            self.events.unsubscribe(group_id, subscription)
+
+    async def _publish(self, updates: List[JobUpdate]) -> None:
+        if not self.events.active:
+            return
+        by_group: Dict[str, List[JobEvent]] = {}
+        for job_id, status, result, updated_at in updates:
+            group_ids = self._job_groups.get(job_id)
+            if group_ids is None:
+                # Jobs queued before a restart are not tracked in memory; only look them up while someone watches
+                record = await self.jobs.get(job_id)
+                group_ids = [record.group_id] if record is not None else []
+            for group_id in group_ids:
+                if self.events.has_subscribers(group_id):
+                    by_group.setdefault(group_id, []).append(JobEvent(job_id, status, updated_at, result))
+        for group_id, events in by_group.items():
+            self.events.publish(group_id, events)
+
     # For demonstration: update job status (would be done by workers)
     async def mark_running(self, job_id: str) -> None:
-        job = self._jobs.get(job_id)
-        if job:
-            job.status = "running"
-            job.updated_at = datetime.now(timezone.utc)
+        await self.mark_running_many([job_id])
 
     async def mark_finished(self, job_id: str, success: bool, result: Optional[dict] = None) -> None:
-        job = self._jobs.get(job_id)
-        if job:
-            job.status = "succeeded" if success else "failed"
-            job.updated_at = datetime.now(timezone.utc)
-            job.result = result
+        await self.mark_finished_many([(job_id, success, result)])
+
+    async def mark_running_many(self, job_ids: List[str]) -> None:
+        now = time.time()
+        updates: List[JobUpdate] = [(job_id, "running", None, now) for job_id in job_ids]
+        await self.jobs.update_many(updates)
+        await self._publish(updates)
+
+    async def mark_finished_many(self, outcomes: List[Tuple[str, bool, Optional[dict]]]) -> None:
+        """Apply (job_id, success, result) outcomes as one store write with a single timestamp."""
+        now = time.time()
+        updates: List[JobUpdate] = [
+            (job_id, "succeeded" if success else "failed", result, now) for job_id, success, result in outcomes
+        ]
+        await self.jobs.update_many(updates)
+        await self._publish(updates)
+        if self._callbacks and self.webhooks is not None:
+            for job_id, status, result, updated_at in updates:
+                entry = self._callbacks.pop(job_id, None)
+                if entry is None:
+                    continue
+                url, callbacks = entry
+                job = _callback_job(job_id, url, status, updated_at, result)
+                for group_id, callback_url in callbacks:
+                    self.webhooks.submit(callback_url, group_id, job)
+        for job_id, success, _ in outcomes:
+            self._release(job_id, success)
 
 
+def _callback_job(
+    job_id: str, url: str, status: str, updated_at: float, result: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "url": url,
+        "status": status,
+        "updated_at": datetime.fromtimestamp(updated_at, tz=timezone.utc).isoformat(),
+        "result": result,
+    }
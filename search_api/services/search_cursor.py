@@ -0,0 +1,58 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+from typing import List, Optional
+
+from search_api.adapters.index_adapter import Position
+from search_api.config.settings import get_settings
+
+_TAG_BYTES = 16
+
+
+class CursorError(ValueError):
+    """A cursor that does not verify for this query, or one the active backend cannot continue."""
+
+
+class CursorCodec:
+    """
+    Opaque, signed search_after cursors: base64url JSON of one Position per shard (null for a shard not yet
+    read), bound to the query it was issued for, followed by a truncated HMAC-SHA256 tag.
+    """
+
+    def __init__(self, secret: Optional[str] = None) -> None:
+        self.settings = get_settings()
+        secret = secret or self.settings.search_cursor_secret
+        self._key = secret.encode("utf-8") if secret else os.urandom(32)
+
+    def encode(self, query_key: str, positions: List[Optional[Position]]) -> str:
+        state = {"q": query_key[:16], "p": [None if p is None else [list(p[0]), p[1]] for p in positions]}
+        body = _b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8"))
+        return f"{body}.{_b64encode(self._sign(body))}"
+
+    def decode(self, cursor: str, query_key: str) -> List[Optional[Position]]:
+        """Positions of a cursor issued by encode() for the same query; CursorError("invalid_cursor") otherwise."""
+        body, _, tag = cursor.partition(".")
+        try:
+            if not hmac.compare_digest(_b64decode(tag), self._sign(body)):
+                raise CursorError("invalid_cursor")
+            state = json.loads(_b64decode(body))
+            if state["q"] != query_key[:16]:
+                raise CursorError("invalid_cursor")
+            return [
+                None if p is None else (tuple(float(value) for value in p[0]), str(p[1])) for p in state["p"]
+            ]
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            raise CursorError("invalid_cursor") from e
+
+    def _sign(self, body: str) -> bytes:
+        return hmac.new(self._key, body.encode("ascii"), hashlib.sha256).digest()[:_TAG_BYTES]
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
@@ -1,11 +1,19 @@
+import asyncio
 import hashlib
 import json
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Set
 
-from search_api.adapters.index_adapter import IndexAdapter, MockIndexAdapter
-from search_api.adapters.cache_adapter import CacheAdapter, InMemoryCacheAdapter
+from pydantic_core import to_json
+
+from search_api.adapters.index_adapter import IndexAdapter, MockIndexAdapter, Position, hit_positions
+from search_api.adapters.bounded_cache_adapter import BoundedCacheAdapter
+from search_api.adapters.cache_adapter import CacheAdapter
 from search_api.config.settings import get_settings
-from search_api.models.schemas import SearchResponse
+from search_api.models.projection import ALL_FIELDS, FieldProjection
+from search_api.models.schemas import SearchResponse, SearchResult
+from search_api.services.search_cursor import CursorCodec, CursorError
+from search_api.services.single_flight import SingleFlight
 
 
 class SearchService:
@@ -13,11 +21,22 @@ class SearchService:
         self,
         index_adapter: Optional[IndexAdapter] = None,
         cache_adapter: Optional[CacheAdapter] = None,
+        vector_adapter: Optional[IndexAdapter] = None,
+        cursor_codec: Optional[CursorCodec] = None,
     ) -> None:
         # Injected adapter allows swapping real index in production
         self.index_adapter = index_adapter or MockIndexAdapter()
         self.settings = get_settings()
-        self.cache = cache_adapter or InMemoryCacheAdapter()
+        self.cache = cache_adapter or BoundedCacheAdapter(
+            max_entries=self.settings.result_cache_max_entries, max_bytes=self.settings.result_cache_max_bytes
+        )
+        # Optional ANN leg, blended with lexical results when enable_vector_blend is on
+        self.vector_adapter = vector_adapter
+        self.cursors = cursor_codec or CursorCodec()
+        # One backend call per cache key at a time; concurrent identical searches share its result
+        self._inflight: SingleFlight[RenderedSearch] = SingleFlight()
+        # Strong refs to stale-while-revalidate refreshes so they are not garbage collected mid-flight
+        self._background: Set["asyncio.Task[RenderedSearch]"] = set()
 
     async def search(
         self,
@@ -29,38 +48,222 @@ class SearchService:
         site: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
         fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
     ) -> SearchResponse:
+        resolved = await self._resolve(query, page, size, sort, language, site, filters, fields, cursor)
+        if resolved.start is not None:
+            return _slice_window(resolved.rendered.response, resolved.page, resolved.size, resolved.next_cursor)
+        return resolved.rendered.response.model_copy(update={"next_cursor": resolved.next_cursor})
+
+    async def search_json(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str = "relevance",
+        language: Optional[str] = None,
+        site: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        cursor: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> bytes:
+        """Same response as search(), already encoded as JSON; a cache hit does no model work at all."""
+        resolved = await self._resolve(query, page, size, sort, language, site, filters, fields, cursor)
+        return resolved.rendered.to_json(
+            resolved.page, resolved.size, resolved.start or 0, resolved.stop, resolved.next_cursor, request_id
+        )
+
+    async def _resolve(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        sort: str,
+        language: Optional[str],
+        site: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        fields: Optional[List[str]],
+        cursor: Optional[str],
+    ) -> "ResolvedSearch":
         bounded_size = min(max(size, 1), self.settings.max_page_size)
         bounded_page = max(page, 1)
 
+        # Cursors are bound to the query, not to the page, size or projection
+        query_key = self._make_cache_key(
+            query=query, page=0, size=0, sort=sort, language=language, site=site, filters=filters, fields=None
+        )
+        # Blended pages end at the result window; deeper ones, and cursor pages, come from the lexical leg
+        blended = not cursor and self._blends(sort, bounded_page * bounded_size)
+        cursors = self.index_adapter.supports_search_after and not blended
+        search_after: Optional[List[Optional[Position]]] = None
+        if cursor:
+            if not cursors:
+                raise CursorError("cursor_unsupported")
+            search_after = self.cursors.decode(cursor, query_key)
+            if len(search_after) != self.index_adapter.shard_count:
+                raise CursorError("invalid_cursor")
+
+        # Result-window mode: pages inside the top-N window share one backend fetch and cache entry.
+        # A cursor page is fetched on its own: every shard resumes after its position and collects only `size` hits
+        window = self.settings.result_window_size if self.settings.enable_result_window else 0
+        in_window = search_after is None and bounded_page * bounded_size <= window
+        fetch_page, fetch_size = (1, window) if in_window else (bounded_page, bounded_size)
+
         cache_key = self._make_cache_key(
             query=query,
-            page=bounded_page,
-            size=bounded_size,
+            page=fetch_page,
+            size=fetch_size,
             sort=sort,
             language=language,
             site=site,
             filters=filters,
             fields=fields,
+            cursor=cursor,
         )
+
+        def fetch() -> Awaitable[RenderedSearch]:
+            return self._fetch(
+                cache_key=cache_key,
+                query=query,
+                page=fetch_page,
+                size=fetch_size,
+                sort=sort,
+                language=language,
+                site=site,
+                filters=filters,
+                fields=fields,
+                search_after=search_after,
+            )
+
+        rendered = await self._cached_or_fetch(cache_key, fetch)
+        start = (bounded_page - 1) * bounded_size if in_window else None
+        stop = start + bounded_size if start is not None else None
+        next_cursor = None
+        if cursors:
+            returned = len(rendered.response.results[start or 0 : stop])
+            # A full offset page can still be the last one; a full cursor page is followed by an empty one at worst
+            more = search_after is not None or bounded_page * bounded_size < rendered.response.total
+            if returned == bounded_size and more:
+                positions = rendered.cursor_positions(stop, search_after, self.index_adapter.shard_count)
+                next_cursor = self.cursors.encode(query_key, positions)
+        return ResolvedSearch(rendered, bounded_page, bounded_size, start, stop, next_cursor)
+
+    async def _cached_or_fetch(
+        self, cache_key: str, fetch: Callable[[], Awaitable["RenderedSearch"]]
+    ) -> "RenderedSearch":
         if self.settings.enable_result_cache:
-            cached = await self.cache.get(cache_key)
-            if cached:
-                return cached
+            entry = await self.cache.get_entry(cache_key)
+            if entry is not None and entry.value:
+                now = time.time()
+                beta = self.settings.result_cache_early_refresh_beta
+                if entry.is_stale(now) or entry.should_refresh_early(now, beta):
+                    self._refresh_in_background(cache_key, fetch)
+                return entry.value
+
+        return await self._inflight.do(cache_key, fetch)
 
-        response = await self.index_adapter.search(
+    def _refresh_in_background(self, cache_key: str, fetch: Callable[[], Awaitable["RenderedSearch"]]) -> None:
+        if cache_key in self._inflight:
+            return
+        task = asyncio.ensure_future(self._inflight.do(cache_key, fetch))
+        self._background.add(task)
+        task.add_done_callback(self._on_refresh_done)
+
+    def _on_refresh_done(self, task: "asyncio.Task[RenderedSearch]") -> None:
+        self._background.discard(task)
+        if not task.cancelled():
+            # A failed refresh keeps serving the stale entry until its hard TTL; nothing to propagate
+            task.exception()
+
+    async def _fetch(
+        self,
+        cache_key: str,
+        query: str,
+        page: int,
+        size: int,
+        sort: str,
+        language: Optional[str],
+        site: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        fields: Optional[List[str]],
+        search_after: Optional[Sequence[Optional[Position]]] = None,
+    ) -> "RenderedSearch":
+        started = time.monotonic()
+        if search_after is None and self._blends(sort, page * size):
+            response = await self._blended_search(
+                query=query,
+                page=page,
+                size=size,
+                language=language,
+                site=site,
+                filters=filters,
+                fields=fields,
+            )
+        else:
+            response = await self.index_adapter.search(
+                query=query,
+                page=page,
+                size=size,
+                sort=sort,
+                language=language,
+                site=site,
+                filters=filters,
+                fields=fields,
+                search_after=search_after,
+            )
+        rendered = RenderedSearch(response, FieldProjection.parse(fields))
+        # A partial response lacks the hits of shards that missed their deadline; the next request retries them
+        if self.settings.enable_result_cache and not response.partial:
+            await self.cache.set_entry(
+                cache_key,
+                rendered,
+                ttl_seconds=self.settings.result_cache_ttl_seconds,
+                stale_ttl_seconds=self.settings.result_cache_stale_ttl_seconds,
+                compute_seconds=time.monotonic() - started,
+            )
+        return rendered
+
+    def _blends(self, sort: str, depth: int) -> bool:
+        """Whether the top `depth` hits are fused with the vector leg; fusion is capped at the result window."""
+        return (
+            self.settings.enable_vector_blend
+            and self.vector_adapter is not None
+            and sort == "relevance"
+            and depth <= self.settings.result_window_size
+        )
+
+    async def _blended_search(
+        self,
+        query: str,
+        page: int,
+        size: int,
+        language: Optional[str],
+        site: Optional[str],
+        filters: Optional[Dict[str, Any]],
+        fields: Optional[List[str]],
+    ) -> SearchResponse:
+        assert self.vector_adapter is not None
+        # Both legs return their own top page*size (at most the result window); fusion happens over the union
+        kwargs = dict(
+            query=query, page=1, size=page * size, language=language, site=site, filters=filters, fields=fields
+        )
+        lexical, vector = await asyncio.gather(
+            self.index_adapter.search(sort="relevance", **kwargs),  # type: ignore[arg-type]
+            self.vector_adapter.search(sort="relevance", **kwargs),  # type: ignore[arg-type]
+        )
+        fused = reciprocal_rank_fusion(
+            [lexical.results, vector.results], k=self.settings.vector_blend_rrf_k, projection=FieldProjection.parse(fields)
+        )
+        return SearchResponse.model_construct(
             query=query,
-            page=bounded_page,
-            size=bounded_size,
-            sort=sort,
-            language=language,
-            site=site,
-            filters=filters,
-            fields=fields,
+            page=page,
+            size=size,
+            total=max(lexical.total, len(fused)),
+            results=fused[(page - 1) * size : page * size],
+            facets=lexical.facets,
+            partial=lexical.partial or vector.partial,
         )
-        if self.settings.enable_result_cache:
-            await self.cache.set(cache_key, response, ttl_seconds=self.settings.result_cache_ttl_seconds)
-        return response
 
     def _make_cache_key(
         self,
@@ -72,6 +275,7 @@ class SearchService:
         site: Optional[str],
         filters: Optional[Dict[str, Any]],
         fields: Optional[List[str]],
+        cursor: Optional[str] = None,
     ) -> str:
         payload = {
             "q": query,
@@ -81,9 +285,128 @@ class SearchService:
             "l": language,
             "site": site,
             "f": filters or {},
-            "fields": fields or [],
+            "fields": FieldProjection.parse(fields).cache_key(),
         }
+        if cursor:
+            payload["c"] = cursor
         raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
+class ResolvedSearch(NamedTuple):
+    rendered: "RenderedSearch"
+    page: int
+    size: int
+    # Offsets of the page within a cached result window; start is None when the response is the page itself
+    start: Optional[int]
+    stop: Optional[int]
+    next_cursor: Optional[str]
+
+
+class RenderedSearch:
+    """
+    A backend SearchResponse as cached, plus its JSON encoding.
+    Results are encoded one by one on first use, so every page of a result window is a byte join of the same
+    fragments; only the envelope (page, size, next_cursor, request_id) is written per request. Results carry only
+    the keys (and metadata sub-keys) of the projection. The cache weighs an entry by its encoded length.
+    """
+
+    __slots__ = ("response", "projection", "_results", "_tail")
+
+    def __init__(self, response: SearchResponse, projection: FieldProjection) -> None:
+        self.response = response
+        self.projection = projection
+        self._results: Optional[List[bytes]] = None
+        self._tail = b""
+
+    def cursor_positions(
+        self, stop: Optional[int], after: Optional[Sequence[Optional[Position]]], shard_count: int
+    ) -> List[Optional[Position]]:
+        """
+        search_after positions for the hits after results[:stop]: each shard's last hit served so far.
+        A shard that contributed none keeps the position the page was read after, or None (its first hit) on a
+        first page, so the hits of a shard that missed the deadline are still served on a later page.
+        Adapters that do not record shards have one.
+        """
+        recorded = self.response._positions
+        shards = [shard for shard, _ in recorded] if recorded is not None else [0] * len(self.response.results)
+        positions: List[Optional[Position]] = list(after) if after else [None] * shard_count
+        for shard, position in zip(shards, hit_positions(self.response)[:stop]):
+            positions[shard] = position
+        return positions
+
+    def to_json(
+        self,
+        page: int,
+        size: int,
+        start: int,
+        stop: Optional[int],
+        next_cursor: Optional[str],
+        request_id: Optional[str],
+    ) -> bytes:
+        response = self.response
+        # Field order matches SearchResponse, so the bytes equal response.model_dump_json() up to projection
+        return b'{"query":%b,"page":%d,"size":%d,"total":%d,"results":[%b%b%b,"request_id":%b}' % (
+            to_json(response.query),
+            page,
+            size,
+            response.total,
+            b",".join(self._encoded()[start:stop]),
+            self._tail,
+            to_json(next_cursor),
+            to_json(request_id),
+        )
+
+    def approx_bytes(self) -> int:
+        """Encoded size of the whole response; the models it was encoded from are counted at the same weight."""
+        return 2 * (sum(len(result) for result in self._encoded()) + len(self._tail))
+
+    def _encoded(self) -> List[bytes]:
+        if self._results is None:
+            response = self.response
+            # pydantic_core.to_json goes through each model's serializer without validating it again
+            include = self.projection.include
+            self._results = [to_json(result, include=include) for result in response.results]
+            self._tail = b'],"facets":%b,"partial":%b,"next_cursor":' % (
+                to_json(response.facets),
+                b"true" if response.partial else b"false",
+            )
+        return self._results
+
+
+def _slice_window(window: SearchResponse, page: int, size: int, next_cursor: Optional[str]) -> SearchResponse:
+    start = (page - 1) * size
+    return window.model_copy(
+        update={
+            "page": page,
+            "size": size,
+            "results": window.results[start : start + size],
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[SearchResult]], k: int = 60, projection: FieldProjection = ALL_FIELDS
+) -> List[SearchResult]:
+    """
+    Fuse ranked lists by sum(1 / (k + rank)); rank_features from every list are kept on the fused hit.
+    The fused metadata goes through `projection`, so a response that left metadata out does not regain it.
+    """
+    fused: Dict[str, float] = {}
+    hits: Dict[str, SearchResult] = {}
+    features: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            fused[hit.doc_id] = fused.get(hit.doc_id, 0.0) + 1.0 / (k + rank)
+            hits.setdefault(hit.doc_id, hit)
+            features.setdefault(hit.doc_id, {}).update((hit.metadata or {}).get("rank_features", {}))
+    out: List[SearchResult] = []
+    for doc_id in sorted(fused, key=lambda d: fused[d], reverse=True):
+        hit = hits[doc_id]
+        metadata = None
+        if "metadata" in projection:
+            rank_features = {**features[doc_id], "rrf": round(fused[doc_id], 6)}
+            metadata = projection.metadata({**(hit.metadata or {}), "rank_features": rank_features})
+        out.append(hit.model_copy(update={"score": round(fused[doc_id], 6), "metadata": metadata}))
+    return out
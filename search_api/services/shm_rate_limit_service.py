@@ -0,0 +1,110 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from threading import Lock
+from typing import List, Optional, Tuple
+
+from search_api.config.settings import get_settings
+from search_api.services.rate_limit_service import RateLimitDecision
+
+_MAGIC = b"RLSHM001"
+_HEADER = struct.Struct("<8sII")  # magic, n_groups, slots_per_group
+_HEADER_SIZE = 64
+# key_hash u64 (0 = empty), tokens f64, last_refill f64 (CLOCK_MONOTONIC, host-wide), limit u32
+_SLOT = struct.Struct("<QddI4x")
+_SLOTS_PER_GROUP = 8
+_GROUP_SIZE = _SLOT.size * _SLOTS_PER_GROUP
+_LOCAL_STRIPES = 64
+
+
+class SharedMemoryRateLimitService:
+    """
+    Token-bucket limiter whose buckets live in a fixed-size mmap'd table shared by every worker on the host.
+    The table is set-associative: a principal hashes to one group of 8 slots, and the group is updated under
+    an fcntl byte-range lock (cross-process) plus a striped threading.Lock (fcntl locks are per process).
+    A new principal takes an empty slot, else a bucket that has refilled to capacity (idle, so dropping it
+    changes nothing), else the least recently refilled one; memory therefore stays fixed however many keys arrive.
+    A principal that displaces a bucket still in use starts drained, so churning keys through a group cannot hand
+    a throttled principal a fresh bucket: when it comes back it is displaced-and-drained too.
+    """
+
+    def __init__(self, path: Optional[str] = None, slots: Optional[int] = None) -> None:
+        self.settings = get_settings()
+        self.path = path or self.settings.rate_limit_shm_path
+        n_groups = 1
+        while n_groups * _SLOTS_PER_GROUP < (slots or self.settings.rate_limit_shm_slots):
+            n_groups <<= 1
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._n_groups = self._init_table(n_groups)
+        self._mm = mmap.mmap(self._fd, _HEADER_SIZE + self._n_groups * _GROUP_SIZE)
+        self._local_locks: List[Lock] = [Lock() for _ in range(_LOCAL_STRIPES)]
+
+    def check(self, key: str, limit_per_minute: Optional[int] = None) -> RateLimitDecision:
+        limit = limit_per_minute or self.settings.rate_limit_per_minute
+        refill = limit / 60.0
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") | 1
+        group = key_hash & (self._n_groups - 1)
+        base = _HEADER_SIZE + group * _GROUP_SIZE
+        with self._local_locks[group % _LOCAL_STRIPES]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _GROUP_SIZE, base, os.SEEK_SET)
+            try:
+                now = time.monotonic()
+                offset, displaces_busy = self._find_slot(base, key_hash, now)
+                stored_hash, tokens, last, stored_limit = _SLOT.unpack_from(self._mm, offset)
+                if stored_hash != key_hash:
+                    tokens, last = (0.0 if displaces_busy else float(limit)), now
+                elif stored_limit != limit:
+                    tokens, last = float(limit), now
+                tokens = min(float(limit), tokens + max(0.0, now - last) * refill)
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                _SLOT.pack_into(self._mm, offset, key_hash, tokens, now, limit)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _GROUP_SIZE, base, os.SEEK_SET)
+        remaining = max(0, int(tokens))
+        reset_seconds = 0 if tokens >= 1 else int((1 - tokens) / refill) + 1
+        return RateLimitDecision(allowed=allowed, limit=limit, remaining=remaining, reset_seconds=reset_seconds)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def _find_slot(self, base: int, key_hash: int, now: float) -> Tuple[int, bool]:
+        """(slot offset, whether taking it drops a bucket that has not refilled to capacity)."""
+        empty = idle = oldest = -1
+        oldest_last = float("inf")
+        for i in range(_SLOTS_PER_GROUP):
+            offset = base + i * _SLOT.size
+            stored_hash, tokens, last, limit = _SLOT.unpack_from(self._mm, offset)
+            if stored_hash == key_hash:
+                return offset, False
+            if stored_hash == 0:
+                if empty < 0:
+                    empty = offset
+                continue
+            if idle < 0 and tokens + (now - last) * limit / 60.0 >= limit:
+                idle = offset
+            if last < oldest_last:
+                oldest, oldest_last = offset, last
+        for candidate in (empty, idle):
+            if candidate >= 0:
+                return candidate, False
+        return oldest, True
+
+    def _init_table(self, n_groups: int) -> int:
+        # The first process to lock the header initialises the table; later ones adopt its geometry
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER_SIZE, 0, os.SEEK_SET)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size and header[:8] == _MAGIC:
+                _, existing_groups, _ = _HEADER.unpack(header)
+                return existing_groups
+            os.ftruncate(self._fd, _HEADER_SIZE + n_groups * _GROUP_SIZE)
+            os.pwrite(self._fd, _HEADER.pack(_MAGIC, n_groups, _SLOTS_PER_GROUP), 0)
+            return n_groups
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER_SIZE, 0, os.SEEK_SET)
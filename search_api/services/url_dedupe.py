@@ -0,0 +1,108 @@
+import hashlib
+import math
+import posixpath
+import re
+import time
+from typing import List, Optional
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid"}
+_PERCENT_RE = re.compile(r"%[0-9a-fA-F]{2}")
+# RFC 3986 characters that may stay literal in a path; everything else is percent-encoded
+_PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form used to detect duplicate submissions: lower-cased scheme and host (IDNA), default port
+    and fragment dropped, dot segments resolved, percent-encoding normalised, tracking parameters removed
+    and the remaining query parameters sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        host = host.lower()
+    netloc = f"[{host}]" if ":" in host else host
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    path = quote(_PERCENT_RE.sub(_normalize_escape, parts.path), safe=_PATH_SAFE + "%") or "/"
+    if path != "/":
+        trailing = path.endswith("/")
+        path = "/" + posixpath.normpath(path).lstrip("/")
+        if trailing and path != "/":
+            path += "/"
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ""))
+
+
+def _normalize_escape(match: "re.Match[str]") -> str:
+    # %7E -> ~ for unreserved characters; other escapes (e.g. %2F) stay encoded, with upper-case hex
+    char = unquote(match.group(0))
+    return char if (char.isascii() and char.isalnum()) or char in "-._~" else match.group(0).upper()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate`; k indexes by double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._bits = bytearray((bits + 7) // 8)
+        self._size = len(self._bits) * 8
+        self._hashes = max(1, round(bits / capacity * math.log(2)))
+        self.count = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self._size for i in range(self._hashes)]
+
+    def add(self, key: str) -> None:
+        for i in self._indexes(key):
+            self._bits[i >> 3] |= 1 << (i & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in self._indexes(key))
+
+
+class RotatingBloomFilter:
+    """
+    Membership over a sliding time window using two Bloom generations.
+    Items go into the current generation; every window_seconds it becomes the previous one and the old
+    previous is dropped, so an item is remembered for between one and two windows.
+    """
+
+    def __init__(self, window_seconds: float, capacity: int, error_rate: float = 0.01) -> None:
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._rotated_at = time.monotonic()
+
+    def add(self, key: str) -> None:
+        self._maybe_rotate()
+        self._current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_rotate()
+        return key in self._current or (self._previous is not None and key in self._previous)
+
+    def _maybe_rotate(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._rotated_at
+        # A full generation also rotates early, so the false-positive rate stays near error_rate
+        if elapsed < self.window_seconds and self._current.count < self.capacity:
+            return
+        self._previous = self._current if elapsed < 2 * self.window_seconds else None
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = now
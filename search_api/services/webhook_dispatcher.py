@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import heapq
+import hmac
+import itertools
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from search_api.config.settings import get_settings
+from search_api.services.egress_guard import DestinationNotAllowed, GuardedTransport
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    delivery_id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    attempts INTEGER NOT NULL,
+    due_at REAL NOT NULL
+);
+"""
+_COLUMNS = "delivery_id, url, payload, attempts, due_at"
+
+
+@dataclass
+class Delivery:
+    delivery_id: str
+    url: str
+    # Serialised once; every attempt sends the same bytes
+    payload: bytes
+    attempts: int = 0
+    due_at: float = 0.0
+    # A row for it exists in the backlog
+    persisted: bool = False
+
+
+@dataclass
+class WebhookStats:
+    delivered: int = 0
+    retried: int = 0
+    dropped: int = 0
+
+
+class _Batch:
+    __slots__ = ("jobs", "flush_at")
+
+    def __init__(self, flush_at: float) -> None:
+        self.jobs: List[Dict[str, Any]] = []
+        self.flush_at = flush_at
+
+
+class WebhookDispatcher:
+    """
+    Delivers recrawl job completions to callback URLs, at least once.
+    Completions are coalesced per (callback URL, job group) for up to batch_wait_seconds or batch_max_jobs jobs
+    and POSTed as one JSON payload through a shared keep-alive client, max_concurrency requests at a time.
+    Network errors, 429 and 5xx answers are retried with full-jitter exponential backoff (Retry-After is honoured)
+    up to max_attempts. With backlog_path set, deliveries awaiting a retry, and those unsent at close(), are kept in
+    SQLite and resumed by load(); receivers can drop repeats by the X-Webhook-Id header.
+    Callback hosts resolving to loopback, private or link-local addresses are refused at connect time.
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: Optional[int] = None,
+        batch_max_jobs: Optional[int] = None,
+        batch_wait_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        backoff_base_seconds: Optional[float] = None,
+        backoff_max_seconds: Optional[float] = None,
+        backlog_path: Optional[str] = None,
+        signing_secret: Optional[str] = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.max_concurrency = max_concurrency or self.settings.webhook_max_concurrency
+        self.client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(self.settings.webhook_timeout_seconds),
+            transport=GuardedTransport(
+                httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            ),
+            headers={"User-Agent": self.settings.fetch_user_agent},
+        )
+        self.batch_max_jobs = batch_max_jobs or self.settings.webhook_batch_max_jobs
+        self.batch_wait_seconds = (
+            batch_wait_seconds if batch_wait_seconds is not None else self.settings.webhook_batch_wait_seconds
+        )
+        self.max_attempts = max_attempts or self.settings.webhook_max_attempts
+        self.backoff_base_seconds = (
+            backoff_base_seconds if backoff_base_seconds is not None else self.settings.webhook_backoff_base_seconds
+        )
+        self.backoff_max_seconds = backoff_max_seconds or self.settings.webhook_backoff_max_seconds
+        self.signing_secret = signing_secret or self.settings.webhook_signing_secret
+        self.stats = WebhookStats()
+        self._batches: Dict[Tuple[str, str], _Batch] = {}
+        # (flush_at, seq, key) and (due_at, seq, delivery) heaps; the run loop sleeps until the earlier head
+        self._flushes: List[Tuple[float, int, Tuple[str, str]]] = []
+        self._retries: List[Tuple[float, int, Delivery]] = []
+        self._seq = itertools.count()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._sending: Dict[str, Delivery] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self._wakeup = asyncio.Event()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if backlog_path:
+            directory = os.path.dirname(backlog_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(backlog_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+
+    @property
+    def backlog_size(self) -> int:
+        return len(self._retries)
+
+    def submit(self, url: str, group_id: str, job: Dict[str, Any]) -> None:
+        """Queue one finished job for the group's callback URL."""
+        key = (url, group_id)
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(time.time() + self.batch_wait_seconds)
+            heapq.heappush(self._flushes, (batch.flush_at, next(self._seq), key))
+            self._wakeup.set()
+        batch.jobs.append(job)
+        if len(batch.jobs) >= self.batch_max_jobs:
+            del self._batches[key]
+            self._start(self._delivery(url, group_id, batch.jobs))
+
+    async def load(self) -> None:
+        """Resume deliveries left in the backlog by a previous process."""
+        if self._db is None:
+            return
+        rows = await asyncio.to_thread(self._query, f"SELECT {_COLUMNS} FROM deliveries")
+        for row in rows:
+            delivery = Delivery(row[0], row[1], bytes(row[2]), row[3], row[4], persisted=True)
+            heapq.heappush(self._retries, (delivery.due_at, next(self._seq), delivery))
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            now = time.time()
+            while self._flushes and self._flushes[0][0] <= now:
+                flush_at, _, key = heapq.heappop(self._flushes)
+                batch = self._batches.get(key)
+                # A batch already sent for size leaves a stale heap entry behind
+                if batch is not None and batch.flush_at == flush_at:
+                    del self._batches[key]
+                    self._start(self._delivery(key[0], key[1], batch.jobs))
+            while self._retries and self._retries[0][0] <= now:
+                self._start(heapq.heappop(self._retries)[2])
+            wakeups = [heap[0][0] for heap in (self._flushes, self._retries) if heap]
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(wakeups) - now if wakeups else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self) -> None:
+        # Batches not yet sent and sends cut short are kept for the next process (already due, so resent right
+        # after load()); a cut-short send may repeat
+        unsent = [self._delivery(url, group_id, batch.jobs) for (url, group_id), batch in self._batches.items()]
+        self._batches.clear()
+        unsent.extend(self._sending.values())
+        unsent.extend(delivery for _, _, delivery in self._retries if not delivery.persisted)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._db is not None:
+            await asyncio.to_thread(self._save, unsent)
+            self._db.close()
+            self._db = None
+        elif unsent:
+            logger.warning("dropping %d undelivered webhook payloads on shutdown", len(unsent))
+        await self.client.aclose()
+
+    # ---- internals ----
+    def _delivery(self, url: str, group_id: str, jobs: List[Dict[str, Any]]) -> Delivery:
+        delivery_id = str(uuid.uuid4())
+        payload = json.dumps({"delivery_id": delivery_id, "job_group_id": group_id, "jobs": jobs}).encode("utf-8")
+        return Delivery(delivery_id, url, payload)
+
+    def _start(self, delivery: Delivery) -> None:
+        self._sending[delivery.delivery_id] = delivery
+        task = asyncio.ensure_future(self._send(delivery))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, delivery: Delivery) -> None:
+        headers = {"Content-Type": "application/json", "X-Webhook-Id": delivery.delivery_id}
+        if self.signing_secret:
+            digest = hmac.new(self.signing_secret.encode("utf-8"), delivery.payload, hashlib.sha256).hexdigest()
+            headers["X-Webhook-Signature"] = f"sha256={digest}"
+        status: Optional[int] = None
+        retry_after = 0.0
+        refused = False
+        async with self._semaphore:
+            delivery.attempts += 1
+            headers["X-Webhook-Attempt"] = str(delivery.attempts)
+            try:
+                response = await self.client.post(delivery.url, content=delivery.payload, headers=headers)
+                status = response.status_code
+                retry_after = _retry_after(response.headers.get("retry-after"))
+            except httpx.HTTPError as exc:
+                logger.debug("webhook delivery %s failed: %r", delivery.delivery_id, exc)
+            except DestinationNotAllowed as exc:
+                refused = True
+                logger.warning("dropping webhook delivery %s: %s", delivery.delivery_id, exc)
+            finally:
+                self._sending.pop(delivery.delivery_id, None)
+        if status is not None and 200 <= status < 300:
+            self.stats.delivered += 1
+            await self._forget(delivery)
+            return
+        if refused:
+            # Never retried: the callback host points somewhere we must not send to
+            self.stats.dropped += 1
+            await self._forget(delivery)
+            return
+        if (status is None or status == 429 or status >= 500) and delivery.attempts < self.max_attempts:
+            backoff = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (delivery.attempts - 1))
+            delivery.due_at = time.time() + max(random.uniform(0, backoff), min(retry_after, self.backoff_max_seconds))
+            # Scheduled before it is saved, so close() still finds it if this task is cancelled mid-save
+            heapq.heappush(self._retries, (delivery.due_at, next(self._seq), delivery))
+            self._wakeup.set()
+            self.stats.retried += 1
+            if self._db is not None:
+                await asyncio.to_thread(self._save, [delivery])
+            return
+        self.stats.dropped += 1
+        logger.warning(
+            "dropping webhook delivery %s to %s after %d attempts (status %s)",
+            delivery.delivery_id,
+            delivery.url,
+            delivery.attempts,
+            status,
+        )
+        await self._forget(delivery)
+
+    async def _forget(self, delivery: Delivery) -> None:
+        if delivery.persisted and self._db is not None:
+            await asyncio.to_thread(
+                self._execute, "DELETE FROM deliveries WHERE delivery_id = ?", (delivery.delivery_id,)
+            )
+
+    def _save(self, deliveries: List[Delivery]) -> None:
+        assert self._db is not None
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO deliveries ({_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                [(d.delivery_id, d.url, d.payload, d.attempts, d.due_at) for d in deliveries],
+            )
+        for delivery in deliveries:
+            delivery.persisted = True
+
+    def _execute(self, sql: str, params: Tuple[Any, ...]) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(sql, params)
+
+    def _query(self, sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        assert self._db is not None
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+
+def _retry_after(value: Optional[str]) -> float:
+    # Only the delta-seconds form; an HTTP-date falls back to the computed backoff
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        return 0.0
@@ -1,41 +1,198 @@
 import asyncio
+import logging
+import re
 from datetime import datetime, timezone
-from typing import Optional
+from html import unescape
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
+from search_api.adapters.fetch_adapter import HttpFetcher
+from search_api.adapters.inverted_index_adapter import IndexedDocument
 from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter, Priority
+from search_api.config.settings import get_settings
+from search_api.services.fingerprint_service import ContentChange, FingerprintService
+from search_api.services.indexing_service import Indexer, IndexingService, doc_id_for_url
 from search_api.services.recrawl_service import RecrawlService
+from search_api.services.url_dedupe import canonicalize_url
 
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_SCRIPT_RE = re.compile(r"<(script|style)[^>]*>.*?</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
 
-async def recrawl_worker(queue: InMemoryPriorityQueueAdapter, service: RecrawlService, capacity: int = 100) -> None:
+logger = logging.getLogger(__name__)
+
+
+async def recrawl_worker(
+    queue: InMemoryPriorityQueueAdapter,
+    service: RecrawlService,
+    capacity: int = 100,
+    indexer: Optional[Indexer] = None,
+    batch_size: Optional[int] = None,
+    batch_wait_seconds: Optional[float] = None,
+    fetcher: Optional[HttpFetcher] = None,
+    fingerprints: Optional[FingerprintService] = None,
+) -> None:
     """
     A representative async worker consuming recrawl jobs and marking them complete.
-    In production, this would fetch, parse, dedupe, and trigger index updates.
+    With a fetcher, pages are fetched (conditionally, with per-host politeness), reduced to title/text and
+    indexed; without one the fetch is simulated and the indexed copy is left alone. With fingerprints, pages whose bytes are unchanged skip parsing
+    and pages whose text is a near-duplicate skip indexing; job results record which case applied.
+    When an indexer is given, recrawled documents are buffered into it and become searchable on its next refresh.
+    Jobs are pulled in batches sized to the free capacity, grouped by host and processed one task per host group;
+    status updates and acks are applied per batch/group rather than per job.
+    When the worker stops (queue closed or task cancelled), group tasks still running are cancelled and awaited;
+    their jobs are not acked, so a durable queue redelivers them.
     """
-    semaphore = asyncio.Semaphore(capacity)
-    async for job_id, url, priority in queue.consume():
-        await semaphore.acquire()
-        asyncio.create_task(_process_job(semaphore, service, job_id, url, priority))
+    settings = get_settings()
+    batch_size = batch_size or settings.recrawl_worker_batch_size
+    batch_wait_seconds = batch_wait_seconds or settings.recrawl_worker_batch_wait_seconds
+    in_flight = 0
+    slot_freed = asyncio.Event()
+
+    def release(count: int) -> Callable[["asyncio.Task[None]"], None]:
+        def done(_: "asyncio.Task[None]") -> None:
+            nonlocal in_flight
+            in_flight -= count
+            slot_freed.set()
+
+        return done
+
+    tasks: Set["asyncio.Task[None]"] = set()
+    try:
+        while not queue.closed:
+            room = capacity - in_flight
+            if room <= 0:
+                slot_freed.clear()
+                await slot_freed.wait()
+                continue
+            batch = await queue.consume_batch(max_items=min(batch_size, room), max_wait=batch_wait_seconds)
+            if not batch:
+                continue
+            in_flight += len(batch)
+            await service.mark_running_many([job_id for job_id, _, _ in batch])
+            for jobs in _group_by_host(batch).values():
+                task = asyncio.create_task(_process_group(service, queue, jobs, indexer, fetcher, fingerprints))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(release(len(jobs)))
+                task.add_done_callback(_log_failure)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _log_failure(task: "asyncio.Task[None]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("recrawl group task failed", exc_info=task.exception())
+
 
+def _group_by_host(batch: List[Tuple[str, str, Priority]]) -> Dict[str, List[Tuple[str, str, Priority]]]:
+    groups: Dict[str, List[Tuple[str, str, Priority]]] = {}
+    for job in batch:
+        groups.setdefault(urlsplit(job[1]).hostname or "", []).append(job)
+    return groups
 
-async def _process_job(
-    semaphore: asyncio.Semaphore, service: RecrawlService, job_id: str, url: str, priority: Priority
+
+async def _process_group(
+    service: RecrawlService,
+    queue: InMemoryPriorityQueueAdapter,
+    jobs: List[Tuple[str, str, Priority]],
+    indexer: Optional[Indexer] = None,
+    fetcher: Optional[HttpFetcher] = None,
+    fingerprints: Optional[FingerprintService] = None,
 ) -> None:
+    results = await asyncio.gather(
+        *(_crawl(url, indexer, fetcher, fingerprints) for _, url, _ in jobs), return_exceptions=True
+    )
+    outcomes: List[Tuple[str, bool, Optional[dict]]] = []
+    for (job_id, _, _), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            outcomes.append((job_id, False, {"error": repr(result)}))
+        else:
+            outcomes.append((job_id, True, result))
     try:
-        await service.mark_running(job_id)
+        await service.mark_finished_many(outcomes)
+    except Exception:
+        logger.exception("failed to record results of %d recrawl jobs", len(outcomes))
+    finally:
+        # The crawl is done either way; durable queues would otherwise redeliver a job whose lease lapses
+        await queue.ack_many([job_id for job_id, _, _ in jobs])
+
+
+async def _crawl(
+    url: str,
+    indexer: Optional[Indexer] = None,
+    fetcher: Optional[HttpFetcher] = None,
+    fingerprints: Optional[FingerprintService] = None,
+) -> dict:
+    title = body = ""
+    change: Optional[ContentChange] = None
+    distance: Optional[int] = None
+    if fetcher is None:
         # Simulate network + processing time; SLA-aware prioritization can modulate this
         await asyncio.sleep(0.1)
-        # Mark success and attach a simple result payload
-        await service.mark_finished(
-            job_id, success=True, result={"last_crawled_at": datetime.now(timezone.utc).isoformat()}
+        fetched = None
+    else:
+        fetched = await fetcher.fetch(url)
+        if not fetched.ok:
+            raise RuntimeError(f"fetch failed with HTTP {fetched.status_code}")
+        if fetched.not_modified:
+            change = "unchanged"
+        elif fingerprints is None:
+            title, body = _extract_text(fetched.body)
+        else:
+            identical, digest = fingerprints.check_bytes(url, fetched.body)
+            if identical:
+                change = "unchanged"
+            else:
+                # Only bytes that differ from the last fetch are parsed
+                title, body = _extract_text(fetched.body)
+                change, distance = fingerprints.check_text(url, digest, f"{title} {body}")
+    crawled_at = datetime.now(timezone.utc)
+    result = {"last_crawled_at": crawled_at.isoformat()}
+    if fetched is not None:
+        result.update(status_code=fetched.status_code, not_modified=fetched.not_modified, truncated=fetched.truncated)
+    if change is not None:
+        result["content"] = change
+    if distance is not None:
+        result["simhash_distance"] = distance
+    # Simulated fetches have no content; they, unchanged and near-duplicate pages leave the indexed copy as it is
+    if indexer is not None and fetched is not None and change not in ("unchanged", "near_duplicate"):
+        # Keyed like recrawl dedupe, so variants of one URL replace a single indexed document
+        doc_id = doc_id_for_url(canonicalize_url(url))
+        indexer.index_document(
+            IndexedDocument(doc_id=doc_id, url=url, title=title, body=body, last_crawled_at=crawled_at)
         )
-    finally:
-        semaphore.release()
+        result["doc_id"] = doc_id
+    return result
+
+
+def _extract_text(html: bytes) -> Tuple[str, str]:
+    text = html.decode("utf-8", errors="replace")
+    match = _TITLE_RE.search(text)
+    title = unescape(match.group(1)).strip() if match else ""
+    body = unescape(_TAG_RE.sub(" ", _SCRIPT_RE.sub(" ", text)))
+    return title, " ".join(body.split())
 
 
 async def main() -> None:
     queue = InMemoryPriorityQueueAdapter()
     service = RecrawlService(queue_adapter=queue)
-    await recrawl_worker(queue, service, capacity=100)
+    indexer = IndexingService()
+    indexer.load()
+    indexer_task = asyncio.create_task(indexer.run())
+    fetcher = HttpFetcher() if get_settings().fetch_enabled else None
+    try:
+        await recrawl_worker(
+            queue, service, capacity=100, indexer=indexer, fetcher=fetcher, fingerprints=FingerprintService()
+        )
+    finally:
+        indexer.stop()
+        await indexer_task
+        indexer.close()
+        if fetcher is not None:
+            await fetcher.close()
 
 
 if __name__ == "__main__":
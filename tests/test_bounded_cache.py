@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from search_api.adapters.bounded_cache_adapter import BoundedCacheAdapter, approx_size
+from search_api.services.search_service import SearchService
+
+
+@pytest.mark.anyio
+async def test_bounded_by_entries_and_counts_hits():
+    cache = BoundedCacheAdapter(max_entries=50, stripes=1)
+    for i in range(500):
+        await cache.set(f"k{i}", i, ttl_seconds=60)
+    stats = cache.stats()
+    assert stats.entries <= 50
+    assert stats.evictions + stats.rejections >= 450
+    await cache.get("k499")
+    await cache.get("never-set")
+    stats = cache.stats()
+    assert stats.misses >= 1 and stats.hits + stats.misses == 2
+
+
+@pytest.mark.anyio
+async def test_frequent_keys_survive_one_hit_wonders():
+    cache = BoundedCacheAdapter(max_entries=100, stripes=1)
+    for i in range(20):
+        await cache.set(f"hot{i}", i, ttl_seconds=60)
+    for _ in range(5):
+        for i in range(20):
+            await cache.get(f"hot{i}")
+    for i in range(2000):
+        await cache.set(f"scan{i}", i, ttl_seconds=60)
+    hot_hits = sum([await cache.get(f"hot{i}") is not None for i in range(20)])
+    assert hot_hits >= 18
+
+
+@pytest.mark.anyio
+async def test_byte_budget_and_proactive_expiry():
+    cache = BoundedCacheAdapter(max_entries=1000, max_bytes=1000, stripes=1, tick_seconds=0.01)
+    for i in range(20):
+        await cache.set(f"b{i}", b"x" * 100, ttl_seconds=60)
+    assert cache.stats().bytes <= 1000
+    await cache.set("short", b"y", ttl_seconds=0)
+    time.sleep(0.03)
+    cache.expire()
+    assert cache.stats().expirations >= 1
+
+
+@pytest.mark.anyio
+async def test_cached_search_responses_are_weighed_by_size():
+    cache = BoundedCacheAdapter(max_entries=1000, max_bytes=500_000, stripes=1)
+    svc = SearchService(cache_adapter=cache)
+    for i in range(20):
+        await svc.search(query=f"large {i}", page=1, size=10)
+    stats = cache.stats()
+    # Each entry holds a 100-hit result window, far more than the shallow size of its object
+    assert stats.entries < 20
+    assert stats.evictions + stats.rejections > 0
+    assert stats.bytes <= 500_000
+    assert approx_size({"results": ["x" * 1000]}) > 1000
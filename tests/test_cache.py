@@ -1,8 +1,10 @@
+import asyncio
+
 import pytest
 
 from search_api.services.search_service import SearchService
 from search_api.adapters.index_adapter import IndexAdapter
-from search_api.adapters.cache_adapter import InMemoryCacheAdapter
+from search_api.adapters.cache_adapter import CacheEntry, InMemoryCacheAdapter
 from search_api.models.schemas import SearchResponse
 
 
@@ -28,3 +30,35 @@ async def test_search_cache_hits():
     assert r1.total == r2.total
 
 
+@pytest.mark.anyio
+async def test_stale_entry_served_then_refreshed_in_background():
+    idx = CountingIndex()
+    cache = InMemoryCacheAdapter()
+    svc = SearchService(index_adapter=idx, cache_adapter=cache)
+    svc.settings = svc.settings.model_copy(update={"result_cache_ttl_seconds": 0, "result_cache_stale_ttl_seconds": 60})
+    first = await svc.search(query="swr", page=1, size=5)
+    second = await svc.search(query="swr", page=1, size=5)
+    assert second.results == first.results  # stale hit is returned immediately
+    await asyncio.gather(*svc._background)
+    assert idx.calls == 2  # exactly one background refresh
+    third = await svc.search(query="swr", page=1, size=5)
+    assert third.results != first.results
+
+
+def test_xfetch_refreshes_early_only_near_expiry():
+    entry = CacheEntry(value=1, fresh_until=100.0, expires_at=200.0, compute_seconds=1.0)
+    assert not entry.should_refresh_early(now=50.0, beta=1.0)
+    assert not entry.should_refresh_early(now=99.99, beta=0.0)
+    assert any(entry.should_refresh_early(now=99.5, beta=1.0) for _ in range(200))
+
+
+@pytest.mark.anyio
+async def test_pages_inside_result_window_share_one_fetch():
+    idx = CountingIndex()
+    svc = SearchService(index_adapter=idx, cache_adapter=InMemoryCacheAdapter())
+    pages = [await svc.search(query="paginate", page=p, size=10) for p in (1, 2, 3)]
+    assert idx.calls == 1
+    assert [r.doc_id for r in pages[1].results] == [f"doc-{i}" for i in range(10, 20)]
+    assert pages[2].page == 3 and pages[2].size == 10
+    await svc.search(query="paginate", page=20, size=10)  # beyond the window: direct fetch
+    assert idx.calls == 2
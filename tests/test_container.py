@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from search_api.adapters.inverted_index_adapter import IndexedDocument
+from search_api.adapters.sharded_index_adapter import ShardedIndexAdapter
+from search_api.config.settings import get_settings
+from search_api.dependencies.container import ServiceContainer
+
+
+@pytest.mark.anyio
+async def test_startup_warms_cache_and_becomes_ready():
+    settings = get_settings().model_copy(update={"warmup_queries": ["popular"], "index_backend": "inverted"})
+    container = ServiceContainer(settings=settings)
+    assert not container.ready
+    await container.start()
+    try:
+        assert container.ready
+        assert container.cache.stats().entries == 1
+        assert container.indexer is not None
+        assert container.search_service.vector_adapter is container.vector_adapter is not None
+    finally:
+        await container.stop()
+    assert not container.ready
+
+
+@pytest.mark.anyio
+async def test_index_shards_builds_sharded_index():
+    settings = get_settings().model_copy(update={"index_backend": "inverted", "index_shards": 3})
+    container = ServiceContainer(settings=settings)
+    assert isinstance(container.index_adapter, ShardedIndexAdapter)
+    await container.start()
+    try:
+        for i in range(6):
+            container.indexer.index_document(
+                IndexedDocument(doc_id=f"d{i}", url=f"https://example.com/{i}", body="sharded words")
+            )
+        for shard in container.indexer.shards:
+            shard.refresh()
+        resp = await container.search_service.search(query="sharded", page=1, size=10)
+        assert sorted(r.doc_id for r in resp.results) == [f"d{i}" for i in range(6)]
+    finally:
+        await container.stop()
+
+
+@pytest.mark.anyio
+async def test_stop_drains_recrawl_groups_before_closing_backends(monkeypatch):
+    settings = get_settings().model_copy(update={"run_recrawl_worker": True, "fetch_enabled": False})
+    container = ServiceContainer(settings=settings)
+    started = asyncio.Event()
+    events = []
+
+    async def hang(url, *args):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        finally:
+            events.append("crawl cancelled")
+
+    async def close_job_store():
+        events.append("job store closed")
+
+    close_queue = container.queue.close
+    monkeypatch.setattr("search_api.tasks.worker._crawl", hang)
+    monkeypatch.setattr(container.queue, "close", lambda: events.append("queue closed") or close_queue())
+    monkeypatch.setattr(container.job_store, "close", close_job_store)
+    await container.start()
+    try:
+        await container.recrawl_service.enqueue_recrawl(
+            ["https://example.com/a"], priority="normal", reason=None, callback_url=None
+        )
+        await asyncio.wait_for(started.wait(), 1)
+    finally:
+        await container.stop()
+    assert events == ["crawl cancelled", "queue closed", "job store closed"]
@@ -0,0 +1,154 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from search_api.adapters.fetch_adapter import DnsCache, HttpFetcher
+from search_api.config.settings import get_settings
+from search_api.services.egress_guard import DestinationNotAllowed, is_public_address
+from search_api.tasks.worker import _extract_text
+
+PAGE = b"<html><head><title>Hello &amp; welcome</title></head><body><p>Fresh</p><script>x()</script></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    starts = []
+    hosts = []
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        _Handler.starts.append(time.monotonic())
+        _Handler.hosts.append(self.headers["Host"])
+        if self.path.startswith("/moved"):
+            self.send_response(301)
+            self.send_header("Location", self.path if self.path == "/moved-loop" else "/page")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/big":
+            body = b"x" * 100000
+        elif self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        else:
+            body = PAGE
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(get_settings(), "allow_private_destinations", True)
+    _Handler.connections = set()
+    _Handler.starts = []
+    _Handler.hosts = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.anyio
+async def test_fetch_reuses_connections_and_sends_conditional_get(server):
+    fetcher = HttpFetcher(per_host_connections=1, crawl_delay_seconds=0.0)
+    try:
+        first = await fetcher.fetch(f"{server}/page")
+        assert first.status_code == 200 and first.etag == '"v1"'
+        assert _extract_text(first.body) == ("Hello & welcome", "Hello & welcome Fresh")
+        second = await fetcher.fetch(f"{server}/page")
+        assert second.not_modified and second.ok and second.body == b""
+        assert len(_Handler.connections) == 1
+    finally:
+        await fetcher.close()
+
+
+@pytest.mark.anyio
+async def test_fetch_caps_body_and_spaces_requests_per_host(server):
+    fetcher = HttpFetcher(per_host_connections=1, crawl_delay_seconds=0.05, max_body_bytes=1000)
+    try:
+        big = await fetcher.fetch(f"{server}/big")
+        assert big.truncated and len(big.body) == 1000
+        await fetcher.fetch(f"{server}/other")
+        await fetcher.fetch(f"{server}/another")
+        # Arrival times jitter, so the span of the three starts is checked, with one delay of slack
+        assert _Handler.starts[-1] - _Handler.starts[0] >= 0.05
+    finally:
+        await fetcher.close()
+
+
+@pytest.mark.anyio
+async def test_connections_are_pooled_per_hostname(server):
+    fetcher = HttpFetcher(crawl_delay_seconds=0.0)
+    port = server.rsplit(":", 1)[1]
+    try:
+        for host in ("localhost", "127.0.0.1", "localhost"):
+            assert (await fetcher.fetch(f"http://{host}:{port}/page", etag="")).status_code == 200
+    finally:
+        await fetcher.close()
+    # Both names reach one address; each keeps its own connection and Host header
+    assert len(_Handler.connections) == 2
+    assert _Handler.hosts == [f"localhost:{port}", f"127.0.0.1:{port}", f"localhost:{port}"]
+
+
+@pytest.mark.anyio
+async def test_fetch_follows_a_bounded_number_of_redirects(server):
+    fetcher = HttpFetcher(crawl_delay_seconds=0.05, max_redirects=3)
+    try:
+        moved = await fetcher.fetch(f"{server}/moved")
+        assert moved.ok and moved.url == f"{server}/moved" and moved.final_url == f"{server}/page"
+        assert b"Fresh" in moved.body
+        looping = await fetcher.fetch(f"{server}/moved-loop")
+        assert looping.status_code == 301 and not looping.ok
+    finally:
+        await fetcher.close()
+    # Every hop waits its turn with the host
+    assert len(_Handler.starts) == 6 and _Handler.starts[-1] - _Handler.starts[0] >= 4 * 0.05
+
+
+@pytest.mark.anyio
+async def test_dns_cache_resolves_once_per_ttl(monkeypatch):
+    cache = DnsCache(ttl_seconds=60)
+    lookups = []
+
+    async def fake_lookup(host, port):
+        lookups.append(host)
+        cache._entries[(host, port)] = ("10.0.0.1", time.monotonic() + 60)
+        return "10.0.0.1"
+
+    monkeypatch.setattr(cache, "_lookup", fake_lookup)
+    assert await cache.resolve("example.com", 80) == "10.0.0.1"
+    assert await cache.resolve("example.com", 80) == "10.0.0.1"
+    assert lookups == ["example.com"]
+
+
+@pytest.mark.anyio
+async def test_fetcher_refuses_non_public_addresses(server, monkeypatch):
+    monkeypatch.setattr(get_settings(), "allow_private_destinations", False)
+    fetcher = HttpFetcher(crawl_delay_seconds=0.0)
+    try:
+        with pytest.raises(DestinationNotAllowed):
+            await fetcher.fetch(f"{server}/page")
+        with pytest.raises(DestinationNotAllowed):
+            await fetcher.fetch("http://169.254.169.254/latest/meta-data/")
+    finally:
+        await fetcher.close()
+    assert _Handler.starts == []
+
+
+def test_public_addresses():
+    assert is_public_address("93.184.216.34") and is_public_address("2606:2800:220:1:248:1893:25c8:1946")
+    for address in ("127.0.0.1", "10.1.2.3", "192.168.0.1", "169.254.169.254", "::1", "fe80::1", "::ffff:10.0.0.1"):
+        assert not is_public_address(address)
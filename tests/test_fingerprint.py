@@ -0,0 +1,64 @@
+import pytest
+
+from search_api.adapters.fetch_adapter import FetchResult
+from search_api.services.fingerprint_service import FingerprintService, hamming, simhash
+from search_api.tasks.worker import _crawl
+
+ARTICLE = " ".join(f"word{i}" for i in range(300))
+EDITED = ARTICLE.replace("word150", "changed")
+
+
+def test_simhash_separates_near_duplicates_from_different_text():
+    other = " ".join(f"term{i}" for i in range(300))
+    assert hamming(simhash(ARTICLE), simhash(EDITED)) <= 3
+    assert hamming(simhash(ARTICLE), simhash(other)) > 10
+
+
+def test_fingerprint_service_classifies_recrawls():
+    service = FingerprintService(near_duplicate_bits=3)
+    url = "https://example.com/a"
+    identical, digest = service.check_bytes(url, b"v1")
+    assert not identical
+    assert service.check_text(url, digest, ARTICLE)[0] == "new"
+    assert service.check_bytes(url, b"v1")[0]
+    _, digest = service.check_bytes(url, b"v2")
+    assert service.check_text(url, digest, EDITED)[0] == "near_duplicate"
+    # The near-duplicate's bytes are remembered, so fetching them again skips parsing
+    assert service.check_bytes(url, b"v2")[0]
+    _, digest = service.check_bytes(url, b"v3")
+    assert service.check_text(url, digest, "entirely different content " * 20)[0] == "changed"
+
+
+class _Fetcher:
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    async def fetch(self, url: str) -> FetchResult:
+        return FetchResult(url=url, status_code=200, body=self.body)
+
+
+class _Indexer:
+    def __init__(self) -> None:
+        self.documents = []
+
+    def index_document(self, doc) -> None:
+        self.documents.append(doc)
+
+
+@pytest.mark.anyio
+async def test_recrawl_skips_indexing_unchanged_pages():
+    fingerprints = FingerprintService()
+    indexer = _Indexer()
+    page = f"<html><title>T</title><body>{ARTICLE}</body></html>".encode()
+    url = "https://example.com/a"
+    first = await _crawl(url, indexer, _Fetcher(page), fingerprints)
+    second = await _crawl(url, indexer, _Fetcher(page), fingerprints)
+    assert (first["content"], second["content"]) == ("new", "unchanged")
+    assert len(indexer.documents) == 1 and "doc_id" not in second
+
+
+@pytest.mark.anyio
+async def test_simulated_recrawl_leaves_the_index_alone():
+    indexer = _Indexer()
+    result = await _crawl("https://example.com/a", indexer)
+    assert indexer.documents == [] and "doc_id" not in result
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from search_api.adapters.index_segment import MmapSegment, write_segment
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndex, InvertedIndexAdapter
+
+
+def _build() -> InvertedIndex:
+    index = InvertedIndex()
+    crawled = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    index.add(IndexedDocument(doc_id="a", url="https://a.example.com/", title="Zürich trams", body="trams " * 300))
+    index.add(
+        IndexedDocument(
+            doc_id="b",
+            url="https://b.example.com/",
+            body="trams and buses",
+            language="de",
+            last_crawled_at=crawled,
+            metadata={"k": 1},
+        )
+    )
+    return index
+
+
+@pytest.mark.anyio
+async def test_segment_round_trip_matches_in_memory(tmp_path):
+    index = _build()
+    path = str(tmp_path / "seg-0001.seg")
+    write_segment(index, path)
+    segment = MmapSegment.open(path)
+    try:
+        assert segment.doc_count == 2 and segment.total_length == index.total_length
+        assert sorted(segment.terms()) == sorted(index.terms())
+        assert [list(p) for p in segment.postings("trams")] == [list(p) for p in index.postings("trams")]
+        assert segment.postings("missing") is None
+        assert segment.document(1) == index.document(1)
+        assert segment.language(1) == "de" and segment.host(0) == "a.example.com"
+
+        in_memory = await InvertedIndexAdapter(index).search(query="zürich trams", page=1, size=10)
+        on_disk = await InvertedIndexAdapter(segment).search(query="zürich trams", page=1, size=10)
+        assert [(r.doc_id, r.score) for r in on_disk.results] == [(r.doc_id, r.score) for r in in_memory.results]
+    finally:
+        segment.close()
+
+
+@pytest.mark.anyio
+async def test_segment_loads_only_projected_fields(tmp_path):
+    path = str(tmp_path / "seg-0001.seg")
+    write_segment(_build(), path)
+    segment = MmapSegment.open(path)
+    try:
+        doc = segment.document(1, frozenset({"doc_id", "url"}))
+        assert (doc.doc_id, doc.url, doc.body, doc.metadata) == ("b", "https://b.example.com/", "", {})
+
+        response = await InvertedIndexAdapter(segment).search(
+            query="trams", page=1, size=10, fields=["url", "metadata.site"]
+        )
+        hit = next(r for r in response.results if r.doc_id == "b")
+        assert str(hit.url) == "https://b.example.com/" and hit.snippet is None and hit.title is None
+        assert hit.metadata == {"site": "b.example.com"}
+    finally:
+        segment.close()
+
+
+def test_ordinals_of_finds_every_copy(tmp_path):
+    index = _build()
+    index.add(IndexedDocument(doc_id="a", url="https://a.example.com/", body="newer copy"))
+    path = str(tmp_path / "seg-0002.seg")
+    write_segment(index, path)
+    segment = MmapSegment.open(path)
+    try:
+        assert segment.ordinals_of("a") == [0, 2]
+        assert segment.ordinals_of("b") == [1]
+        assert segment.ordinals_of("missing") == []
+    finally:
+        segment.close()
+
+
+@pytest.mark.anyio
+async def test_closed_segment_stays_mapped_until_its_readers_release_it(tmp_path):
+    path = str(tmp_path / "seg-0001.seg")
+    write_segment(_build(), path)
+    segment = MmapSegment.open(path)
+    assert segment.acquire()
+    segment.close()
+    assert not segment.acquire()
+    assert segment.document(0).doc_id == "a"
+    segment.release()
+    with pytest.raises(ValueError):
+        segment.document(0)
+
+    adapter = InvertedIndexAdapter(MmapSegment.open(path))
+    adapter.index.close()
+    with pytest.raises(RuntimeError):
+        await adapter.search(query="trams", page=1, size=10)
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndexAdapter
+from search_api.adapters.vector_index_adapter import VectorIndexAdapter
+from search_api.services.indexing_service import IndexingService
+
+
+def _doc(doc_id: str, body: str) -> IndexedDocument:
+    return IndexedDocument(doc_id=doc_id, url=f"https://example.com/{doc_id}", body=body)
+
+
+@pytest.mark.anyio
+async def test_refresh_makes_docs_visible_and_replaces_old_versions():
+    indexer = IndexingService(refresh_interval_seconds=0.01)
+    indexer.index_document(_doc("a", "stale content"))
+    assert (await indexer.adapter.search(query="stale", page=1, size=10)).total == 0
+    indexer.refresh()
+    assert (await indexer.adapter.search(query="stale", page=1, size=10)).total == 1
+
+    indexer.index_document(_doc("a", "fresh content"))
+    indexer.refresh()
+    assert (await indexer.adapter.search(query="stale", page=1, size=10)).total == 0
+    resp = await indexer.adapter.search(query="content", page=1, size=10)
+    assert [r.doc_id for r in resp.results] == ["a"]
+
+
+@pytest.mark.anyio
+async def test_flush_merge_and_reload(tmp_path):
+    indexer = IndexingService(index_dir=str(tmp_path), merge_factor=2)
+    for i in range(4):
+        indexer.index_document(_doc(f"d{i}", f"page {i}"))
+        indexer.refresh()
+    indexer.index_document(_doc("d0", "page rewritten"))
+    indexer.refresh()
+    indexer.flush()
+    while await indexer.maybe_merge():
+        pass
+    assert len(indexer.segment_names) < 5
+    assert (await indexer.adapter.search(query="page", page=1, size=10)).total == 4
+    indexer.close()
+
+    reopened = IndexingService(index_dir=str(tmp_path))
+    reopened.load()
+    resp = await reopened.adapter.search(query="rewritten", page=1, size=10)
+    assert [r.doc_id for r in resp.results] == ["d0"]
+    assert (await reopened.adapter.search(query="page", page=1, size=10)).total == 4
+    reopened.close()
+
+
+@pytest.mark.anyio
+async def test_reindex_after_reload_replaces_the_on_disk_copy(tmp_path):
+    indexer = IndexingService(index_dir=str(tmp_path))
+    for i in range(3):
+        indexer.index_document(_doc(f"d{i}", f"stale {i}"))
+    indexer.close()
+
+    reloaded = IndexingService(index_dir=str(tmp_path))
+    reloaded.load()
+    assert (await reloaded.adapter.search(query="stale", page=1, size=10)).total == 3
+    reloaded.index_document(_doc("d1", "fresh"))
+    reloaded.refresh()
+    resp = await reloaded.adapter.search(query="stale", page=1, size=10)
+    assert sorted(r.doc_id for r in resp.results) == ["d0", "d2"]
+    assert (await reloaded.adapter.search(query="fresh", page=1, size=10)).total == 1
+    reloaded.close()
+
+
+@pytest.mark.anyio
+async def test_locations_only_track_documents_still_in_memory(tmp_path):
+    indexer = IndexingService(index_dir=str(tmp_path), refresh_interval_seconds=0.01, flush_threshold_docs=1)
+    indexer.index_document(_doc("a", "stale"))
+    indexer.refresh()
+    assert set(indexer._locations) == {"a"}
+    indexer.index_document(_doc("b", "other"))
+    indexer.refresh()
+    assert set(indexer._locations) == {"a", "b"}
+    indexer._forget(indexer.flush())
+    assert indexer._locations == {}
+    indexer.index_document(_doc("a", "fresh"))
+    indexer.refresh()
+    assert (await indexer.adapter.search(query="stale", page=1, size=10)).total == 0
+    indexer.close()
+
+
+@pytest.mark.anyio
+async def test_refresh_and_load_feed_the_vector_index(tmp_path, monkeypatch):
+    lexical = InvertedIndexAdapter()
+    vectors = VectorIndexAdapter(lexical)
+    indexer = IndexingService(adapter=lexical, index_dir=str(tmp_path), merge_factor=2, vector_adapter=vectors)
+    indexer.index_document(_doc("a", "old words"))
+    indexer.index_document(_doc("a", "vector words"))
+    assert "a" not in vectors
+    indexer.refresh()
+    resp = await vectors.search(query="vector words", page=1, size=10)
+    assert [r.doc_id for r in resp.results] == ["a"]
+    indexer.index_document(_doc("b", "other vector"))
+    indexer.refresh()
+    assert await indexer.maybe_merge()
+    indexer.close()
+
+    reloaded_lexical = InvertedIndexAdapter()
+    reloaded = VectorIndexAdapter(reloaded_lexical)
+    # Embeddings come from the files next to the segments; nothing is re-embedded
+    monkeypatch.setattr(reloaded, "embed", lambda docs: pytest.fail("re-embedded on load"))
+    IndexingService(adapter=reloaded_lexical, index_dir=str(tmp_path), vector_adapter=reloaded).load()
+    resp = await reloaded.search(query="vector words", page=1, size=10)
+    assert [r.doc_id for r in resp.results] == ["a", "b"]
+    assert str(resp.results[0].url) == "https://example.com/a"
+
+
+@pytest.mark.anyio
+async def test_load_embeds_segments_written_without_vectors(tmp_path):
+    indexer = IndexingService(index_dir=str(tmp_path))
+    indexer.index_document(_doc("a", "vector words"))
+    indexer.close()
+
+    lexical = InvertedIndexAdapter()
+    vectors = VectorIndexAdapter(lexical)
+    IndexingService(adapter=lexical, index_dir=str(tmp_path), vector_adapter=vectors).load()
+    assert [r.doc_id for r in (await vectors.search(query="vector", page=1, size=10)).results] == ["a"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["manifest.json", "seg-00000001.seg", "seg-00000001.vec"]
+
+
+@pytest.mark.anyio
+async def test_run_survives_a_failed_flush(tmp_path, monkeypatch):
+    indexer = IndexingService(index_dir=str(tmp_path), refresh_interval_seconds=0.01, flush_threshold_docs=1)
+    monkeypatch.setattr(indexer.settings, "index_retry_max_seconds", 0.02)
+    flush = indexer.flush
+    failures = []
+
+    def failing_flush():
+        if not failures:
+            failures.append(True)
+            raise OSError("disk full")
+        return flush()
+
+    monkeypatch.setattr(indexer, "flush", failing_flush)
+    runner = asyncio.create_task(indexer.run())
+    try:
+        indexer.index_document(_doc("a", "durable"))
+        for _ in range(100):
+            if indexer.segment_names and all(seg.on_disk for seg in indexer._segments):
+                break
+            await asyncio.sleep(0.01)
+        assert failures and all(seg.on_disk for seg in indexer._segments)
+        indexer.index_document(_doc("b", "durable"))
+        await asyncio.sleep(0.05)
+        assert (await indexer.adapter.search(query="durable", page=1, size=10)).total == 2
+    finally:
+        indexer.stop()
+        await runner
+        indexer.close()
+
+
+@pytest.mark.anyio
+async def test_merge_keeps_segments_of_a_running_search_mapped(tmp_path):
+    indexer = IndexingService(index_dir=str(tmp_path), merge_factor=2)
+    for i in range(2):
+        indexer.index_document(_doc(f"d{i}", f"page {i}"))
+        indexer.refresh()
+    indexer.flush()
+    snapshot = indexer.adapter._pin()
+    assert await indexer.maybe_merge()
+    assert sorted(snapshot.document(o).doc_id for o in range(snapshot.doc_count)) == ["d0", "d1"]
+    snapshot.release()
+    assert (await indexer.adapter.search(query="page", page=1, size=10)).total == 2
+    indexer.close()
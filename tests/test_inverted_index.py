@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndexAdapter, SearchCancelled
+
+
+def _adapter() -> InvertedIndexAdapter:
+    idx = InvertedIndexAdapter()
+    docs = [
+        IndexedDocument(doc_id="a", url="https://a.example.com/1", title="Python asyncio", body="loop", language="en"),
+        IndexedDocument(doc_id="b", url="https://b.example.com/2", title="Python", body="python pip", language="en"),
+        IndexedDocument(doc_id="c", url="https://c.example.com/3", title="Cuisine", body="recettes", language="fr"),
+    ]
+    for doc in docs:
+        idx.add_document(doc)
+    return idx
+
+
+@pytest.mark.anyio
+async def test_bm25_ranks_matching_docs():
+    resp = await _adapter().search(query="python", page=1, size=10)
+    assert resp.total == 2
+    assert [r.doc_id for r in resp.results] == ["b", "a"]
+    top = resp.results[0]
+    assert top.metadata["rank_features"]["bm25"] == top.score > 0
+
+
+@pytest.mark.anyio
+async def test_search_scores_off_the_event_loop(monkeypatch):
+    idx = _adapter()
+    threads = []
+    search_sync = idx.search_sync
+
+    def recording_search_sync(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return search_sync(*args, **kwargs)
+
+    monkeypatch.setattr(idx, "search_sync", recording_search_sync)
+    assert (await idx.search(query="python", page=1, size=10)).total == 2
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_cancelled_search_stops_scoring():
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(SearchCancelled):
+        _adapter().search_sync("python", 1, 10, cancel=cancel)
+
+
+@pytest.mark.anyio
+async def test_filters_and_paging():
+    idx = _adapter()
+    assert (await idx.search(query="python cuisine", page=1, size=10, language="fr")).total == 1
+    assert (await idx.search(query="python", page=1, size=10, site="a.example.com")).total == 1
+    page2 = await idx.search(query="python", page=2, size=1)
+    assert [r.doc_id for r in page2.results] == ["a"]
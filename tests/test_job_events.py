@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from search_api.services.recrawl_service import RecrawlService
+
+
+async def _submit(service: RecrawlService, urls):
+    return await service.enqueue_recrawl(urls, priority="normal", reason=None, callback_url=None)
+
+
+@pytest.mark.anyio
+async def test_group_status_counts_jobs():
+    service = RecrawlService()
+    group = await _submit(service, ["https://example.com/a", "https://example.com/b"])
+    await service.mark_finished(group.jobs[0].job_id, True, {"doc_id": "a"})
+
+    status = await service.get_group_status(group.job_group_id)
+    assert status is not None
+    assert status.counts == {"succeeded": 1, "queued": 1}
+    assert await service.get_group_status("missing-group") is None
+
+
+@pytest.mark.anyio
+async def test_watch_group_streams_changes_until_terminal():
+    service = RecrawlService()
+    group = await _submit(service, ["https://example.com/a", "https://example.com/b"])
+    first, second = (job.job_id for job in group.jobs)
+    stream = service.watch_group(group.job_group_id, heartbeat_seconds=0.05)
+
+    snapshot = await stream.__anext__()
+    assert {event.status for event in snapshot} == {"queued"}
+    await service.mark_running_many([first, second])
+    assert [event.status for event in await stream.__anext__()] == ["running", "running"]
+    assert await stream.__anext__() == []  # heartbeat
+
+    await service.mark_finished_many([(first, True, None), (second, False, {"error": "boom"})])
+    finished = await stream.__anext__()
+    assert {(event.job_id, event.status) for event in finished} == {(first, "succeeded"), (second, "failed")}
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert not service.events.active
+
+
+@pytest.mark.anyio
+async def test_watch_group_resnapshots_after_overflow():
+    service = RecrawlService()
+    service.events.max_events_per_subscriber = 1
+    group = await _submit(service, ["https://example.com/a", "https://example.com/b"])
+    first, second = (job.job_id for job in group.jobs)
+    stream = service.watch_group(group.job_group_id)
+    await stream.__anext__()
+
+    await service.mark_running(first)
+    await asyncio.sleep(0.001)
+    await service.mark_finished_many([(first, True, None), (second, True, None)])
+    resnapshot = await stream.__anext__()
+    assert {event.status for event in resnapshot} == {"succeeded"}
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from search_api.adapters.job_store_adapter import InMemoryJobStore, JobRecord, SqliteJobStore
+from search_api.services.recrawl_service import RecrawlService
+
+
+def _record(job_id: str, group_id: str = "g", status: str = "queued") -> JobRecord:
+    now = time.time()
+    url = f"https://example.com/{job_id}"
+    return JobRecord(job_id, group_id, None, url, status, "normal", now, now, None, now + 3600)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+async def store(request, tmp_path):
+    if request.param == "memory":
+        store = InMemoryJobStore(terminal_ttl_seconds=60)
+    else:
+        store = SqliteJobStore(path=str(tmp_path / "jobs.sqlite3"), terminal_ttl_seconds=60, sweep_interval_seconds=0)
+    yield store
+    await store.close()
+
+
+@pytest.mark.anyio
+async def test_job_store_round_trip_and_group_lookup(store):
+    await store.put_many([_record("a"), _record("b"), _record("c", group_id="other")])
+    await store.update_many([("a", "succeeded", {"doc_id": "d1"}, time.time()), ("b", "running", None, time.time())])
+    a = await store.get("a")
+    assert a.status == "succeeded" and a.result == {"doc_id": "d1"}
+    assert sorted(r.job_id for r in await store.get_group("g")) == ["a", "b"]
+    assert (await store.get("missing")) is None
+
+
+@pytest.mark.anyio
+async def test_job_store_expires_terminal_jobs_and_idempotency_keys(store, monkeypatch):
+    store.idempotency_ttl_seconds = 30
+    await store.put_many([_record("done"), _record("live")])
+    await store.update_many([("done", "failed", None, time.time())])
+    assert await store.claim_idempotency_key("t", "k", "g1") is None
+    assert await store.claim_idempotency_key("t", "k", "g2") == "g1"
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    await store.update_many([("live", "running", None, later)])
+    assert (await store.get("done")) is None
+    assert (await store.get("live")).status == "running"
+    assert await store.claim_idempotency_key("t", "k", "g3") is None
+
+
+@pytest.mark.anyio
+async def test_attached_jobs_are_listed_under_the_group(store):
+    await store.put_many([_record("a"), _record("b", group_id="other")])
+    await store.attach_to_group("other", ["a"])
+    await store.attach_to_group("dup", ["a"])
+    assert sorted(r.job_id for r in await store.get_group("other")) == ["a", "b"]
+    assert [r.job_id for r in await store.get_group("dup")] == ["a"]
+    assert [r.job_id for r in await store.get_group("g")] == ["a"]
+
+
+@pytest.mark.anyio
+async def test_in_memory_store_is_bounded():
+    store = InMemoryJobStore(max_entries=10)
+    await store.put_many([_record(str(i), status="succeeded") for i in range(25)])
+    assert len(store) == 10
+    assert (await store.get("24")) is not None
+
+
+@pytest.mark.anyio
+async def test_recrawl_service_uses_sqlite_store(tmp_path):
+    store = SqliteJobStore(path=str(tmp_path / "jobs.sqlite3"))
+    service = RecrawlService(job_store=store)
+    group = await service.enqueue_recrawl(
+        ["https://example.com/a"], priority="high", reason=None, callback_url=None, idempotency_key="key-1"
+    )
+    job_id = group.jobs[0].job_id
+    await service.mark_finished_many([(job_id, True, {"ok": True})])
+    status = await service.get_status(job_id)
+    assert status.status == "succeeded" and status.result == {"ok": True}
+    with pytest.raises(ValueError):
+        await service.enqueue_recrawl(
+            ["https://example.com/b"], priority="high", reason=None, callback_url=None, idempotency_key="key-1"
+        )
+    await store.close()
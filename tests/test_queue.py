@@ -0,0 +1,180 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+
+from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter
+from search_api.adapters.wal_queue_adapter import WalQueueAdapter
+
+
+@pytest.mark.anyio
+async def test_deferred_job_does_not_block_ready_jobs():
+    queue = InMemoryPriorityQueueAdapter()
+    later = datetime.now(timezone.utc) + timedelta(hours=1)
+    await queue.enqueue(["https://example.com/later"], priority="critical", group_id="g", not_before=later)
+    await queue.enqueue(["https://example.com/now"], priority="low", group_id="g")
+    assert queue.scheduled_count == 1 and queue.ready_count == 1
+    consumer = queue.consume()
+    _, url, _ = await asyncio.wait_for(consumer.__anext__(), timeout=1)
+    assert url == "https://example.com/now"
+    assert queue.scheduled_count == 1
+    await consumer.aclose()
+
+
+@pytest.mark.anyio
+async def test_deferred_job_is_released_when_due():
+    queue = InMemoryPriorityQueueAdapter()
+    consumer = queue.consume()
+    waiter = asyncio.ensure_future(consumer.__anext__())
+    await asyncio.sleep(0)
+    soon = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+    await queue.enqueue(["https://example.com/soon"], priority="normal", group_id="g", not_before=soon)
+    _, url, _ = await asyncio.wait_for(waiter, timeout=1)
+    assert url == "https://example.com/soon"
+    assert datetime.now(timezone.utc) >= soon
+    await consumer.aclose()
+
+
+@pytest.mark.anyio
+async def test_wal_queue_replays_unacked_jobs(tmp_path):
+    queue = WalQueueAdapter(queue_dir=str(tmp_path))
+    queue.load()
+    ids = await queue.enqueue(["https://a.example", "https://b.example"], priority="high", group_id="g")
+    consumer = queue.consume()
+    job_id, _, _ = await consumer.__anext__()
+    await queue.ack(job_id)
+    await consumer.aclose()
+    queue.close()
+
+    restarted = WalQueueAdapter(queue_dir=str(tmp_path))
+    restarted.load()
+    assert restarted.ready_count == 1
+    consumer = restarted.consume()
+    replayed_id, url, priority = await consumer.__anext__()
+    assert replayed_id == (set(ids) - {job_id}).pop() and priority == "high"
+    await consumer.aclose()
+    restarted.close()
+
+
+@pytest.mark.anyio
+async def test_wal_queue_group_commits_and_redelivers_expired_leases(tmp_path):
+    queue = WalQueueAdapter(queue_dir=str(tmp_path), lease_seconds=0.05)
+    queue.load()
+    writes = []
+    write = queue._write
+    queue._write = lambda data: (writes.append(data), write(data))[1]  # type: ignore[method-assign]
+    await asyncio.gather(*(queue.enqueue([f"https://{i}.example"], priority="normal", group_id="g") for i in range(20)))
+    assert len(writes) <= 2
+    consumer = queue.consume()
+    first, _, _ = await consumer.__anext__()
+    for _ in range(19):
+        job_id, _, _ = await consumer.__anext__()
+        await queue.ack(job_id)
+    # The first job was never acked, so its lease lapses and it comes back
+    redelivered, _, _ = await asyncio.wait_for(consumer.__anext__(), timeout=1)
+    assert redelivered == first
+    await consumer.aclose()
+    queue.close()
+
+
+@pytest.mark.anyio
+async def test_wal_queue_compacts_into_snapshot(tmp_path):
+    queue = WalQueueAdapter(queue_dir=str(tmp_path), compact_bytes=1)
+    queue.load()
+    await queue.enqueue(["https://a.example"], priority="low", group_id="g")
+    ids = await queue.enqueue(["https://b.example"], priority="low", group_id="g")
+    # Compaction runs on the flusher after the enqueue has been acknowledged
+    await queue._flusher
+    queue.close()
+    assert (tmp_path / "queue.snapshot").exists()
+    assert (tmp_path / "queue.wal").stat().st_size == 0
+
+    restarted = WalQueueAdapter(queue_dir=str(tmp_path))
+    restarted.load()
+    assert restarted.ready_count == 2
+    assert ids[0] in restarted._live
+    restarted.close()
+
+
+@pytest.mark.anyio
+async def test_wal_queue_survives_failed_compaction_and_rejects_acks_after_close(tmp_path, monkeypatch):
+    queue = WalQueueAdapter(queue_dir=str(tmp_path), compact_bytes=1)
+    queue.load()
+
+    def broken_compact(live):
+        # The second enqueue queues up behind this compaction and must still be written
+        time.sleep(0.05)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(queue, "_compact", broken_compact)
+    first = await queue.enqueue(["https://a.example"], priority="low", group_id="g")
+    second = await asyncio.wait_for(queue.enqueue(["https://b.example"], priority="low", group_id="g"), 1)
+    await queue.ack(first[0])
+    await queue._flusher
+    queue.close()
+    with pytest.raises(RuntimeError):
+        await queue.ack(second[0])
+
+    restarted = WalQueueAdapter(queue_dir=str(tmp_path))
+    restarted.load()
+    assert set(restarted._live) == set(second)
+    restarted.close()
+
+
+def test_wal_queue_skips_corrupt_record_mid_log(tmp_path):
+    lines = [
+        b'{"op":"enq","job_id":"a","url":"https://a.example","priority":"low","group_id":"g","ts":1}\n',
+        b'{"op":"enq","job_id":"b","url":"https://b.exa\n',
+        b'{"op":"enq","job_id":"c","url":"https://c.example","priority":"low","group_id":"g","ts":2}\n',
+        b'{"op":"enq","job_id":"d"',
+    ]
+    (tmp_path / "queue.wal").write_bytes(b"".join(lines))
+    queue = WalQueueAdapter(queue_dir=str(tmp_path))
+    queue.load()
+    assert set(queue._live) == {"a", "c"}
+    queue.close()
+    assert (tmp_path / "queue.wal").read_bytes() == b"".join(lines[:3])
+
+
+async def _drain(queue: InMemoryPriorityQueueAdapter, n: int) -> List[str]:
+    consumer = queue.consume()
+    urls = [(await consumer.__anext__())[1] for _ in range(n)]
+    await consumer.aclose()
+    return urls
+
+
+@pytest.mark.anyio
+async def test_fair_scheduler_interleaves_tenants():
+    queue = InMemoryPriorityQueueAdapter(scheduler="fair")
+    await queue.enqueue([f"https://a.example/{i}" for i in range(50)], priority="high", group_id="g1", tenant_id="a")
+    await queue.enqueue([f"https://b.example/{i}" for i in range(5)], priority="high", group_id="g2", tenant_id="b")
+    served = await _drain(queue, 10)
+    assert sum(url.startswith("https://b.") for url in served) == 5
+
+
+@pytest.mark.anyio
+async def test_fair_scheduler_orders_by_deadline_and_ages_low_priority(monkeypatch):
+    queue = InMemoryPriorityQueueAdapter(scheduler="fair")
+    now = datetime.now(timezone.utc)
+    await queue.enqueue(["https://late.example"], priority="normal", group_id="g", deadline=now + timedelta(hours=1))
+    await queue.enqueue(["https://soon.example"], priority="normal", group_id="g", deadline=now + timedelta(minutes=5))
+    assert await _drain(queue, 2) == ["https://soon.example", "https://late.example"]
+
+    await queue.enqueue(["https://low.example"], priority="low", group_id="g")
+    # Jump past three aging steps: the waiting low job now ranks with fresh critical work
+    later = time.time() + 3 * queue.settings.queue_aging_seconds + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+    await queue.enqueue(["https://critical.example"], priority="critical", group_id="g")
+    assert await _drain(queue, 1) == ["https://low.example"]
+
+
+@pytest.mark.anyio
+async def test_queue_counts_sla_misses():
+    queue = InMemoryPriorityQueueAdapter()
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    await queue.enqueue(["https://missed.example"], priority="normal", group_id="g", deadline=past)
+    await queue.enqueue(["https://fine.example"], priority="normal", group_id="g")
+    await _drain(queue, 2)
+    assert queue.stats.delivered == 2 and queue.stats.sla_miss_rate == 0.5
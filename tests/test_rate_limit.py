@@ -1,4 +1,11 @@
+import asyncio
+import os
+
+import pytest
+
+from search_api.services.gcra_rate_limit_service import GcraLimit, GcraRateLimitService, InProcessGcraStore
 from search_api.services.rate_limit_service import RateLimitService
+from search_api.services.shm_rate_limit_service import SharedMemoryRateLimitService
 
 
 def test_token_bucket_allows_within_limit():
@@ -16,3 +23,65 @@ def test_token_bucket_allows_within_limit():
     assert not d.allowed or d.remaining >= 0
 
 
+def test_shared_memory_limit_holds_across_instances(tmp_path):
+    path = str(tmp_path / "rl.shm")
+    worker_a = SharedMemoryRateLimitService(path=path, slots=64)
+    worker_b = SharedMemoryRateLimitService(path=path, slots=64)
+    try:
+        decisions = [(worker_a if i % 2 else worker_b).check(key="k", limit_per_minute=6) for i in range(8)]
+        assert [d.allowed for d in decisions].count(True) == 6
+        assert not decisions[-1].allowed and decisions[-1].reset_seconds > 0
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_shared_memory_table_stays_bounded(tmp_path):
+    path = str(tmp_path / "rl.shm")
+    rl = SharedMemoryRateLimitService(path=path, slots=16)
+    try:
+        size = os.path.getsize(path)
+        decisions = [rl.check(key=f"flood-{i}", limit_per_minute=10) for i in range(1000)]
+        assert decisions[0].allowed
+        assert os.path.getsize(path) == size
+    finally:
+        rl.close()
+
+
+def test_shared_memory_eviction_does_not_refill_a_drained_key(tmp_path):
+    path = str(tmp_path / "rl.shm")
+    rl = SharedMemoryRateLimitService(path=path, slots=8)
+    try:
+        for _ in range(3):
+            rl.check(key="victim", limit_per_minute=3)
+        assert not rl.check(key="victim", limit_per_minute=3).allowed
+        # Fill the only group so the victim's slot is displaced
+        for i in range(20):
+            rl.check(key=f"spray-{i}", limit_per_minute=3)
+        assert not rl.check(key="victim", limit_per_minute=3).allowed
+    finally:
+        rl.close()
+
+
+@pytest.mark.anyio
+async def test_gcra_hierarchy_is_all_or_nothing():
+    store = InProcessGcraStore()
+    rl = GcraRateLimitService(store=store)
+    tenant = GcraLimit(key="t:acme", limit_per_minute=3)
+    key_a = GcraLimit(key="k:a", limit_per_minute=100)
+    key_b = GcraLimit(key="k:b", limit_per_minute=100)
+    decisions = [await rl.check([tenant, key_a if i % 2 else key_b]) for i in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[-1].limit == 3 and decisions[-1].reset_seconds > 0
+    # The rejected call consumed nothing at the key level
+    assert (await rl.check([key_b])).remaining == 100 - 3
+
+
+@pytest.mark.anyio
+async def test_gcra_concurrent_checks_are_batched():
+    store = InProcessGcraStore()
+    rl = GcraRateLimitService(store=store, max_batch=1000)
+    limit = [GcraLimit(key="k:burst", limit_per_minute=50)]
+    decisions = await asyncio.gather(*(rl.check(limit) for _ in range(60)))
+    assert store.batches == 1
+    assert sum(d.allowed for d in decisions) == 50
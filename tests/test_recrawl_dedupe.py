@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from search_api.services.recrawl_service import RecrawlService
+from search_api.services.url_dedupe import RotatingBloomFilter, canonicalize_url
+
+
+def test_canonicalize_url():
+    url = "HTTP://Example.COM:80/a/./b/../c?utm_source=x&b=2&a=1#top"
+    assert canonicalize_url(url) == "http://example.com/a/c?a=1&b=2"
+    assert canonicalize_url("https://example.com") == "https://example.com/"
+    assert canonicalize_url("https://example.com/%7euser/%2f") == "https://example.com/~user/%2F"
+    assert canonicalize_url("https://example.com:8443/x/") == "https://example.com:8443/x/"
+
+
+def test_rotating_bloom_filter_forgets_after_two_windows(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("search_api.services.url_dedupe.time.monotonic", lambda: clock[0])
+    recent = RotatingBloomFilter(window_seconds=10, capacity=100)
+    recent.add("a")
+    clock[0] = 15
+    assert "a" in recent
+    clock[0] = 40
+    assert "a" not in recent
+
+
+async def _submit(service: RecrawlService, urls, tenant_id=None):
+    return await service.enqueue_recrawl(urls, priority="normal", reason=None, callback_url=None, tenant_id=tenant_id)
+
+
+@pytest.mark.anyio
+async def test_duplicate_submissions_attach_to_in_flight_job():
+    service = RecrawlService()
+    first, second = await asyncio.gather(
+        _submit(service, ["https://Example.com/page?utm_medium=x", "https://example.com/page"]),
+        _submit(service, ["https://example.com/page#section"]),
+    )
+    assert {job.job_id for job in first.jobs + second.jobs} == {first.jobs[0].job_id}
+    assert service.queue.ready_count == 1
+    other_tenant = await _submit(service, ["https://example.com/page"], tenant_id="t2")
+    assert other_tenant.jobs[0].job_id != first.jobs[0].job_id
+
+    job_id = first.jobs[0].job_id
+    await service.mark_running_many([job_id])
+    assert (await service.get_status(second.jobs[0].job_id)).status == "running"
+    await service.mark_finished_many([(job_id, True, {"ok": True})])
+    again = await _submit(service, ["https://example.com/page"])
+    assert again.jobs[0].status == "succeeded"
+    assert again.jobs[0].result == {"deduplicated": "recently_crawled"}
+    assert service.queue.ready_count == 2
+    assert [job.job_id for job in (await service.get_group_status(second.job_group_id)).jobs] == [job_id]
+
+
+@pytest.mark.anyio
+async def test_failed_submission_fails_concurrent_duplicates(monkeypatch):
+    service = RecrawlService()
+
+    async def broken(records):
+        await asyncio.sleep(0)
+        if records:
+            raise RuntimeError("job store down")
+
+    monkeypatch.setattr(service.jobs, "put_many", broken)
+    first, second = await asyncio.wait_for(
+        asyncio.gather(
+            _submit(service, ["https://example.com/page"]),
+            _submit(service, ["https://example.com/page"]),
+            return_exceptions=True,
+        ),
+        1,
+    )
+    assert isinstance(first, RuntimeError) and second is first
+    assert not service._reserving
+
+
+@pytest.mark.anyio
+async def test_failed_submission_releases_its_idempotency_key(monkeypatch):
+    service = RecrawlService()
+    put_many = service.jobs.put_many
+    failing = ["https://example.com/shared"]
+
+    async def flaky(records):
+        await asyncio.sleep(0)
+        if any(record.url in failing for record in records):
+            raise RuntimeError("job store down")
+        await put_many(records)
+
+    monkeypatch.setattr(service.jobs, "put_many", flaky)
+    first, second = await asyncio.gather(
+        _submit(service, ["https://example.com/shared"]),
+        service.enqueue_recrawl(
+            ["https://example.com/shared", "https://example.com/own"],
+            priority="normal",
+            reason=None,
+            callback_url=None,
+            idempotency_key="key-1",
+        ),
+        return_exceptions=True,
+    )
+    # The second call stored its own job, then failed on the shared URL it was waiting for
+    assert isinstance(first, RuntimeError) and second is first
+    failing.clear()
+    retry = await service.enqueue_recrawl(
+        ["https://example.com/shared", "https://example.com/own"],
+        priority="normal",
+        reason=None,
+        callback_url=None,
+        idempotency_key="key-1",
+    )
+    assert len(retry.jobs) == 2
+    # The failed shared job, the own job the retry attached to, and the retried shared job
+    assert service.queue.ready_count == 3
+
+
+@pytest.mark.anyio
+async def test_jobs_crawl_the_url_as_submitted():
+    service = RecrawlService()
+    urls = ["https://example.com/a?flag", "https://example.com//b"]
+    group = await _submit(service, urls + ["https://EXAMPLE.com/a?flag="])
+    assert [str(job.url) for job in group.jobs] == urls + [urls[0]]
+    batch = await service.queue.consume_batch(max_items=10, max_wait=0.01)
+    assert sorted(url for _, url, _ in batch) == sorted(urls)
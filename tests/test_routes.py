@@ -1,40 +1,50 @@
 from fastapi.testclient import TestClient
 
+from search_api.config.settings import get_settings
 from search_api.main import app
 
 
 def test_health():
-    client = TestClient(app)
-    res = client.get("/healthz")
+    with TestClient(app) as client:
+        res = client.get("/healthz")
     assert res.status_code == 200
     assert res.json()["status"] == "ok"
 
 
-def test_search_basic():
+def test_health_not_ready_before_startup():
     client = TestClient(app)
-    res = client.get("/v1/search?q=hello+world")
+    res = client.get("/healthz")
+    assert res.status_code == 503
+    assert res.json()["status"] == "starting"
+
+
+def test_search_basic():
+    with TestClient(app) as client:
+        res = client.get("/v1/search?q=hello+world")
     assert res.status_code == 200
     body = res.json()
     assert body["query"] == "hello world"
     assert "results" in body and isinstance(body["results"], list)
     assert body["page"] == 1
     assert body["size"] >= 1
+    assert int(res.headers["X-RateLimit-Limit"]) >= int(res.headers["X-RateLimit-Remaining"]) >= 0
+    assert res.headers["content-length"] == str(len(res.content))
 
 
 def test_recrawl_lifecycle():
-    client = TestClient(app)
     payload = {
         "urls": ["https://example.com/a", "https://example.com/b"],
         "priority": "normal",
         "reason": "test",
     }
-    res = client.post("/v1/recrawl", json=payload)
-    assert res.status_code == 202
-    body = res.json()
-    assert "jobs" in body and len(body["jobs"]) == 2
-    job_id = body["jobs"][0]["job_id"]
+    with TestClient(app) as client:
+        res = client.post("/v1/recrawl", json=payload)
+        assert res.status_code == 202
+        body = res.json()
+        assert "jobs" in body and len(body["jobs"]) == 2
+        job_id = body["jobs"][0]["job_id"]
 
-    status_res = client.get(f"/v1/recrawl/{job_id}")
+        status_res = client.get(f"/v1/recrawl/{job_id}")
     assert status_res.status_code == 200
     status_body = status_res.json()
     assert status_body["job_id"] == job_id
@@ -42,16 +52,76 @@ def test_recrawl_lifecycle():
 
 
 def test_recrawl_idempotency_conflict():
-    client = TestClient(app)
     payload = {
         "urls": ["https://example.com/a"],
         "priority": "normal",
         "reason": "test",
     }
     idem = {"Idempotency-Key": "abc-123"}
-    first = client.post("/v1/recrawl", json=payload, headers=idem)
-    assert first.status_code == 202
-    second = client.post("/v1/recrawl", json=payload, headers=idem)
+    with TestClient(app) as client:
+        first = client.post("/v1/recrawl", json=payload, headers=idem)
+        assert first.status_code == 202
+        second = client.post("/v1/recrawl", json=payload, headers=idem)
     assert second.status_code == 409
 
 
+def test_recrawl_rejects_private_callback_urls():
+    payload = {"urls": ["https://example.com/a"], "callback_url": "http://169.254.169.254/latest/meta-data/"}
+    with TestClient(app) as client:
+        res = client.post("/v1/recrawl", json=payload)
+    assert res.status_code == 400
+
+
+def test_recrawl_group_status_and_events():
+    payload = {"urls": ["https://example.com/group-a", "https://example.com/group-b"], "priority": "high"}
+    with TestClient(app) as client:
+        group_id = client.post("/v1/recrawl", json=payload).json()["job_group_id"]
+        group_res = client.get(f"/v1/recrawl/groups/{group_id}")
+        assert group_res.status_code == 200
+        assert sum(group_res.json()["counts"].values()) == 2
+
+        service = client.app.state.container.recrawl_service
+        for job in group_res.json()["jobs"]:
+            client.portal.call(service.mark_finished, job["job_id"], True, None)
+        with client.stream("GET", f"/v1/recrawl/groups/{group_id}/events") as stream:
+            assert stream.headers["content-type"].startswith("text/event-stream")
+            body = "".join(stream.iter_text())
+        missing = client.get("/v1/recrawl/groups/unknown-group")
+    assert body.count("event: status") == 2
+    assert body.endswith(f'event: done\ndata: {{"job_group_id": "{group_id}"}}\n\n')
+    assert missing.status_code == 404
+
+
+def test_search_unknown_field_is_rejected():
+    with TestClient(app) as client:
+        ok = client.get("/v1/search?q=hello&fields=doc_id,score")
+        bad = client.get("/v1/search?q=hello&fields=doc_id,bogus")
+    assert ok.status_code == 200
+    assert set(ok.json()["results"][0]) == {"doc_id", "score"}
+    assert bad.status_code == 400
+
+
+def test_search_cursor_continues_and_rejects_tampering():
+    with TestClient(app) as client:
+        first = client.get("/v1/search?q=hello&size=5").json()
+        second = client.get(f"/v1/search?q=hello&size=5&cursor={first['next_cursor']}")
+        bad = client.get("/v1/search?q=hello&cursor=bogus")
+    assert second.status_code == 200
+    assert second.json()["results"][0]["doc_id"] not in {r["doc_id"] for r in first["results"]}
+    assert bad.status_code == 400
+
+
+def test_tenant_comes_from_the_api_key(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "api_keys", ["key-a1", "key-a2", "key-b"])
+    monkeypatch.setattr(settings, "api_key_tenants", {"key-a1": "a", "key-a2": "a", "key-b": "b"})
+    payload = {"urls": ["https://example.com/tenant"], "priority": "normal"}
+
+    def submit(client, key, **headers):
+        return client.post("/v1/recrawl", json=payload, headers={"X-API-Key": key, "Idempotency-Key": "k", **headers})
+
+    with TestClient(app) as client:
+        assert submit(client, "key-a1").status_code == 202
+        assert submit(client, "key-b").status_code == 202
+        # Idempotency keys are scoped by the key's tenant; a client-supplied tenant header changes nothing
+        assert submit(client, "key-a2", **{"X-Tenant-Id": "c"}).status_code == 409
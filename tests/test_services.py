@@ -1,7 +1,16 @@
+import json
+import warnings
+
 import anyio
 import pytest
 
-from search_api.services.search_service import SearchService
+from search_api.adapters.index_adapter import MockIndexAdapter
+from search_api.adapters.inverted_index_adapter import IndexedDocument
+from search_api.adapters.sharded_index_adapter import ShardedIndexAdapter
+from search_api.services.search_cursor import CursorError
+from search_api.models.projection import FieldProjection
+from search_api.models.schemas import SearchResponse, SearchResult
+from search_api.services.search_service import RenderedSearch, SearchService
 
 
 @pytest.mark.anyio
@@ -15,3 +24,126 @@ async def test_search_service_returns_results():
     assert resp.total >= 5
 
 
+@pytest.mark.anyio
+async def test_search_json_matches_model_serialization():
+    svc = SearchService()
+    for page, size in ((1, 5), (3, 7), (500, 10)):
+        body = await svc.search_json(query='say "hi"', page=page, size=size, request_id="req-1")
+        resp = await svc.search(query='say "hi"', page=page, size=size)
+        expected = resp.model_copy(update={"request_id": "req-1"}).model_dump_json()
+        assert body == expected.encode()
+
+
+@pytest.mark.anyio
+async def test_results_carry_validated_urls():
+    svc = SearchService()
+    resp = await svc.search(query="urls", page=1, size=3, site="news.example.org")
+    assert {result.url.host for result in resp.results} == {"news.example.org"}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        resp.model_dump_json()
+
+
+@pytest.mark.anyio
+async def test_search_json_cache_hit_skips_backend():
+    svc = SearchService()
+    calls = []
+    backend = svc.index_adapter.search
+
+    async def counting_search(**kwargs):
+        calls.append(kwargs)
+        return await backend(**kwargs)
+
+    svc.index_adapter.search = counting_search  # type: ignore[method-assign]
+    first = await svc.search_json(query="cached", page=2, size=5, request_id="a")
+    second = await svc.search_json(query="cached", page=2, size=5, request_id="b")
+    assert len(calls) == 1
+    assert first.replace(b'"request_id":"a"', b'"request_id":"b"') == second
+
+
+@pytest.mark.anyio
+async def test_search_json_emits_only_projected_fields():
+    svc = SearchService()
+    body = await svc.search_json(query="slim", page=1, size=3, fields=["score", "url", "metadata.rank_features"])
+    results = json.loads(body)["results"]
+    assert [set(r) for r in results] == [{"doc_id", "url", "score", "metadata"}] * 3
+    assert all(set(r["metadata"]) == {"rank_features"} for r in results)
+    # Same projection in another order is the same cache entry
+    again = await svc.search_json(query="slim", page=1, size=3, fields=["metadata.rank_features", "url", "score"])
+    assert again == body
+
+
+@pytest.mark.anyio
+async def test_cursor_pages_follow_offset_pages():
+    svc = SearchService()
+    cursor = None
+    for page in range(1, 16):
+        by_offset = await svc.search(query="deep", page=page, size=10)
+        by_cursor = await svc.search(query="deep", page=1, size=10, cursor=cursor)
+        assert [r.doc_id for r in by_cursor.results] == [r.doc_id for r in by_offset.results]
+        cursor = by_cursor.next_cursor
+        assert cursor is not None
+
+
+@pytest.mark.anyio
+async def test_cursor_walks_every_shard_once():
+    idx = ShardedIndexAdapter.in_memory(num_shards=3)
+    for i in range(30):
+        body = "rare " * (i % 5 + 1) + "filler " * 5
+        idx.add_document(IndexedDocument(doc_id=f"d{i}", url=f"https://example.com/{i}", body=body, language="en"))
+    svc = SearchService(index_adapter=idx)
+    everything = await svc.search(query="rare", page=1, size=30)
+    seen = []
+    page = await svc.search(query="rare", page=1, size=4)
+    while True:
+        seen.extend(r.doc_id for r in page.results)
+        if page.next_cursor is None:
+            break
+        page = await svc.search(query="rare", page=1, size=4, cursor=page.next_cursor)
+    assert seen == [r.doc_id for r in everything.results]
+
+
+@pytest.mark.anyio
+async def test_cursor_is_bound_to_its_query():
+    svc = SearchService()
+    first = await svc.search(query="one", page=1, size=5)
+    assert first.next_cursor is not None
+    with pytest.raises(CursorError):
+        await svc.search(query="two", page=1, size=5, cursor=first.next_cursor)
+    body, _, tag = first.next_cursor.partition(".")
+    with pytest.raises(CursorError):
+        await svc.search(query="one", page=1, size=5, cursor=f"{body}A.{tag}")
+
+
+def test_cursor_positions_start_shards_without_served_hits_from_the_top():
+    hits = [
+        SearchResult.model_construct(doc_id=doc_id, url=f"https://example.com/{doc_id}", score=score)
+        for doc_id, score in (("a", 3.0), ("b", 2.0))
+    ]
+    # Shard 1 missed the deadline; shard 2 answered with nothing
+    partial = SearchResponse.model_construct(query="q", page=1, size=2, total=2, results=hits, partial=True)
+    partial._positions = [(0, ((3.0,), "a")), (0, ((2.0,), "b"))]
+    rendered = RenderedSearch(partial, FieldProjection.parse(None))
+    assert rendered.cursor_positions(1, None, 3) == [((3.0,), "a"), None, None]
+    after = [((1.0,), "x"), ((1.5,), "y"), None]
+    assert rendered.cursor_positions(2, after, 3) == [((2.0,), "b"), ((1.5,), "y"), None]
+    # Adapters that do not record positions are a single shard ordered by score
+    unrecorded = SearchResponse.model_construct(query="q", page=1, size=2, total=2, results=hits)
+    assert RenderedSearch(unrecorded, FieldProjection.parse(None)).cursor_positions(2, None, 1) == [((2.0,), "b")]
+
+
+@pytest.mark.anyio
+async def test_partial_response_is_not_cached():
+    backend = MockIndexAdapter()
+    calls = []
+
+    async def partial_search(**kwargs):
+        calls.append(kwargs)
+        response = await MockIndexAdapter.search(backend, **kwargs)
+        return response.model_copy(update={"partial": True})
+
+    backend.search = partial_search  # type: ignore[method-assign]
+    svc = SearchService(index_adapter=backend)
+    await svc.search(query="slow shard", page=1, size=5)
+    await svc.search(query="slow shard", page=1, size=5)
+    assert len(calls) == 2
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from search_api.adapters.index_adapter import IndexAdapter
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndexAdapter, SearchCancelled
+from search_api.adapters.sharded_index_adapter import ShardedIndexAdapter
+from search_api.models.schemas import SearchResponse
+
+
+class SlowShard(IndexAdapter):
+    async def search(self, **kwargs) -> SearchResponse:  # type: ignore[override]
+        await asyncio.sleep(1.0)
+        raise AssertionError("should have been cancelled")
+
+
+class BlockingShard(InvertedIndexAdapter):
+    def search_sync(self, *args, **kwargs) -> SearchResponse:  # type: ignore[override]
+        # CPU-bound scoring never yields to the event loop
+        time.sleep(0.3)
+        return super().search_sync(*args, **kwargs)
+
+
+class StuckShard(InvertedIndexAdapter):
+    stopped = None
+
+    def search_sync(self, *args, **kwargs) -> SearchResponse:  # type: ignore[override]
+        # Scores until its cancel flag (the last argument) is set
+        self.stopped = args[-1].wait(5.0)
+        raise SearchCancelled()
+
+
+@pytest.mark.anyio
+async def test_scatter_gather_merges_top_k_across_shards():
+    idx = ShardedIndexAdapter.in_memory(num_shards=3)
+    for i in range(30):
+        body = "rare " * (i % 5 + 1) + "filler " * 5
+        idx.add_document(IndexedDocument(doc_id=f"d{i}", url=f"https://example.com/{i}", body=body, language="en"))
+    resp = await idx.search(query="rare", page=1, size=5)
+    assert resp.total == 30
+    assert not resp.partial
+    scores = [r.score for r in resp.results]
+    assert scores == sorted(scores, reverse=True) and len(scores) == 5
+    assert resp.facets[0].counts[0].count == 30
+
+
+@pytest.mark.anyio
+async def test_slow_shard_marks_response_partial():
+    fast = ShardedIndexAdapter.in_memory(num_shards=1).shards[0]
+    fast.add_document(IndexedDocument(doc_id="x", url="https://example.com/x", body="hello"))
+    idx = ShardedIndexAdapter([fast, SlowShard()], shard_timeout_seconds=0.05)
+    resp = await idx.search(query="hello", page=1, size=10)
+    assert resp.partial
+    assert [r.doc_id for r in resp.results] == ["x"]
+
+
+@pytest.mark.anyio
+async def test_blocking_shard_misses_deadline():
+    fast = InvertedIndexAdapter()
+    fast.add_document(IndexedDocument(doc_id="x", url="https://example.com/x", body="hello"))
+    idx = ShardedIndexAdapter([fast, BlockingShard()], shard_timeout_seconds=0.05)
+    started = time.monotonic()
+    resp = await idx.search(query="hello", page=1, size=10)
+    assert time.monotonic() - started < 0.25
+    assert resp.partial
+    assert [r.doc_id for r in resp.results] == ["x"]
+
+
+@pytest.mark.anyio
+async def test_abandoned_shard_search_is_stopped():
+    fast = InvertedIndexAdapter()
+    fast.add_document(IndexedDocument(doc_id="x", url="https://example.com/x", body="hello"))
+    stuck = StuckShard()
+    idx = ShardedIndexAdapter([fast, stuck], shard_timeout_seconds=0.05)
+    resp = await idx.search(query="hello", page=1, size=10)
+    assert resp.partial
+    deadline = time.monotonic() + 1.0
+    while stuck.stopped is None and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert stuck.stopped is True
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from search_api.adapters.index_adapter import IndexAdapter, MockIndexAdapter
+from search_api.models.schemas import SearchResponse
+from search_api.services.search_service import SearchService
+from search_api.services.single_flight import SingleFlight
+
+
+class SlowCountingIndex(IndexAdapter):
+    def __init__(self, fail: bool = False) -> None:
+        self.calls = 0
+        self.fail = fail
+
+    async def search(self, **kwargs) -> SearchResponse:  # type: ignore[override]
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("backend down")
+        return await MockIndexAdapter().search(**kwargs)
+
+
+@pytest.mark.anyio
+async def test_concurrent_identical_searches_share_one_backend_call():
+    idx = SlowCountingIndex()
+    svc = SearchService(index_adapter=idx)
+    responses = await asyncio.gather(*(svc.search(query="herd", page=1, size=5) for _ in range(20)))
+    assert idx.calls == 1
+    assert all(r.results == responses[0].results for r in responses)
+
+
+@pytest.mark.anyio
+async def test_errors_propagate_to_every_waiter():
+    idx = SlowCountingIndex(fail=True)
+    svc = SearchService(index_adapter=idx)
+    calls = [svc.search(query="boom", page=1, size=5) for _ in range(5)]
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert idx.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights: SingleFlight[int] = SingleFlight()
+
+    async def work() -> int:
+        await asyncio.sleep(0.05)
+        return 42
+
+    first = asyncio.ensure_future(flights.do("k", work))
+    second = asyncio.ensure_future(flights.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 42
+    assert len(flights) == 0
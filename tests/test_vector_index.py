@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from search_api.adapters.inverted_index_adapter import IndexedDocument, InvertedIndexAdapter
+from search_api.adapters.vector_index_adapter import IVFIndex, VectorIndexAdapter
+from search_api.config.settings import get_settings
+from search_api.services.search_service import SearchService
+
+
+def test_ivf_matches_exact_top_hit():
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(2000, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ivf = IVFIndex(dim=32, n_lists=16, n_probe=16)
+    ivf.add(vectors)
+    ivf.train()
+    scores, ids = ivf.search(vectors[:10], k=3)
+    assert ids.shape == (10, 3)
+    assert ids[:, 0].tolist() == list(range(10))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+@pytest.mark.anyio
+async def test_search_service_blends_lexical_and_vector():
+    lexical = InvertedIndexAdapter()
+    vector = VectorIndexAdapter(lexical, train_threshold=10_000)
+    docs = [
+        IndexedDocument(doc_id="a", url="https://example.com/a", title="async python", body="event loop tasks"),
+        IndexedDocument(doc_id="b", url="https://example.com/b", title="python packaging", body="wheels"),
+        IndexedDocument(doc_id="c", url="https://example.com/c", title="gardening", body="tomatoes"),
+    ]
+    for doc in docs:
+        lexical.add_document(doc)
+    vector.add_documents(docs)
+    svc = SearchService(index_adapter=lexical, vector_adapter=vector)
+    resp = await svc.search(query="python event loop", page=1, size=5)
+    assert resp.results[0].doc_id == "a"
+    features = resp.results[0].metadata["rank_features"]
+    assert {"bm25", "vector", "rrf"} <= set(features)
+
+    resp = await svc.search(query="python event loop", page=1, size=5, fields=["title"])
+    assert resp.results[0].doc_id == "a" and resp.results[0].metadata is None
+    resp = await svc.search(query="python event loop", page=1, size=5, fields=["metadata.topic"])
+    assert all(not hit.metadata for hit in resp.results)
+
+
+def test_ivf_assigns_vectors_added_after_training():
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(600, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ivf = IVFIndex(dim=16, n_lists=8, n_probe=8)
+    ivf.add(vectors[:100])
+    ivf.train()
+    for row in vectors[100:]:
+        ivf.add(row[None, :])
+    _, ids = ivf.search(vectors[[150, 599]], k=1)
+    assert ids[:, 0].tolist() == [150, 599]
+
+
+@pytest.mark.anyio
+async def test_vector_search_filters_and_snippets():
+    lexical = InvertedIndexAdapter()
+    vector = VectorIndexAdapter(lexical)
+    docs = [
+        IndexedDocument(doc_id="en", url="https://a.example/1", body="python tips", language="en"),
+        IndexedDocument(doc_id="fr", url="https://b.example/1", body="python astuces", language="fr"),
+        IndexedDocument(doc_id="tagged", url="https://a.example/2", body="python tricks", metadata={"topic": "code"}),
+        IndexedDocument(doc_id="en", url="https://a.example/1", body="python tips again"),
+    ]
+    for doc in docs:
+        lexical.add_document(doc)
+        vector.add_document(doc)
+    resp = await vector.search(query="python", page=1, size=10, filters={"topic": "code"})
+    assert [r.doc_id for r in resp.results] == ["tagged"]
+    assert resp.results[0].snippet == "python tricks"
+    resp = await vector.search(query="python", page=1, size=10, site="a.example")
+    assert sorted(r.doc_id for r in resp.results) == ["en", "tagged"]
+    assert (await vector.search(query="python", page=1, size=10)).total == 3
+
+
+@pytest.mark.anyio
+async def test_replaced_rows_are_compacted_away():
+    lexical = InvertedIndexAdapter()
+    vector = VectorIndexAdapter(lexical, train_threshold=8)
+    for i in range(20):
+        doc = IndexedDocument(doc_id=f"d{i % 4}", url=f"https://example.com/{i % 4}", body=f"python revision {i}")
+        lexical.add_document(doc)
+        vector.add_document(doc)
+    assert len(vector.index) <= 8
+    resp = await vector.search(query="python revision", page=1, size=10)
+    assert sorted(r.doc_id for r in resp.results) == ["d0", "d1", "d2", "d3"]
+    assert {r.snippet for r in resp.results} == {f"python revision {i}" for i in range(16, 20)}
+
+
+@pytest.mark.anyio
+async def test_blending_stops_at_the_result_window(monkeypatch):
+    monkeypatch.setattr(get_settings(), "result_window_size", 2)
+    lexical = InvertedIndexAdapter()
+    vector = VectorIndexAdapter(lexical)
+    for i in range(5):
+        doc = IndexedDocument(doc_id=f"d{i}", url=f"https://example.com/{i}", body="python " * (i + 1))
+        lexical.add_document(doc)
+        vector.add_document(doc)
+    depths = []
+    search = vector.search
+
+    async def recording_search(**kwargs):
+        depths.append(kwargs["page"] * kwargs["size"])
+        return await search(**kwargs)
+
+    monkeypatch.setattr(vector, "search", recording_search)
+    svc = SearchService(index_adapter=lexical, vector_adapter=vector)
+    first = await svc.search(query="python", page=1, size=2)
+    assert "rrf" in first.results[0].metadata["rank_features"] and first.next_cursor is None
+    deep = await svc.search(query="python", page=2, size=2)
+    assert depths == [2]
+    assert "rrf" not in deep.results[0].metadata["rank_features"] and deep.next_cursor is not None
+    rest = await svc.search(query="python", page=1, size=2, cursor=deep.next_cursor)
+    assert [r.doc_id for r in rest.results] == ["d0"]
@@ -0,0 +1,163 @@
+import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from search_api.config.settings import get_settings
+from search_api.services.recrawl_service import RecrawlService
+from search_api.services.webhook_dispatcher import WebhookDispatcher
+
+
+class _Receiver(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Status codes to answer with, in order; 200 once exhausted
+    statuses = []
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        _Receiver.received.append((dict(self.headers), json.loads(body), body))
+        code = _Receiver.statuses.pop(0) if _Receiver.statuses else 200
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    monkeypatch.setattr(get_settings(), "allow_private_destinations", True)
+    _Receiver.statuses = []
+    _Receiver.received = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Receiver)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/hook"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.anyio
+async def test_completions_are_batched_per_group_and_signed(receiver):
+    webhooks = WebhookDispatcher(batch_wait_seconds=0.05, signing_secret="s3cret")
+    service = RecrawlService(webhooks=webhooks)
+    runner = asyncio.create_task(webhooks.run())
+    try:
+        urls = ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+        group = await service.enqueue_recrawl(urls, priority="normal", reason=None, callback_url=receiver)
+        await service.mark_finished_many([(job.job_id, True, {"doc_id": job.job_id}) for job in group.jobs])
+        await _wait_for(lambda: webhooks.stats.delivered == 1)
+    finally:
+        runner.cancel()
+        await webhooks.close()
+
+    assert len(_Receiver.received) == 1
+    headers, payload, body = _Receiver.received[0]
+    assert payload["job_group_id"] == group.job_group_id
+    assert sorted(job["url"] for job in payload["jobs"]) == urls
+    assert {job["status"] for job in payload["jobs"]} == {"succeeded"}
+    expected = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert headers["X-Webhook-Signature"] == f"sha256={expected}"
+
+
+@pytest.mark.anyio
+async def test_failed_delivery_is_retried_with_same_id(receiver):
+    _Receiver.statuses = [503, 500]
+    webhooks = WebhookDispatcher(batch_wait_seconds=0.0, backoff_base_seconds=0.01)
+    runner = asyncio.create_task(webhooks.run())
+    try:
+        webhooks.submit(receiver, "group-1", {"job_id": "job-1", "status": "failed"})
+        await _wait_for(lambda: webhooks.stats.delivered == 1)
+    finally:
+        runner.cancel()
+        await webhooks.close()
+
+    assert webhooks.stats.retried == 2
+    assert [headers["X-Webhook-Attempt"] for headers, _, _ in _Receiver.received] == ["1", "2", "3"]
+    assert len({headers["X-Webhook-Id"] for headers, _, _ in _Receiver.received}) == 1
+
+
+@pytest.mark.anyio
+async def test_retry_backlog_survives_restart(receiver, tmp_path, monkeypatch):
+    _Receiver.statuses = [500]
+    # Full backoff, so the retry cannot come due before the restart
+    monkeypatch.setattr("search_api.services.webhook_dispatcher.random.uniform", lambda low, high: high)
+    path = str(tmp_path / "webhooks.sqlite3")
+    first = WebhookDispatcher(batch_wait_seconds=0.0, backoff_base_seconds=60.0, backlog_path=path)
+    runner = asyncio.create_task(first.run())
+    first.submit(receiver, "group-1", {"job_id": "job-1", "status": "succeeded"})
+    await _wait_for(lambda: first.stats.retried == 1)
+    # Still batching when the process stops; kept for the next one as well
+    first.submit(receiver, "group-2", {"job_id": "job-2", "status": "succeeded"})
+    runner.cancel()
+    await first.close()
+
+    second = WebhookDispatcher(backoff_base_seconds=0.01, backlog_path=path)
+    await second.load()
+    assert second.backlog_size == 2
+    # The 60s backoff was chosen by the first process; make it due now
+    second._retries = [(0.0, seq, delivery) for _, seq, delivery in second._retries]
+    runner = asyncio.create_task(second.run())
+    try:
+        await _wait_for(lambda: second.stats.delivered == 2)
+    finally:
+        runner.cancel()
+        await second.close()
+    assert {payload["job_group_id"] for _, payload, _ in _Receiver.received[1:]} == {"group-1", "group-2"}
+
+    third = WebhookDispatcher(backlog_path=path)
+    await third.load()
+    assert third.backlog_size == 0
+    await third.close()
+
+
+@pytest.mark.anyio
+async def test_callback_for_a_job_finishing_during_submission_is_not_dropped(monkeypatch):
+    webhooks = WebhookDispatcher()
+    service = RecrawlService(webhooks=webhooks)
+    submitted = []
+    monkeypatch.setattr(webhooks, "submit", lambda url, group_id, job: submitted.append((group_id, job["status"])))
+    first = await service.enqueue_recrawl(["https://example.com/a"], priority="normal", reason=None, callback_url=None)
+    job_id = first.jobs[0].job_id
+    get = service.jobs.get
+
+    async def finishing_get(requested):
+        # Hand out the queued record, then let the job finish before the caller looks at it
+        monkeypatch.setattr(service.jobs, "get", get)
+        stale = copy.copy(await get(requested))
+        await service.mark_finished_many([(job_id, True, None)])
+        return stale
+
+    monkeypatch.setattr(service.jobs, "get", finishing_get)
+    second = await service.enqueue_recrawl(
+        ["https://example.com/a"], priority="normal", reason=None, callback_url="http://hook.invalid/"
+    )
+    assert submitted == [(second.job_group_id, "succeeded")]
+
+
+@pytest.mark.anyio
+async def test_deliveries_to_private_addresses_are_refused(receiver, monkeypatch):
+    monkeypatch.setattr(get_settings(), "allow_private_destinations", False)
+    webhooks = WebhookDispatcher(batch_wait_seconds=0.0)
+    runner = asyncio.create_task(webhooks.run())
+    try:
+        webhooks.submit(receiver, "group-1", {"job_id": "job-1"})
+        await _wait_for(lambda: webhooks.stats.dropped == 1)
+    finally:
+        runner.cancel()
+        await webhooks.close()
+    assert _Receiver.received == [] and webhooks.stats.retried == 0 and webhooks.backlog_size == 0
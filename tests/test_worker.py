@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from search_api.adapters.queue_adapter import InMemoryPriorityQueueAdapter
+from search_api.services.recrawl_service import RecrawlService
+from search_api.tasks.worker import _group_by_host, _process_group, recrawl_worker
+
+
+@pytest.mark.anyio
+async def test_consume_batch_returns_ready_jobs_or_times_out():
+    queue = InMemoryPriorityQueueAdapter()
+    assert await queue.consume_batch(max_items=10, max_wait=0.01) == []
+    await queue.enqueue([f"https://example.com/{i}" for i in range(5)], priority="normal", group_id="g")
+    batch = await queue.consume_batch(max_items=3, max_wait=0.01)
+    assert len(batch) == 3 and len({job_id for job_id, _, _ in batch}) == 3
+    assert queue.ready_count == 2
+
+
+def test_group_by_host():
+    batch = [("1", "https://a.com/x", "normal"), ("2", "https://b.com/y", "high"), ("3", "https://a.com/z", "low")]
+    assert {host: [job[0] for job in jobs] for host, jobs in _group_by_host(batch).items()} == {
+        "a.com": ["1", "3"],
+        "b.com": ["2"],
+    }
+
+
+@pytest.mark.anyio
+async def test_worker_drains_jobs_in_batches():
+    queue = InMemoryPriorityQueueAdapter()
+    service = RecrawlService(queue_adapter=queue)
+    urls = [f"https://host{i % 20}.example/{i}" for i in range(2000)]
+    group = await service.enqueue_recrawl(urls, priority="normal", reason=None, callback_url=None)
+    worker = asyncio.create_task(recrawl_worker(queue, service, capacity=2000))
+    try:
+        for _ in range(100):
+            statuses = [(await service.get_status(job.job_id)).status for job in group.jobs]
+            if all(status == "succeeded" for status in statuses):
+                break
+            await asyncio.sleep(0.05)
+        assert all(status == "succeeded" for status in statuses)
+    finally:
+        queue.close()
+        worker.cancel()
+
+
+@pytest.mark.anyio
+async def test_group_is_acked_when_recording_results_fails(monkeypatch):
+    queue = InMemoryPriorityQueueAdapter()
+    service = RecrawlService(queue_adapter=queue)
+    await service.enqueue_recrawl(["https://example.com/a"], priority="normal", reason=None, callback_url=None)
+    acked = []
+
+    async def broken(outcomes):
+        raise RuntimeError("job store down")
+
+    async def ack_many(job_ids):
+        acked.extend(job_ids)
+
+    monkeypatch.setattr(service, "mark_finished_many", broken)
+    monkeypatch.setattr(queue, "ack_many", ack_many)
+    batch = await queue.consume_batch(max_items=10, max_wait=0.01)
+    await _process_group(service, queue, batch)
+    assert acked == [batch[0][0]]
+
+
+@pytest.mark.anyio
+async def test_cancelling_the_worker_cancels_its_group_tasks(monkeypatch):
+    queue = InMemoryPriorityQueueAdapter()
+    service = RecrawlService(queue_adapter=queue)
+    started = asyncio.Event()
+    cancelled = []
+
+    async def hang(url, *args):
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    monkeypatch.setattr("search_api.tasks.worker._crawl", hang)
+    await service.enqueue_recrawl(["https://example.com/a"], priority="normal", reason=None, callback_url=None)
+    worker = asyncio.create_task(recrawl_worker(queue, service))
+    await asyncio.wait_for(started.wait(), 1)
+    worker.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await worker
+    assert cancelled == ["https://example.com/a"]